@@ -0,0 +1,4 @@
+import time
+
+# Reference point for the app_import_duration_seconds metric
+IMPORT_STARTED = time.perf_counter()
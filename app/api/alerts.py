@@ -0,0 +1,34 @@
+"""Alertmanager webhook receiver endpoints."""
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import get_db
+from app.schemas.schemas import AlertmanagerWebhook, AlertmanagerWebhookResult
+from app.services.alert_dedup import process_alerts
+from app.services.batching import BackpressureError
+
+router = APIRouter()
+
+
+@router.post("/alerts/alertmanager", response_model=AlertmanagerWebhookResult)
+async def alertmanager_webhook(
+    payload: AlertmanagerWebhook,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Receive Alertmanager notifications.
+
+    Alerts are deduplicated by label fingerprint: the first firing opens an
+    incident, repeated firings and resolutions are appended to its timeline.
+    """
+    try:
+        result = await process_alerts(db, payload.alerts)
+    except BackpressureError:
+        raise HTTPException(
+            status_code=503,
+            detail="Alert timeline queue is full, retry later",
+            headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER_SECONDS)},
+        )
+    return AlertmanagerWebhookResult(**result)
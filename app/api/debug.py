@@ -0,0 +1,62 @@
+"""Operator debugging endpoints (disabled unless ADMIN_API_KEY is set)."""
+
+import asyncio
+import hmac
+import threading
+
+from fastapi import APIRouter, Header, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from app.core.config import settings
+from app.core.profiler import Sampler, TaskContexts, profile_lock, route_codes
+
+router = APIRouter()
+
+
+def require_admin(api_key: str) -> None:
+    if not settings.ADMIN_API_KEY:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not api_key or not hmac.compare_digest(api_key.encode(), settings.ADMIN_API_KEY.encode()):
+        raise HTTPException(status_code=401, detail="Invalid API key")
+
+
+@router.get("/debug/profile")
+async def profile(
+    request: Request,
+    seconds: float = Query(10, gt=0, le=60),
+    output_format: str = Query("collapsed", alias="format", pattern="^(collapsed|speedscope)$"),
+    interval_ms: float = Query(5, ge=1, le=100),
+    api_key: str = Header(None, alias=settings.API_KEY_HEADER),
+):
+    """
+    Sample this worker's event loop for N seconds.
+
+    Returns collapsed stacks (for flamegraph.pl / speedscope import) or a
+    speedscope JSON document, with samples grouped by route. Only the
+    worker that receives the request is profiled.
+    """
+    require_admin(api_key)
+    if not profile_lock.acquire(blocking=False):
+        raise HTTPException(status_code=409, detail="A profile is already running on this worker")
+
+    tasks = TaskContexts(asyncio.get_running_loop())
+    tasks.install()
+    try:
+        sampler = Sampler(
+            threading.get_ident(),
+            route_codes(request.app.routes),
+            interval=interval_ms / 1000,
+            tasks=tasks,
+            routes=request.app.routes,
+        )
+        result = await asyncio.to_thread(sampler.run, seconds)
+    finally:
+        tasks.uninstall()
+        profile_lock.release()
+
+    if output_format == "speedscope":
+        return JSONResponse(
+            result.speedscope(name=f"{settings.APP_NAME} {seconds:g}s"),
+            headers={"Content-Disposition": 'attachment; filename="profile.speedscope.json"'},
+        )
+    return PlainTextResponse(result.collapsed())
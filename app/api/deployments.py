@@ -1,16 +1,32 @@
 """Deployment tracking API endpoints."""
 
+import uuid
 from typing import List, Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
 from datetime import datetime, timedelta
 
+from app.core.cache import DEPLOYMENT, DeploymentRecord, object_cache
+from app.core.config import settings
 from app.core.database import get_db
-from app.models.models import Deployment, DeploymentStatus
-from app.schemas.schemas import DeploymentCreate, DeploymentUpdate, DeploymentResponse
+from app.core.etag import (
+    current_etag, entity_etag, etag_matches, list_etag, not_modified, wants_validation,
+)
+from app.core.fieldsets import load_columns, parse_fields, sparse_response
+from app.models.models import Deployment, DeploymentStatus, Environment, Service
+from app.schemas.schemas import (
+    DeploymentCreate, DeploymentUpdate, DeploymentResponse,
+    DeploymentWebhookEvent, DeploymentWebhookAccepted,
+)
 from app.core.middleware import DEPLOYMENT_COUNT
+from app.services.archive import archived_aggregates
+from app.services.batching import BackpressureError
+from app.services.deployment_ingest import deployment_ingest, create_event, update_event
+from app.services.dimensions import interned
+from app.services.events import make_event, publish
+from app.services.idempotency import IDEMPOTENCY_HEADER, idempotency_store
 
 router = APIRouter()
 
@@ -19,11 +35,26 @@ router = APIRouter()
 async def create_deployment(
     deployment: DeploymentCreate,
     db: AsyncSession = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER, max_length=255),
 ):
-    """Register a new deployment event."""
+    """
+    Register a new deployment event.
+
+    With an ``Idempotency-Key`` header, retries of the same request return
+    the original response instead of registering the deployment again.
+    """
+    if idempotency_key:
+        return await idempotency_store.execute(
+            db, "deployments", idempotency_key, deployment,
+            lambda: _insert_deployment(db, deployment), DeploymentResponse, 201,
+        )
+    return await _insert_deployment(db, deployment)
+
+
+async def _insert_deployment(db: AsyncSession, deployment: DeploymentCreate) -> Deployment:
     db_deployment = Deployment(
-        service_name=deployment.service_name,
-        environment=deployment.environment,
+        service_id=await interned.resolve(Service, deployment.service_name),
+        environment_id=await interned.resolve(Environment, deployment.environment),
         version=deployment.version,
         commit_sha=deployment.commit_sha,
         deployed_by=deployment.deployed_by,
@@ -33,6 +64,7 @@ async def create_deployment(
     db.add(db_deployment)
     await db.flush()
     await db.refresh(db_deployment)
+    await publish(db, make_event("deployment.created", db_deployment))
 
     DEPLOYMENT_COUNT.labels(
         environment=deployment.environment, status="pending"
@@ -41,43 +73,130 @@ async def create_deployment(
     return db_deployment
 
 
+@router.post("/deployments/webhook", response_model=DeploymentWebhookAccepted, status_code=202)
+async def deployment_webhook(event: DeploymentWebhookEvent):
+    """
+    Accept a CI deployment event for asynchronous, batched ingestion.
+
+    Events are written within a few milliseconds by a background writer;
+    ``created`` events return the id to use for later ``status_changed`` events.
+    """
+    if not settings.DEPLOYMENT_INGEST_ENABLED:
+        raise HTTPException(status_code=404, detail="Asynchronous deployment ingestion is disabled")
+
+    received_at = datetime.utcnow()
+    if event.event == "created":
+        if not event.deployment:
+            raise HTTPException(status_code=422, detail="'created' events require a deployment")
+        deployment_id = event.deployment_id or uuid.uuid4()
+        queued = create_event(deployment_id, event.deployment, received_at)
+    elif event.event == "status_changed":
+        if not event.deployment_id or not event.status:
+            raise HTTPException(
+                status_code=422,
+                detail="'status_changed' events require deployment_id and status",
+            )
+        try:
+            status = DeploymentStatus(event.status)
+        except ValueError:
+            raise HTTPException(status_code=422, detail=f"Unknown deployment status: {event.status}")
+        deployment_id = event.deployment_id
+        queued = update_event(deployment_id, status, event.duration_seconds, received_at)
+    else:
+        raise HTTPException(status_code=422, detail=f"Unknown event type: {event.event}")
+
+    try:
+        await deployment_ingest.submit(queued)
+    except BackpressureError:
+        raise HTTPException(
+            status_code=503,
+            detail="Deployment ingestion queue is full, retry later",
+            headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER_SECONDS)},
+        )
+
+    return DeploymentWebhookAccepted(deployment_id=deployment_id, event=event.event)
+
+
 @router.get("/deployments", response_model=List[DeploymentResponse])
 async def list_deployments(
+    request: Request,
+    response: Response,
     service_name: Optional[str] = Query(None),
     environment: Optional[str] = Query(None),
     status: Optional[str] = Query(None),
     limit: int = Query(20, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    fields: Optional[str] = Query(None, description="Comma-separated subset of fields to return"),
     db: AsyncSession = Depends(get_db),
 ):
     """List deployments with optional filters."""
-    query = select(Deployment).order_by(Deployment.created_at.desc())
+    selected = parse_fields(fields, DeploymentResponse)
 
+    conditions = []
     if service_name:
-        query = query.where(Deployment.service_name == service_name)
+        conditions.append(Deployment.service_id == interned.key(Service, service_name))
     if environment:
-        query = query.where(Deployment.environment == environment)
+        conditions.append(Deployment.environment_id == interned.key(Environment, environment))
     if status:
-        query = query.where(Deployment.status == status)
+        conditions.append(Deployment.status == status)
+
+    # Computed before the page is read: a write landing in between yields
+    # fresh rows under an older tag, which only costs the next poll a 200.
+    params = {
+        "service_name": service_name, "environment": environment, "status": status,
+        "limit": limit, "offset": offset, "fields": selected,
+    }
+    etag = await list_etag(db, Deployment, conditions, params)
+    if etag_matches(request, etag):
+        return not_modified(etag, "deployments")
+    response.headers["ETag"] = etag
 
-    query = query.limit(limit).offset(offset)
+    query = (
+        select(Deployment)
+        .where(*conditions)
+        .order_by(Deployment.created_at.desc())
+        .limit(limit)
+        .offset(offset)
+    )
+    if selected:
+        query = query.options(load_columns(Deployment, selected))
     result = await db.execute(query)
+    if selected:
+        return sparse_response(result.scalars().all(), DeploymentResponse, selected, {"ETag": etag})
     return result.scalars().all()
 
 
 @router.get("/deployments/{deployment_id}", response_model=DeploymentResponse)
 async def get_deployment(
     deployment_id: UUID,
+    request: Request,
+    response: Response,
     db: AsyncSession = Depends(get_db),
 ):
     """Get a specific deployment by ID."""
-    result = await db.execute(
-        select(Deployment).where(Deployment.id == deployment_id)
-    )
-    deployment = result.scalar_one_or_none()
-    if not deployment:
-        raise HTTPException(status_code=404, detail="Deployment not found")
-    return deployment
+    record = object_cache.get(DEPLOYMENT, deployment_id)
+    if record is None:
+        if wants_validation(request):
+            etag = await current_etag(db, Deployment, deployment_id)
+            if etag is None:
+                raise HTTPException(status_code=404, detail="Deployment not found")
+            if etag_matches(request, etag):
+                return not_modified(etag, "deployment")
+
+        token = object_cache.token()
+        result = await db.execute(
+            select(Deployment).where(Deployment.id == deployment_id)
+        )
+        deployment = result.scalar_one_or_none()
+        if not deployment:
+            raise HTTPException(status_code=404, detail="Deployment not found")
+        record = object_cache.put(DEPLOYMENT, deployment_id, DeploymentRecord.from_row(deployment), token)
+
+    etag = entity_etag(deployment_id, record.updated_at)
+    if etag_matches(request, etag):
+        return not_modified(etag, "deployment")
+    response.headers["ETag"] = etag
+    return record
 
 
 @router.patch("/deployments/{deployment_id}", response_model=DeploymentResponse)
@@ -101,6 +220,8 @@ async def update_deployment(
 
     await db.flush()
     await db.refresh(deployment)
+    await publish(db, make_event("deployment.updated", deployment))
+    object_cache.invalidate(DEPLOYMENT, deployment_id)
 
     DEPLOYMENT_COUNT.labels(
         environment=deployment.environment, status=update.status
@@ -120,20 +241,25 @@ async def deployment_stats(
     base_query = select(Deployment).where(Deployment.created_at >= since)
 
     if environment:
-        base_query = base_query.where(Deployment.environment == environment)
+        base_query = base_query.where(Deployment.environment_id == interned.key(Environment, environment))
 
     result = await db.execute(base_query)
     deployments = result.scalars().all()
 
-    total = len(deployments)
-    successful = sum(1 for d in deployments if d.status == DeploymentStatus.SUCCESS)
-    failed = sum(1 for d in deployments if d.status == DeploymentStatus.FAILED)
-    rolled_back = sum(1 for d in deployments if d.status == DeploymentStatus.ROLLED_BACK)
+    archived = await archived_aggregates(since, environment)
+
+    total = len(deployments) + archived.total
+    successful = sum(1 for d in deployments if d.status == DeploymentStatus.SUCCESS) + archived.success
+    failed = sum(1 for d in deployments if d.status == DeploymentStatus.FAILED) + archived.failed
+    rolled_back = sum(
+        1 for d in deployments if d.status == DeploymentStatus.ROLLED_BACK
+    ) + archived.rolled_back
 
     avg_duration = 0
     durations = [d.duration_seconds for d in deployments if d.duration_seconds]
-    if durations:
-        avg_duration = sum(durations) / len(durations)
+    duration_count = len(durations) + archived.duration_count
+    if duration_count:
+        avg_duration = (sum(durations) + archived.duration_sum) / duration_count
 
     return {
         "period_days": days,
@@ -0,0 +1,66 @@
+"""Live event stream endpoints (server-sent events)."""
+
+import asyncio
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+
+from app.core.config import settings
+from app.core.lifecycle import drain_state
+from app.services.events import event_broker, format_sse
+
+router = APIRouter()
+
+
+@router.get("/events/stream")
+async def event_stream(
+    request: Request,
+    service_name: Optional[str] = Query(None),
+    environment: Optional[str] = Query(None),
+    severity: Optional[str] = Query(None),
+):
+    """
+    Stream incident and deployment changes as server-sent events.
+
+    Replaces polling of the list and summary endpoints: events are pushed
+    from this worker's single LISTEN connection without any per-client query.
+    """
+    if not event_broker.running:
+        raise HTTPException(status_code=503, detail="Event stream is not available")
+    if event_broker.subscriber_count >= settings.EVENT_STREAM_MAX_CLIENTS:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many event stream clients",
+            headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER_SECONDS)},
+        )
+
+    subscription = event_broker.subscribe(
+        service_name=service_name, environment=environment, severity=severity
+    )
+
+    async def stream():
+        try:
+            yield "retry: 3000\n\n"
+            # A drain closes the subscription: ending the response lets the
+            # worker shut down, and the client reconnects after the retry
+            # delay to a worker that is still serving
+            while not drain_state.draining and not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(
+                        subscription.queue.get(),
+                        timeout=settings.EVENT_STREAM_HEARTBEAT_SECONDS,
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if event is None:
+                    break
+                yield format_sse(event)
+        finally:
+            event_broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -2,11 +2,13 @@
 
 import time
 from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 
 from app.core.database import get_db
 from app.core.config import settings
+from app.core.lifecycle import drain_state
 
 router = APIRouter()
 
@@ -22,6 +24,11 @@ async def liveness():
 @router.get("/readyz", summary="Readiness probe")
 async def readiness(db: AsyncSession = Depends(get_db)):
     """Kubernetes readiness probe - checks if the app can serve traffic."""
+    if drain_state.draining:
+        return JSONResponse(
+            status_code=503, content={"status": "draining", "database": "unknown"}
+        )
+
     try:
         await db.execute(text("SELECT 1"))
         db_status = "connected"
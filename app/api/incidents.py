@@ -2,17 +2,35 @@
 
 from typing import List, Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import PlainTextResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from datetime import datetime
+from datetime import datetime, timedelta
 
+from app.core.cache import INCIDENT, POSTMORTEM, IncidentRecord, invalidate_incident, object_cache
+from app.core.config import settings
 from app.core.database import get_db
-from app.models.models import Incident, IncidentTimeline, IncidentStatus, IncidentSeverity
+from app.core.etag import (
+    current_etag, entity_etag, etag_matches, list_etag, not_modified, wants_validation,
+)
+from app.core.fieldsets import load_columns, parse_fields, sparse_response
+from app.models.models import (
+    Environment, Incident, IncidentTimeline, IncidentStatus, IncidentSeverity, Service,
+)
 from app.schemas.schemas import (
-    IncidentCreate, IncidentUpdate, IncidentResponse, TimelineEventCreate
+    IncidentCreate, IncidentUpdate, IncidentResponse, TimelineEventCreate,
+    IncidentBulkTransition, IncidentBulkTransitionResult,
 )
 from app.core.middleware import INCIDENT_COUNT, MTTR_HISTOGRAM
+from app.services.alert_dedup import fingerprint_index
+from app.services.correlation import backfill, find_deployment
+from app.services.dimensions import interned
+from app.services.events import make_event, publish
+from app.services.idempotency import IDEMPOTENCY_HEADER, idempotency_store
+from app.services.incident_transitions import bulk_transition
+from app.services.notifications import enqueue, should_notify
+from app.services.postmortem import load_postmortem, render
 
 router = APIRouter()
 
@@ -21,64 +39,180 @@ router = APIRouter()
 async def create_incident(
     incident: IncidentCreate,
     db: AsyncSession = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER, max_length=255),
 ):
-    """Create a new incident."""
+    """
+    Create a new incident, correlating it to a recent deployment if possible.
+
+    With an ``Idempotency-Key`` header, retries of the same request return
+    the original response instead of opening a duplicate incident.
+    """
+    if idempotency_key:
+        return await idempotency_store.execute(
+            db, "incidents", idempotency_key, incident,
+            lambda: _insert_incident(db, incident), IncidentResponse, 201,
+        )
+    return await _insert_incident(db, incident)
+
+
+async def _insert_incident(db: AsyncSession, incident: IncidentCreate) -> Incident:
+    triggered_at = datetime.utcnow()
+    service_id = await interned.resolve(Service, incident.service_name)
+    environment_id = await interned.resolve(Environment, incident.environment)
+    deployment_id = incident.deployment_id
+    if deployment_id is None and settings.INCIDENT_CORRELATION_ENABLED:
+        deployment_id = await find_deployment(db, service_id, environment_id, triggered_at)
+
     db_incident = Incident(
         title=incident.title,
         description=incident.description,
         severity=IncidentSeverity(incident.severity),
         status=IncidentStatus.TRIGGERED,
-        service_name=incident.service_name,
-        environment=incident.environment,
-        deployment_id=incident.deployment_id,
+        service_id=service_id,
+        environment_id=environment_id,
+        deployment_id=deployment_id,
         on_call_engineer=incident.on_call_engineer,
-        triggered_at=datetime.utcnow(),
+        triggered_at=triggered_at,
     )
     db.add(db_incident)
     await db.flush()
     await db.refresh(db_incident)
+    await publish(db, make_event("incident.created", db_incident))
+    if should_notify(db_incident.severity):
+        await enqueue(db, "incident.created", db_incident)
 
     INCIDENT_COUNT.labels(severity=incident.severity, status="triggered").inc()
     return db_incident
 
 
+@router.post("/incidents/correlation/backfill")
+async def backfill_correlation(
+    days: int = Query(30, ge=1, le=365),
+    db: AsyncSession = Depends(get_db),
+):
+    """Attribute uncorrelated incidents from the last N days to their likely deployment."""
+    correlated = await backfill(db, datetime.utcnow() - timedelta(days=days))
+    return {"period_days": days, "correlated": correlated}
+
+
+@router.post("/incidents/bulk-transition", response_model=IncidentBulkTransitionResult)
+async def bulk_transition_incidents(
+    transition: IncidentBulkTransition,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Move many incidents to one status in a single UPDATE.
+
+    Matches the intersection of ``incident_ids`` and the filters; at least
+    one must be given. Incidents already in the target status are skipped.
+    """
+    try:
+        target = IncidentStatus(transition.status)
+        severity = IncidentSeverity(transition.severity) if transition.severity else None
+        current = IncidentStatus(transition.current_status) if transition.current_status else None
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+
+    conditions = []
+    if transition.incident_ids is not None:
+        conditions.append(Incident.id.in_(transition.incident_ids))
+    if transition.service_name:
+        conditions.append(Incident.service_id == interned.key(Service, transition.service_name))
+    if transition.environment:
+        conditions.append(Incident.environment_id == interned.key(Environment, transition.environment))
+    if severity:
+        conditions.append(Incident.severity == severity)
+    if current:
+        conditions.append(Incident.status == current)
+    if not conditions:
+        raise HTTPException(status_code=422, detail="Provide incident_ids or at least one filter")
+
+    rows = await bulk_transition(
+        db, target, conditions, transition.author, note=transition.note, root_cause=transition.root_cause
+    )
+    return IncidentBulkTransitionResult(
+        status=target.value, updated=len(rows), incident_ids=[row.id for row in rows]
+    )
+
+
 @router.get("/incidents", response_model=List[IncidentResponse])
 async def list_incidents(
+    request: Request,
+    response: Response,
     severity: Optional[str] = Query(None),
     status: Optional[str] = Query(None),
     service_name: Optional[str] = Query(None),
     limit: int = Query(20, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    fields: Optional[str] = Query(None, description="Comma-separated subset of fields to return"),
     db: AsyncSession = Depends(get_db),
 ):
     """List incidents with optional filters."""
-    query = select(Incident).order_by(Incident.triggered_at.desc())
+    selected = parse_fields(fields, IncidentResponse)
 
+    conditions = []
     if severity:
-        query = query.where(Incident.severity == severity)
+        conditions.append(Incident.severity == severity)
     if status:
-        query = query.where(Incident.status == status)
+        conditions.append(Incident.status == status)
     if service_name:
-        query = query.where(Incident.service_name == service_name)
+        conditions.append(Incident.service_id == interned.key(Service, service_name))
 
-    query = query.limit(limit).offset(offset)
+    params = {
+        "severity": severity, "status": status, "service_name": service_name,
+        "limit": limit, "offset": offset, "fields": selected,
+    }
+    etag = await list_etag(db, Incident, conditions, params)
+    if etag_matches(request, etag):
+        return not_modified(etag, "incidents")
+    response.headers["ETag"] = etag
+
+    query = (
+        select(Incident)
+        .where(*conditions)
+        .order_by(Incident.triggered_at.desc())
+        .limit(limit)
+        .offset(offset)
+    )
+    if selected:
+        query = query.options(load_columns(Incident, selected))
     result = await db.execute(query)
+    if selected:
+        return sparse_response(result.scalars().all(), IncidentResponse, selected, {"ETag": etag})
     return result.scalars().all()
 
 
 @router.get("/incidents/{incident_id}", response_model=IncidentResponse)
 async def get_incident(
     incident_id: UUID,
+    request: Request,
+    response: Response,
     db: AsyncSession = Depends(get_db),
 ):
     """Get a specific incident by ID."""
-    result = await db.execute(
-        select(Incident).where(Incident.id == incident_id)
-    )
-    incident = result.scalar_one_or_none()
-    if not incident:
-        raise HTTPException(status_code=404, detail="Incident not found")
-    return incident
+    record = object_cache.get(INCIDENT, incident_id)
+    if record is None:
+        if wants_validation(request):
+            etag = await current_etag(db, Incident, incident_id)
+            if etag is None:
+                raise HTTPException(status_code=404, detail="Incident not found")
+            if etag_matches(request, etag):
+                return not_modified(etag, "incident")
+
+        token = object_cache.token()
+        result = await db.execute(
+            select(Incident).where(Incident.id == incident_id)
+        )
+        incident = result.scalar_one_or_none()
+        if not incident:
+            raise HTTPException(status_code=404, detail="Incident not found")
+        record = object_cache.put(INCIDENT, incident_id, IncidentRecord.from_row(incident), token)
+
+    etag = entity_etag(incident_id, record.updated_at)
+    if etag_matches(request, etag):
+        return not_modified(etag, "incident")
+    response.headers["ETag"] = etag
+    return record
 
 
 @router.patch("/incidents/{incident_id}", response_model=IncidentResponse)
@@ -95,6 +229,15 @@ async def update_incident(
     if not incident:
         raise HTTPException(status_code=404, detail="Incident not found")
 
+    escalated = False
+    if update.severity:
+        try:
+            new_severity = IncidentSeverity(update.severity)
+        except ValueError as exc:
+            raise HTTPException(status_code=422, detail=str(exc))
+        escalated = should_notify(new_severity) and not should_notify(incident.severity)
+        incident.severity = new_severity
+
     if update.status:
         new_status = IncidentStatus(update.status)
         incident.status = new_status
@@ -107,6 +250,8 @@ async def update_incident(
                 mttr = (incident.resolved_at - incident.triggered_at).total_seconds()
                 incident.mttr_seconds = mttr
                 MTTR_HISTOGRAM.labels(severity=incident.severity.value).observe(mttr)
+            if incident.fingerprint:
+                fingerprint_index.evict(incident.fingerprint)
 
         INCIDENT_COUNT.labels(
             severity=incident.severity.value, status=update.status
@@ -122,9 +267,36 @@ async def update_incident(
     incident.updated_at = datetime.utcnow()
     await db.flush()
     await db.refresh(incident)
+    await publish(db, make_event("incident.updated", incident))
+    if escalated:
+        await enqueue(db, "incident.escalated", incident)
+    invalidate_incident(incident_id)
     return incident
 
 
+@router.get("/incidents/{incident_id}/postmortem")
+async def get_postmortem(
+    incident_id: UUID,
+    output_format: str = Query("markdown", alias="format", pattern="^(markdown|json)$"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Postmortem report: incident, timeline, linked deployment and the
+    service's deployments around the trigger time, as Markdown or JSON.
+    """
+    record = object_cache.get(POSTMORTEM, incident_id)
+    if record is None:
+        token = object_cache.token()
+        report = await load_postmortem(db, incident_id)
+        if report is None:
+            raise HTTPException(status_code=404, detail="Incident not found")
+        record = object_cache.put(POSTMORTEM, incident_id, render(report), token)
+
+    if output_format == "json":
+        return Response(record.json, media_type="application/json")
+    return PlainTextResponse(record.markdown, media_type="text/markdown; charset=utf-8")
+
+
 @router.post("/incidents/{incident_id}/timeline", status_code=201)
 async def add_timeline_event(
     incident_id: UUID,
@@ -135,7 +307,8 @@ async def add_timeline_event(
     result = await db.execute(
         select(Incident).where(Incident.id == incident_id)
     )
-    if not result.scalar_one_or_none():
+    incident = result.scalar_one_or_none()
+    if not incident:
         raise HTTPException(status_code=404, detail="Incident not found")
 
     timeline_event = IncidentTimeline(
@@ -147,6 +320,8 @@ async def add_timeline_event(
     db.add(timeline_event)
     await db.flush()
     await db.refresh(timeline_event)
+    await publish(db, make_event("incident.timeline", incident, event_type=event.event_type))
+    object_cache.invalidate(POSTMORTEM, incident_id)
 
     return {
         "id": str(timeline_event.id),
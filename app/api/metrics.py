@@ -3,12 +3,14 @@
 from typing import Optional
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, func
 from datetime import datetime, timedelta
 
 from app.core.database import get_db
-from app.models.models import Deployment, Incident, DeploymentStatus, IncidentStatus
+from app.models.models import Deployment, Environment, Incident, DeploymentStatus, IncidentStatus
 from app.schemas.schemas import DORAMetrics
+from app.services.archive import archived_aggregates
+from app.services.dimensions import interned
 
 router = APIRouter()
 
@@ -44,16 +46,17 @@ async def get_dora_metrics(
     Calculate DORA (DevOps Research and Assessment) four key metrics:
     1. Deployment Frequency
     2. Lead Time for Changes
-    3. Change Failure Rate
+    3. Change Failure Rate (by deployment status, and by linked incidents)
     4. Mean Time to Recovery (MTTR)
     """
     since = datetime.utcnow() - timedelta(days=days)
+    environment_id = interned.key(Environment, environment)
 
     # Fetch deployments
     dep_result = await db.execute(
         select(Deployment)
         .where(Deployment.created_at >= since)
-        .where(Deployment.environment == environment)
+        .where(Deployment.environment_id == environment_id)
     )
     deployments = dep_result.scalars().all()
 
@@ -61,31 +64,50 @@ async def get_dora_metrics(
     inc_result = await db.execute(
         select(Incident)
         .where(Incident.triggered_at >= since)
-        .where(Incident.environment == environment)
+        .where(Incident.environment_id == environment_id)
     )
     incidents = inc_result.scalars().all()
 
-    total_deps = len(deployments)
+    # Deployments in the window linked to at least one incident
+    caused_result = await db.execute(
+        select(func.count(func.distinct(Incident.deployment_id)))
+        .join(Deployment, Incident.deployment_id == Deployment.id)
+        .where(Deployment.created_at >= since)
+        .where(Deployment.environment_id == environment_id)
+    )
+    incident_causing_deps = caused_result.scalar_one()
+
+    # Rows older than the retention cutoff live in the cold archive
+    archived = await archived_aggregates(since, environment)
+
+    total_deps = len(deployments) + archived.total
     failed_deps = sum(
         1 for d in deployments
         if d.status in (DeploymentStatus.FAILED, DeploymentStatus.ROLLED_BACK)
-    )
+    ) + archived.failed + archived.rolled_back
+    incident_causing_deps += archived.caused_deployments
 
     # Deployment Frequency (per day)
     deployment_frequency = total_deps / days if days > 0 else 0
 
     # Lead Time for Changes (avg deployment duration in hours)
     durations = [d.duration_seconds for d in deployments if d.duration_seconds]
-    lead_time_hours = (sum(durations) / len(durations) / 3600) if durations else 0
+    duration_count = len(durations) + archived.duration_count
+    lead_time_hours = (
+        (sum(durations) + archived.duration_sum) / duration_count / 3600
+        if duration_count else 0
+    )
 
     # Change Failure Rate
     cfr = (failed_deps / total_deps * 100) if total_deps > 0 else 0
+    incident_cfr = (incident_causing_deps / total_deps * 100) if total_deps > 0 else 0
 
     # MTTR (Mean Time to Recovery in hours)
     resolved = [i for i in incidents if i.mttr_seconds is not None]
+    mttr_count = len(resolved) + archived.mttr_count
     mttr_hours = (
-        sum(i.mttr_seconds for i in resolved) / len(resolved) / 3600
-        if resolved else 0
+        (sum(i.mttr_seconds for i in resolved) + archived.mttr_sum) / mttr_count / 3600
+        if mttr_count else 0
     )
 
     rating = _rate_dora(deployment_frequency, lead_time_hours, cfr, mttr_hours)
@@ -94,6 +116,7 @@ async def get_dora_metrics(
         deployment_frequency=round(deployment_frequency, 2),
         lead_time_for_changes_hours=round(lead_time_hours, 2),
         change_failure_rate=round(cfr, 2),
+        incident_change_failure_rate=round(incident_cfr, 2),
         mttr_hours=round(mttr_hours, 2),
         period_days=days,
         environment=environment,
@@ -0,0 +1,139 @@
+"""Prometheus HTTP API subset served from metric rollups.
+
+Point a Grafana Prometheus data source at ``<app>/prom`` to chart
+deployment, incident, MTTR and SLO error-budget history straight from
+this service's database, including backfilled events.
+"""
+
+import time
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import get_db
+from app.services.promql import (
+    PromQLError, ResultCache, align, label_names, label_values_statement, matrix, parse,
+    parse_duration, parse_time, range_statement, series_labels, series_statement,
+)
+from app.services.rollups import METRICS
+
+router = APIRouter()
+
+result_cache = ResultCache(
+    settings.PROM_CACHE_SIZE, settings.PROM_CACHE_TTL_SECONDS, settings.PROM_CACHE_HISTORICAL_TTL_SECONDS
+)
+
+
+def _success(data) -> JSONResponse:
+    return JSONResponse({"status": "success", "data": data})
+
+
+def _bad_data(message: str) -> JSONResponse:
+    return JSONResponse({"status": "error", "errorType": "bad_data", "error": message}, status_code=400)
+
+
+async def _params(request: Request):
+    """Grafana sends GET query strings or POST form bodies."""
+    if request.method == "POST":
+        form = await request.form()
+        return [*request.query_params.multi_items(), *form.multi_items()]
+    return request.query_params.multi_items()
+
+
+def _one(params, name: str, default: Optional[str] = None) -> Optional[str]:
+    values = [value for key, value in params if key == name]
+    return values[-1] if values else default
+
+
+def _many(params, name: str) -> List[str]:
+    return [value for key, value in params if key == name]
+
+
+@router.api_route("/prom/api/v1/query_range", methods=["GET", "POST"])
+async def query_range(request: Request, db: AsyncSession = Depends(get_db)):
+    """Range query (``query``, ``start``, ``end``, ``step``)."""
+    params = await _params(request)
+    try:
+        expr = _one(params, "query")
+        if not expr:
+            raise PromQLError("missing query")
+        for name in ("start", "end", "step"):
+            if _one(params, name) is None:
+                raise PromQLError(f"missing {name}")
+        query = parse(expr)
+        start, end, step = align(
+            parse_time(_one(params, "start")),
+            parse_time(_one(params, "end")),
+            parse_duration(_one(params, "step")),
+            settings.ROLLUP_BUCKET_SECONDS,
+            settings.PROM_API_MAX_POINTS,
+        )
+    except PromQLError as exc:
+        return _bad_data(str(exc))
+
+    key = ("query_range", query, start, end, step)
+    data = result_cache.get(key)
+    if data is None:
+        statement = range_statement(query, start, end, step)
+        rows = (await db.execute(statement)).all() if statement is not None else []
+        data = {"resultType": "matrix", "result": matrix(query, rows, start, end, step)}
+        result_cache.put(key, data, end)
+    return _success(data)
+
+
+@router.api_route("/prom/api/v1/series", methods=["GET", "POST"])
+async def series(request: Request, db: AsyncSession = Depends(get_db)):
+    """Label sets of the series matching one or more ``match[]`` selectors."""
+    params = await _params(request)
+    try:
+        matches = _many(params, "match[]")
+        if not matches:
+            raise PromQLError("no match[] parameter provided")
+        queries = [parse(match) for match in matches]
+        if any(q.by is not None for q in queries):
+            raise PromQLError("match[] must be series selectors")
+        start = _one(params, "start")
+        end = _one(params, "end")
+        start = parse_time(start) if start else None
+        end = parse_time(end) if end else None
+    except PromQLError as exc:
+        return _bad_data(str(exc))
+
+    key = ("series", tuple(queries), start, end)
+    data = result_cache.get(key)
+    if data is None:
+        found = {}
+        for query in queries:
+            statement = series_statement(query.selector, start, end)
+            if statement is None:
+                continue
+            for row in (await db.execute(statement)).all():
+                labels = series_labels(query.selector.metric, row)
+                found[tuple(sorted(labels.items()))] = labels
+        data = [found[k] for k in sorted(found)]
+        result_cache.put(key, data, end)
+    return _success(data)
+
+
+@router.api_route("/prom/api/v1/labels", methods=["GET", "POST"])
+async def labels():
+    """Every label name exposed by the rollup metrics."""
+    return _success(label_names())
+
+
+@router.get("/prom/api/v1/label/{name}/values")
+async def label_values(name: str, db: AsyncSession = Depends(get_db)):
+    """Values of one label (used by Grafana template variables)."""
+    if name == "__name__":
+        return _success(sorted(METRICS))
+
+    key = ("label_values", name)
+    data = result_cache.get(key)
+    if data is None:
+        statement = label_values_statement(name)
+        data = list((await db.execute(statement)).scalars().all()) if statement is not None else []
+        result_cache.put(key, data, time.time())
+    return _success(data)
@@ -2,13 +2,17 @@
 
 from typing import List, Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
+from app.core.cache import SLO as SLO_KIND, SLORecord, object_cache
 from app.core.database import get_db
-from app.models.models import SLO
+from app.core.etag import current_etag, entity_etag, etag_matches, not_modified, wants_validation
+from app.models.models import SLO, Service
 from app.schemas.schemas import SLOCreate, SLOResponse
+from app.services.dimensions import interned
+from app.services.events import make_event, publish
 
 router = APIRouter()
 
@@ -20,7 +24,7 @@ async def create_slo(
 ):
     """Define a new Service Level Objective."""
     db_slo = SLO(
-        service_name=slo.service_name,
+        service_id=await interned.resolve(Service, slo.service_name),
         name=slo.name,
         description=slo.description,
         sli_type=slo.sli_type,
@@ -45,7 +49,7 @@ async def list_slos(
     query = select(SLO).order_by(SLO.service_name)
 
     if service_name:
-        query = query.where(SLO.service_name == service_name)
+        query = query.where(SLO.service_id == interned.key(Service, service_name))
     if breached is not None:
         query = query.where(SLO.is_breached == breached)
 
@@ -54,13 +58,34 @@ async def list_slos(
 
 
 @router.get("/slos/{slo_id}", response_model=SLOResponse)
-async def get_slo(slo_id: UUID, db: AsyncSession = Depends(get_db)):
+async def get_slo(
+    slo_id: UUID,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+):
     """Get a specific SLO by ID."""
-    result = await db.execute(select(SLO).where(SLO.id == slo_id))
-    slo = result.scalar_one_or_none()
-    if not slo:
-        raise HTTPException(status_code=404, detail="SLO not found")
-    return slo
+    record = object_cache.get(SLO_KIND, slo_id)
+    if record is None:
+        if wants_validation(request):
+            etag = await current_etag(db, SLO, slo_id)
+            if etag is None:
+                raise HTTPException(status_code=404, detail="SLO not found")
+            if etag_matches(request, etag):
+                return not_modified(etag, "slo")
+
+        token = object_cache.token()
+        result = await db.execute(select(SLO).where(SLO.id == slo_id))
+        slo = result.scalar_one_or_none()
+        if not slo:
+            raise HTTPException(status_code=404, detail="SLO not found")
+        record = object_cache.put(SLO_KIND, slo_id, SLORecord.from_row(slo), token)
+
+    etag = entity_etag(slo_id, record.updated_at)
+    if etag_matches(request, etag):
+        return not_modified(etag, "slo")
+    response.headers["ETag"] = etag
+    return record
 
 
 @router.patch("/slos/{slo_id}", response_model=SLOResponse)
@@ -91,4 +116,6 @@ async def update_slo_status(
 
     await db.flush()
     await db.refresh(slo)
+    await publish(db, make_event("slo.updated", slo))
+    object_cache.invalidate(SLO_KIND, slo_id)
     return slo
@@ -0,0 +1,196 @@
+"""Admission control and load shedding to protect the database pool.
+
+Every request is classified into a route class (writes, cheap reads,
+expensive aggregates). Each class has its own concurrency budget and a
+bounded wait queue with a deadline, so a storm of slow dashboard queries
+cannot take the connections that CI writes depend on. Requests that do not
+fit are shed with ``503`` + ``Retry-After``. Kubernetes probes are never
+shed: a shed liveness probe restarts a worker that is merely busy, and a
+shed readiness probe pulls it out of the Service on top of the overload.
+"""
+
+import asyncio
+import time
+from typing import Dict
+
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from prometheus_client import Counter, Gauge, Histogram
+
+from app.core.config import settings
+
+# Prometheus Metrics
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "admission_queue_depth",
+    "Requests waiting for an admission slot",
+    ["route_class"],
+)
+
+ADMISSION_IN_FLIGHT = Gauge(
+    "admission_in_flight",
+    "Requests holding an admission slot",
+    ["route_class"],
+)
+
+ADMISSION_SHED = Counter(
+    "admission_shed_total",
+    "Requests rejected by admission control",
+    ["route_class", "reason"],
+)
+
+ADMISSION_WAIT = Histogram(
+    "admission_queue_wait_seconds",
+    "Time spent waiting for an admission slot",
+    ["route_class"],
+    buckets=[0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0],
+)
+
+WRITE = "write"
+READ = "read"
+AGGREGATE = "aggregate"
+
+PROBE_PATHS = frozenset({"/healthz", "/readyz", "/health"})
+AGGREGATE_PATH_SUFFIXES = (
+    "/metrics/dora",
+    "/metrics/summary",
+    "/deployments/stats/summary",
+    "/prom/api/v1/query_range",  # Grafana POSTs queries; they are reads
+    "/prom/api/v1/series",
+)
+EXEMPT_PATH_PREFIXES = (
+    "/metrics",
+    "/docs",
+    "/redoc",
+    "/openapi.json",
+    "/api/v1/events/stream",  # long-lived, holds no DB connection
+    "/debug",  # must work when the worker is saturated
+)
+WRITE_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted within its budget."""
+
+    def __init__(self, route_class: str, reason: str):
+        super().__init__(f"{route_class} admission rejected: {reason}")
+        self.route_class = route_class
+        self.reason = reason
+
+
+class ConcurrencyLimiter:
+    """Semaphore with a bounded wait queue and a queueing deadline."""
+
+    def __init__(self, name: str, limit: int, max_queue: int, timeout: float):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(limit)
+        self._waiting = 0
+        self._in_flight = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return self._waiting
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    async def acquire(self) -> None:
+        if not self._semaphore.locked():
+            # Fast path: a slot is free, no waiting involved.
+            await self._semaphore.acquire()
+            self._admitted()
+            return
+
+        if self._waiting >= self.max_queue:
+            ADMISSION_SHED.labels(route_class=self.name, reason="queue_full").inc()
+            raise AdmissionRejected(self.name, "queue_full")
+
+        self._waiting += 1
+        ADMISSION_QUEUE_DEPTH.labels(route_class=self.name).set(self._waiting)
+        start_time = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            ADMISSION_SHED.labels(route_class=self.name, reason="timeout").inc()
+            raise AdmissionRejected(self.name, "timeout")
+        finally:
+            self._waiting -= 1
+            ADMISSION_QUEUE_DEPTH.labels(route_class=self.name).set(self._waiting)
+            ADMISSION_WAIT.labels(route_class=self.name).observe(
+                time.perf_counter() - start_time
+            )
+        self._admitted()
+
+    def release(self) -> None:
+        self._in_flight -= 1
+        ADMISSION_IN_FLIGHT.labels(route_class=self.name).set(self._in_flight)
+        self._semaphore.release()
+
+    def _admitted(self) -> None:
+        self._in_flight += 1
+        ADMISSION_IN_FLIGHT.labels(route_class=self.name).set(self._in_flight)
+
+
+def classify(method: str, path: str) -> str:
+    """Map a request to its route class."""
+    if path.endswith(AGGREGATE_PATH_SUFFIXES):
+        return AGGREGATE
+    if method in WRITE_METHODS:
+        return WRITE
+    return READ
+
+
+def build_limiters() -> Dict[str, ConcurrencyLimiter]:
+    """Create one limiter per route class from settings."""
+    return {
+        WRITE: ConcurrencyLimiter(
+            WRITE,
+            settings.ADMISSION_WRITE_LIMIT,
+            settings.ADMISSION_WRITE_QUEUE,
+            settings.ADMISSION_WRITE_TIMEOUT_SECONDS,
+        ),
+        READ: ConcurrencyLimiter(
+            READ,
+            settings.ADMISSION_READ_LIMIT,
+            settings.ADMISSION_READ_QUEUE,
+            settings.ADMISSION_READ_TIMEOUT_SECONDS,
+        ),
+        AGGREGATE: ConcurrencyLimiter(
+            AGGREGATE,
+            settings.ADMISSION_AGGREGATE_LIMIT,
+            settings.ADMISSION_AGGREGATE_QUEUE,
+            settings.ADMISSION_AGGREGATE_TIMEOUT_SECONDS,
+        ),
+    }
+
+
+class AdmissionControlMiddleware(BaseHTTPMiddleware):
+    """Middleware enforcing per-route-class concurrency budgets."""
+
+    def __init__(self, app, limiters: Dict[str, ConcurrencyLimiter] = None):
+        super().__init__(app)
+        self.limiters = limiters if limiters is not None else build_limiters()
+
+    async def dispatch(self, request: Request, call_next) -> Response:
+        path = request.url.path
+        if path in PROBE_PATHS or path.startswith(EXEMPT_PATH_PREFIXES):
+            return await call_next(request)
+
+        limiter = self.limiters[classify(request.method, path)]
+        try:
+            await limiter.acquire()
+        except AdmissionRejected:
+            return JSONResponse(
+                status_code=503,
+                content={"detail": "Server is overloaded, retry later"},
+                headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER_SECONDS)},
+            )
+
+        try:
+            return await call_next(request)
+        finally:
+            limiter.release()
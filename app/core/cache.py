@@ -0,0 +1,205 @@
+"""Per-worker LRU cache of hot Deployment / Incident / SLO records.
+
+Records are compact ``__slots__`` snapshots of exactly the columns the
+detail endpoints return, detached from any session, plus rendered
+postmortem reports, which are dropped together with their incident. Entries are dropped
+when a change event for the object arrives on the worker's LISTEN
+connection (see ``app.services.events``), so updates made by any worker or
+replica invalidate every cache; a short TTL bounds staleness if a
+notification is ever missed.
+"""
+
+import sys
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+from uuid import UUID
+
+from prometheus_client import Counter, Gauge
+
+from app.core.config import settings
+
+# Prometheus Metrics
+HOT_CACHE_REQUESTS = Counter(
+    "hot_cache_requests_total",
+    "Hot object cache lookups",
+    ["kind", "result"],
+)
+
+HOT_CACHE_INVALIDATIONS = Counter(
+    "hot_cache_invalidations_total",
+    "Hot object cache invalidations",
+    ["kind"],
+)
+
+HOT_CACHE_ENTRIES = Gauge(
+    "hot_cache_entries",
+    "Records held in the hot object cache",
+)
+
+HOT_CACHE_BYTES = Gauge(
+    "hot_cache_bytes",
+    "Approximate memory held by hot object cache records",
+)
+
+DEPLOYMENT = "deployment"
+INCIDENT = "incident"
+SLO = "slo"
+POSTMORTEM = "postmortem"
+
+
+class _Record:
+    """Immutable-by-convention snapshot of an ORM row."""
+
+    __slots__ = ()
+
+    @classmethod
+    def from_row(cls, row):
+        record = cls.__new__(cls)
+        for name in cls.__slots__:
+            setattr(record, name, getattr(row, name))
+        return record
+
+    def size(self) -> int:
+        return sys.getsizeof(self) + sum(
+            sys.getsizeof(getattr(self, name)) for name in self.__slots__
+        )
+
+
+class DeploymentRecord(_Record):
+    __slots__ = (
+        "id", "service_name", "environment", "version", "commit_sha", "status",
+        "deployed_by", "description", "duration_seconds", "created_at", "updated_at",
+    )
+
+
+class IncidentRecord(_Record):
+    __slots__ = (
+        "id", "title", "description", "severity", "status", "service_name", "environment",
+        "triggered_at", "acknowledged_at", "resolved_at", "mttr_seconds", "root_cause",
+        "on_call_engineer", "deployment_id", "created_at", "updated_at",
+    )
+
+
+class SLORecord(_Record):
+    __slots__ = (
+        "id", "service_name", "name", "sli_type", "target_percentage", "current_percentage",
+        "error_budget_remaining", "is_breached", "window_days", "created_at", "updated_at",
+    )
+
+
+class PostmortemRecord(_Record):
+    """A postmortem report rendered in both output formats."""
+
+    __slots__ = ("markdown", "json")
+
+    def __init__(self, markdown: str, json: bytes):
+        self.markdown = markdown
+        self.json = json
+
+
+class ObjectCache:
+    """Bounded LRU keyed by (kind, id) with TTL and race-safe invalidation.
+
+    Callers take a ``token()`` before reading from the database and pass it
+    to ``put``; if the key was invalidated in between, the possibly stale
+    read is not cached.
+    """
+
+    def __init__(self, max_entries: int, ttl: float, enabled: bool = True):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.enabled = enabled
+        self._entries: "OrderedDict[Tuple[str, object], Tuple[_Record, float, int]]" = OrderedDict()
+        self._invalidated: "OrderedDict[Tuple[str, object], int]" = OrderedDict()
+        self._generation = 0
+        self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def bytes(self) -> int:
+        return self._bytes
+
+    def token(self) -> int:
+        return self._generation
+
+    def get(self, kind: str, key) -> Optional[_Record]:
+        if not self.enabled:
+            return None
+        entry = self._entries.get((kind, key))
+        if entry is None or entry[1] < time.monotonic():
+            if entry is not None:
+                self._remove((kind, key))
+            HOT_CACHE_REQUESTS.labels(kind=kind, result="miss").inc()
+            return None
+        self._entries.move_to_end((kind, key))
+        HOT_CACHE_REQUESTS.labels(kind=kind, result="hit").inc()
+        return entry[0]
+
+    def put(self, kind: str, key, record: _Record, token: int) -> _Record:
+        if not self.enabled or self._invalidated.get((kind, key), -1) >= token:
+            return record
+        self._remove((kind, key))
+        size = record.size()
+        self._entries[(kind, key)] = (record, time.monotonic() + self.ttl, size)
+        self._bytes += size
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+        self._update_gauges()
+        return record
+
+    def invalidate(self, kind: str, key) -> None:
+        HOT_CACHE_INVALIDATIONS.labels(kind=kind).inc()
+        self._invalidated[(kind, key)] = self._generation
+        self._invalidated.move_to_end((kind, key))
+        self._generation += 1
+        # Only reads started before the oldest remembered invalidation can
+        # race with it; tokens that old are long gone once this overflows.
+        while len(self._invalidated) > self.max_entries:
+            self._invalidated.popitem(last=False)
+        self._remove((kind, key))
+        self._update_gauges()
+
+    def clear(self) -> None:
+        self._generation += 1
+        self._invalidated.clear()
+        self._entries.clear()
+        self._bytes = 0
+        self._update_gauges()
+
+    def _remove(self, key) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+    def _update_gauges(self) -> None:
+        HOT_CACHE_ENTRIES.set(len(self._entries))
+        HOT_CACHE_BYTES.set(self._bytes)
+
+
+object_cache = ObjectCache(
+    settings.HOT_CACHE_MAX_ENTRIES,
+    settings.HOT_CACHE_TTL_SECONDS,
+    enabled=settings.HOT_CACHE_ENABLED,
+)
+
+_EVENT_KINDS = {"deployment": DEPLOYMENT, "incident": INCIDENT, "slo": SLO}
+
+
+def invalidate_incident(incident_id) -> None:
+    """Drop an incident's record and its rendered postmortem."""
+    object_cache.invalidate(INCIDENT, incident_id)
+    object_cache.invalidate(POSTMORTEM, incident_id)
+
+
+def invalidate_from_event(event: dict) -> None:
+    """Broker listener: drop the cached record named by a change event."""
+    kind = _EVENT_KINDS.get(event.get("type", "").split(".", 1)[0])
+    if kind is None or not event.get("id"):
+        return
+    if kind == INCIDENT:
+        invalidate_incident(UUID(event["id"]))
+    else:
+        object_cache.invalidate(kind, UUID(event["id"]))
@@ -0,0 +1,94 @@
+"""Brotli / gzip response compression.
+
+Responses above ``COMPRESSION_MIN_SIZE`` bytes are compressed with the
+best encoding the client accepts: brotli when the optional ``brotli``
+package is installed, gzip otherwise. Streaming responses (SSE) and
+bodies that are already encoded pass through untouched.
+"""
+
+import gzip
+from typing import Optional
+
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import Response
+from prometheus_client import Counter
+
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+# Prometheus Metrics
+COMPRESSION_BYTES = Counter(
+    "http_response_compression_bytes_total",
+    "Response body bytes before and after compression",
+    ["encoding", "stage"],
+)
+
+SKIP_CONTENT_TYPES = ("text/event-stream", "image/", "application/zip", "application/gzip")
+
+
+def negotiate(accept_encoding: str, brotli_available: bool = brotli is not None) -> Optional[str]:
+    """Pick ``br`` or ``gzip`` from an Accept-Encoding header, honouring q=0."""
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            accepted[name] = q
+    if brotli_available and accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+class CompressionMiddleware(BaseHTTPMiddleware):
+    """Compress sized, uncompressed responses for clients that accept it."""
+
+    def __init__(self, app, minimum_size: int = None):
+        super().__init__(app)
+        self.minimum_size = settings.COMPRESSION_MIN_SIZE if minimum_size is None else minimum_size
+
+    async def dispatch(self, request: Request, call_next) -> Response:
+        encoding = negotiate(request.headers.get("accept-encoding", ""))
+        response = await call_next(request)
+        if encoding is None or "content-encoding" in response.headers:
+            return response
+
+        # Only responses with a known length are buffered; streams have none.
+        length = response.headers.get("content-length")
+        content_type = response.headers.get("content-type", "")
+        if (
+            length is None
+            or int(length) < self.minimum_size
+            or content_type.startswith(SKIP_CONTENT_TYPES)
+        ):
+            return response
+
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        compressed = compress(body, encoding)
+        COMPRESSION_BYTES.labels(encoding=encoding, stage="original").inc(len(body))
+        COMPRESSION_BYTES.labels(encoding=encoding, stage="compressed").inc(len(compressed))
+
+        headers = dict(response.headers)
+        headers["content-encoding"] = encoding
+        headers["content-length"] = str(len(compressed))
+        headers["vary"] = ", ".join(filter(None, [headers.get("vary"), "Accept-Encoding"]))
+        if "etag" in headers and not headers["etag"].startswith("W/"):
+            headers["etag"] = "W/" + headers["etag"]
+        return Response(compressed, status_code=response.status_code, headers=headers)
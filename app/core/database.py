@@ -1,10 +1,19 @@
 """Async database engine and session management."""
 
+import asyncio
+import logging
+
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
 
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
+# Alembic head this code expects; keep in sync with migrations/versions.
+SCHEMA_REVISION = "0007"
+
 engine = create_async_engine(
     settings.DATABASE_URL,
     pool_size=settings.DB_POOL_SIZE,
@@ -32,10 +41,52 @@ async def get_db() -> AsyncSession:
             await session.close()
 
 
+async def check_schema():
+    """Verify the database is migrated at least to SCHEMA_REVISION.
+
+    Newer revisions are accepted so pods of the previous release keep
+    starting while an expand-style migration is rolled out.
+    """
+    async with engine.connect() as conn:
+        result = await conn.execute(text("SELECT version_num FROM alembic_version"))
+        current = result.scalar_one_or_none()
+    if current is None or current < SCHEMA_REVISION:
+        raise RuntimeError(
+            f"Database schema is at revision {current}, expected {SCHEMA_REVISION}; "
+            "run `alembic upgrade head`"
+        )
+
+
 async def init_db():
-    """Initialize database tables."""
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    """Prepare the database schema according to DB_SCHEMA_MODE."""
+    if settings.DB_SCHEMA_MODE == "create_all":
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+    elif settings.DB_SCHEMA_MODE == "check":
+        await check_schema()
+    elif settings.DB_SCHEMA_MODE != "skip":
+        raise ValueError(f"Unknown DB_SCHEMA_MODE: {settings.DB_SCHEMA_MODE}")
+
+
+async def warm_pool(size: int, statements=()):
+    """Open ``size`` pooled connections up front so first requests skip connection setup.
+
+    Each of ``statements`` is executed on every warmed connection, which
+    leaves it in asyncpg's per-connection prepared statement cache.
+    """
+    size = min(size, settings.DB_POOL_SIZE)
+
+    async def _checkout():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            for statement in statements:
+                await conn.execute(statement)
+
+    results = await asyncio.gather(*(_checkout() for _ in range(size)), return_exceptions=True)
+    failures = [r for r in results if isinstance(r, Exception)]
+    if failures:
+        logger.warning("Pool warm-up: %d of %d connections failed: %s", len(failures), size, failures[0])
+    return size - len(failures)
 
 
 async def close_db():
@@ -0,0 +1,72 @@
+"""Weak ETags and ``If-None-Match`` handling for polled read endpoints.
+
+Detail ETags are derived from the row's id and ``updated_at``; list ETags
+from the query parameters plus ``count(*)`` and ``max(updated_at)`` over
+the filtered set, so a matching poll is answered with ``304`` from a
+single-column or aggregate query without loading or serializing rows.
+"""
+
+import hashlib
+from typing import Iterable, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.requests import Request
+from starlette.responses import Response
+from prometheus_client import Counter
+
+# Prometheus Metrics
+NOT_MODIFIED_COUNT = Counter(
+    "http_not_modified_total",
+    "Conditional GETs answered with 304 Not Modified",
+    ["resource"],
+)
+
+
+def _weak(*parts) -> str:
+    digest = hashlib.blake2b("|".join(map(str, parts)).encode(), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def entity_etag(key, updated_at) -> str:
+    return _weak(key, updated_at.isoformat() if updated_at else "")
+
+
+def collection_etag(params: dict, count: int, max_updated_at) -> str:
+    normalized = sorted((k, v) for k, v in params.items() if v is not None)
+    return _weak(normalized, count, max_updated_at.isoformat() if max_updated_at else "")
+
+
+def wants_validation(request: Request) -> bool:
+    return "if-none-match" in request.headers
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Weak comparison against every tag listed in ``If-None-Match``."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+
+def not_modified(etag: str, resource: str) -> Response:
+    NOT_MODIFIED_COUNT.labels(resource=resource).inc()
+    return Response(status_code=304, headers={"ETag": etag})
+
+
+async def current_etag(db: AsyncSession, model, key) -> Optional[str]:
+    """ETag of a row from its ``updated_at`` alone; None if it does not exist."""
+    row = (await db.execute(select(model.updated_at).where(model.id == key))).first()
+    return None if row is None else entity_etag(key, row[0])
+
+
+async def list_etag(db: AsyncSession, model, conditions: Iterable, params: dict) -> str:
+    """Aggregate ETag for a filtered list query."""
+    result = await db.execute(
+        select(func.count(), func.max(model.updated_at)).where(*conditions)
+    )
+    count, max_updated_at = result.one()
+    return collection_etag(params, count, max_updated_at)
@@ -0,0 +1,56 @@
+"""Sparse fieldsets (``?fields=id,status``) for list endpoints.
+
+The requested fields prune both the SELECT (via ``load_only``) and the
+response schema, so large text columns are neither read nor serialized
+when a dashboard does not need them.
+"""
+
+from functools import lru_cache
+from typing import List, Optional, Tuple, Type
+
+from fastapi import HTTPException
+from pydantic import BaseModel, ConfigDict, TypeAdapter, create_model
+from sqlalchemy.orm import load_only
+from starlette.responses import Response
+
+
+def parse_fields(raw: Optional[str], schema: Type[BaseModel]) -> Optional[Tuple[str, ...]]:
+    """Validate a comma-separated field list against a response schema.
+
+    Returns None when all fields are wanted. ``id`` is always included.
+    """
+    if not raw:
+        return None
+    requested = [f.strip() for f in raw.split(",") if f.strip()]
+    unknown = sorted(set(requested) - set(schema.model_fields))
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown fields: {', '.join(unknown)}")
+    ordered = [name for name in schema.model_fields if name == "id" or name in requested]
+    return tuple(ordered)
+
+
+def load_columns(model, fields: Tuple[str, ...]):
+    """``load_only`` option selecting only the mapped columns behind ``fields``."""
+    return load_only(*(getattr(model, name) for name in fields if hasattr(model, name)))
+
+
+@lru_cache(maxsize=256)
+def subset_schema(schema: Type[BaseModel], fields: Tuple[str, ...]) -> TypeAdapter:
+    """Cached list serializer for a subset of ``schema``'s fields."""
+    model = create_model(
+        f"{schema.__name__}Subset",
+        __config__=ConfigDict(from_attributes=True),
+        **{name: (schema.model_fields[name].annotation, ...) for name in fields},
+    )
+    return TypeAdapter(List[model])
+
+
+def sparse_response(
+    rows, schema: Type[BaseModel], fields: Tuple[str, ...], headers: Optional[dict] = None
+) -> Response:
+    adapter = subset_schema(schema, fields)
+    return Response(
+        adapter.dump_json(adapter.validate_python(rows, from_attributes=True)),
+        media_type="application/json",
+        headers=headers,
+    )
@@ -0,0 +1,203 @@
+"""Worker startup warm-up and graceful shutdown drain.
+
+On startup the pool is pre-warmed and the hottest queries are prepared on
+every warmed connection. On SIGTERM, while uvicorn is still serving, the
+worker starts draining: readiness fails, new requests get ``503`` +
+``Connection: close``, and in-flight requests get until a deadline to
+finish. Only then is the signal handed to uvicorn, whose shutdown event
+flushes queued writes and closes the pool.
+"""
+
+import asyncio
+import logging
+import signal
+import threading
+import time
+import uuid
+
+from sqlalchemy import select
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from prometheus_client import Counter, Gauge
+
+from app.core.database import warm_pool
+from app.models.models import Deployment, Incident, SLO
+
+logger = logging.getLogger(__name__)
+
+# Prometheus Metrics
+APP_IMPORT_SECONDS = Gauge(
+    "app_import_duration_seconds",
+    "Time to import the application module and its routers",
+)
+
+APP_STARTUP_SECONDS = Gauge(
+    "app_startup_duration_seconds",
+    "Time spent in the startup event (schema check, pool warm-up, background tasks)",
+)
+
+POOL_WARMUP_SECONDS = Gauge(
+    "db_pool_warmup_duration_seconds",
+    "Time spent opening and preparing warm pool connections",
+)
+
+POOL_WARM_CONNECTIONS = Gauge(
+    "db_pool_warm_connections",
+    "Connections successfully warmed at startup",
+)
+
+DRAIN_SECONDS = Gauge(
+    "shutdown_drain_duration_seconds",
+    "Time spent draining in-flight requests after SIGTERM",
+)
+
+DRAIN_DROPPED = Counter(
+    "shutdown_dropped_requests_total",
+    "Requests rejected or abandoned while the worker was draining",
+    ["reason"],
+)
+
+DRAIN_EXEMPT_PATHS = frozenset({"/healthz", "/readyz", "/health"})
+
+
+def hot_statements():
+    """Queries issued on almost every request, prepared during warm-up.
+
+    They must compile to exactly the SQL the handlers emit (parameters
+    differ only in value) to hit the prepared statement cache.
+    """
+    zero = uuid.UUID(int=0)
+    return [
+        select(Deployment).where(Deployment.id == zero),
+        select(Incident).where(Incident.id == zero),
+        select(SLO).where(SLO.id == zero),
+        select(Deployment).order_by(Deployment.created_at.desc()).limit(20).offset(0),
+        select(Incident).order_by(Incident.triggered_at.desc()).limit(20).offset(0),
+    ]
+
+
+async def warm_up(size: int, prepare: bool = True) -> int:
+    """Pre-warm the pool and record how long it took."""
+    started = time.perf_counter()
+    warmed = await warm_pool(size, hot_statements() if prepare else ())
+    POOL_WARMUP_SECONDS.set(time.perf_counter() - started)
+    POOL_WARM_CONNECTIONS.set(warmed)
+    return warmed
+
+
+class DrainState:
+    """Tracks in-flight requests and whether the worker is draining."""
+
+    def __init__(self):
+        self.draining = False
+        self.in_flight = 0
+        self.drain_task = None
+        self._hooks = []
+
+    def begin(self) -> None:
+        self.draining = True
+
+    def add_hook(self, callback) -> None:
+        """Call ``callback`` on the event loop when a drain starts.
+
+        For connections that never finish on their own, such as event
+        streams, which would otherwise hold uvicorn's shutdown until its
+        timeout.
+        """
+        if callback not in self._hooks:
+            self._hooks.append(callback)
+
+    async def wait_idle(self, deadline: float, poll_interval: float = 0.05) -> int:
+        """Wait until no requests are in flight or the deadline passes.
+
+        Returns the number of requests still in flight at the deadline.
+        """
+        while self.in_flight > 0 and time.monotonic() < deadline:
+            await asyncio.sleep(poll_interval)
+        if self.in_flight:
+            DRAIN_DROPPED.labels(reason="deadline").inc(self.in_flight)
+        return self.in_flight
+
+    async def drain(self, timeout: float) -> int:
+        """Stop taking requests and wait for in-flight ones to finish."""
+        started = time.monotonic()
+        self.begin()
+        for callback in self._hooks:
+            try:
+                callback()
+            except Exception:
+                logger.exception("Drain hook failed")
+        left = await self.wait_idle(started + timeout)
+        DRAIN_SECONDS.set(time.monotonic() - started)
+        return left
+
+
+drain_state = DrainState()
+
+
+def install_drain_handler(timeout: float, state: DrainState = None, signum: int = signal.SIGTERM):
+    """Drain on ``signum`` before passing it on to the handler it replaces.
+
+    uvicorn installs its own handler before the startup event runs and
+    stops accepting connections as soon as it fires, so a drain started in
+    the shutdown event is never seen by a request. Wrapping that handler
+    keeps the worker serving (and rejecting) until in-flight requests are
+    done or ``timeout`` passes. A second signal is passed on at once.
+
+    Returns the installed handler, or ``None`` off the main thread, where
+    signal handlers cannot be set.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return None
+    state = state if state is not None else drain_state
+    loop = asyncio.get_running_loop()
+    previous = signal.getsignal(signum)
+
+    def forward(sig, frame):
+        if callable(previous):
+            previous(sig, frame)
+        elif previous == signal.SIG_DFL:
+            signal.signal(sig, signal.SIG_DFL)
+            signal.raise_signal(sig)
+
+    async def drain_then_forward(sig):
+        await state.drain(timeout)
+        forward(sig, None)
+
+    def start_drain(sig):
+        state.drain_task = loop.create_task(drain_then_forward(sig))
+
+    def handler(sig, frame):
+        if state.draining:
+            forward(sig, frame)
+            return
+        # Flip the flag right away; the wait runs on the event loop
+        state.begin()
+        loop.call_soon_threadsafe(start_drain, sig)
+
+    signal.signal(signum, handler)
+    return handler
+
+
+class DrainMiddleware(BaseHTTPMiddleware):
+    """Count in-flight requests and turn new ones away while draining."""
+
+    def __init__(self, app, state: DrainState = None):
+        super().__init__(app)
+        self.state = state if state is not None else drain_state
+
+    async def dispatch(self, request: Request, call_next) -> Response:
+        if self.state.draining and request.url.path not in DRAIN_EXEMPT_PATHS:
+            DRAIN_DROPPED.labels(reason="draining").inc()
+            return JSONResponse(
+                status_code=503,
+                content={"detail": "Server is shutting down"},
+                headers={"Connection": "close", "Retry-After": "1"},
+            )
+
+        self.state.in_flight += 1
+        try:
+            return await call_next(request)
+        finally:
+            self.state.in_flight -= 1
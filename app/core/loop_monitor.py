@@ -0,0 +1,133 @@
+"""Event-loop lag monitor and blocking-call detector.
+
+A background task sleeps for a fixed interval and records how late it
+wakes up. That lateness is the time every other coroutine on the worker
+also had to wait, so it is a direct saturation signal, unlike CPU
+utilisation. With stack capture on, a watchdog thread notices when the
+loop stops ticking for longer than the threshold. It then logs the loop
+thread's current stack, which points at the callback doing blocking or
+CPU-bound work.
+"""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Deque, Optional
+
+from prometheus_client import Counter, Gauge, Histogram
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Prometheus Metrics
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds",
+    "Delay between a scheduled event-loop wake-up and when it ran",
+    buckets=[0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0],
+)
+
+EVENT_LOOP_LAG_LAST = Gauge(
+    "event_loop_lag_last_seconds",
+    "Most recent event-loop lag measurement",
+)
+
+EVENT_LOOP_BLOCKED = Counter(
+    "event_loop_blocked_total",
+    "Times the event loop was blocked longer than the detection threshold",
+)
+
+
+class LoopMonitor:
+    """Measures loop lag and, optionally, captures stacks of blocking calls."""
+
+    def __init__(self, interval: float = 0.25, threshold: float = 0.1, capture_stacks: bool = False):
+        self.interval = interval
+        self.threshold = threshold
+        self.capture_stacks = capture_stacks
+        self.captured: Deque[str] = deque(maxlen=20)
+        self._heartbeat = time.monotonic()
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._loop_thread_id: Optional[int] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._run(), name="loop-monitor")
+        if self.capture_stacks:
+            self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+            self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog is not None:
+            await asyncio.to_thread(self._watchdog.join, 1.0)
+            self._watchdog = None
+
+    def record(self, lag: float) -> None:
+        lag = max(0.0, lag)
+        EVENT_LOOP_LAG.observe(lag)
+        EVENT_LOOP_LAG_LAST.set(lag)
+        if lag >= self.threshold:
+            EVENT_LOOP_BLOCKED.inc()
+
+    async def _run(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._heartbeat = now
+            self.record(now - expected)
+
+    def _watch(self) -> None:
+        """Watchdog thread: report each stall once, with the loop's stack."""
+        poll = min(self.threshold, self.interval) / 2
+        reported_for = None
+        while not self._stopped.wait(poll):
+            heartbeat = self._heartbeat
+            if time.monotonic() - heartbeat < self.interval + self.threshold:
+                continue
+            if reported_for == heartbeat:
+                continue
+            reported_for = heartbeat
+            self.capture()
+
+    def capture(self) -> Optional[str]:
+        """Log and keep the loop thread's current stack."""
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return None
+        stack = "".join(traceback.format_stack(frame))
+        self.captured.append(stack)
+        logger.warning(
+            "Event loop blocked for more than %.0f ms; loop thread stack:\n%s",
+            self.threshold * 1000, stack,
+        )
+        return stack
+
+
+loop_monitor = LoopMonitor(
+    interval=settings.LOOP_MONITOR_INTERVAL_SECONDS,
+    threshold=settings.LOOP_BLOCK_THRESHOLD_MS / 1000,
+    capture_stacks=settings.DEBUG,
+)
@@ -0,0 +1,237 @@
+"""On-demand statistical profiler for a single worker.
+
+While a profile is running, a sampler thread reads the event-loop thread's
+current stack every few milliseconds through ``sys._current_frames``. Each
+sample is attributed to the route whose endpoint function is on that
+stack. Failing that, it goes to the route of the request the running task
+serves: ``RequestScopeMiddleware`` puts each request's ASGI scope in a
+context variable, which every task spawned for the request inherits, and
+while a profile runs a task factory remembers each new task's context.
+That covers dependency resolution, serialization and middleware. Samples
+outside any request go to ``(idle)`` when the loop is waiting in its
+selector, and to ``(other)`` otherwise. Apart from one context variable
+set per request, nothing runs when no profile has been requested.
+"""
+
+import asyncio
+import contextvars
+import os
+import sys
+import threading
+import time
+import weakref
+from collections import Counter as Tally
+from typing import Dict, Iterable, Optional, Tuple
+
+from prometheus_client import Counter
+from starlette.routing import Match
+
+# Prometheus Metrics
+PROFILER_RUNS = Counter(
+    "profiler_runs_total",
+    "On-demand profiles taken",
+)
+
+IDLE = "(idle)"
+OTHER = "(other)"
+MAX_DEPTH = 128
+_IDLE_FUNCTIONS = frozenset({"select", "poll", "epoll", "_run_once"})
+
+Frame = Tuple[str, str, int]  # (function, file, first line)
+
+
+def route_codes(routes: Iterable) -> Dict[object, str]:
+    """Map endpoint code objects to ``"METHOD /path"`` labels."""
+    codes = {}
+    for route in routes:
+        endpoint = getattr(route, "endpoint", None)
+        code = getattr(endpoint, "__code__", None)
+        if code is None:
+            continue
+        methods = ",".join(sorted(getattr(route, "methods", None) or ()))
+        codes[code] = f"{methods} {route.path}".strip()
+    return codes
+
+
+request_scope: contextvars.ContextVar[Optional[dict]] = contextvars.ContextVar(
+    "request_scope", default=None
+)
+
+
+class RequestScopeMiddleware:
+    """Expose the request's scope to every task serving it (outermost, pure ASGI).
+
+    The router later adds the matched endpoint to the same scope dict.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = request_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            request_scope.reset(token)
+
+
+class TaskContexts:
+    """Task factory that remembers each new task's context while installed."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.contexts = weakref.WeakKeyDictionary()
+        self._previous = None
+
+    def install(self) -> None:
+        self._previous = self.loop.get_task_factory()
+        self.loop.set_task_factory(self._create_task)
+
+    def uninstall(self) -> None:
+        self.loop.set_task_factory(self._previous)
+
+    def _create_task(self, loop, coro, context=None):
+        context = context if context is not None else contextvars.copy_context()
+        if self._previous is not None:
+            task = self._previous(loop, coro, context=context)
+        else:
+            task = asyncio.Task(coro, loop=loop, context=context)
+        self.contexts[task] = context
+        return task
+
+    def current_scope(self) -> Optional[dict]:
+        """Scope of the request the loop's running task serves, if known."""
+        task = asyncio.current_task(self.loop)
+        context = self.contexts.get(task) if task is not None else None
+        return context.get(request_scope) if context is not None else None
+
+
+class Profile:
+    """Aggregated samples: stack counts per route."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.duration = 0.0
+        self.samples: Dict[str, Tally] = {}
+
+    @property
+    def total(self) -> int:
+        return sum(sum(stacks.values()) for stacks in self.samples.values())
+
+    def add(self, route: str, stack: Tuple[Frame, ...]) -> None:
+        self.samples.setdefault(route, Tally())[stack] += 1
+
+    def collapsed(self) -> str:
+        """Brendan Gregg collapsed-stack format, rooted at the route."""
+        lines = []
+        for route, stacks in sorted(self.samples.items()):
+            for stack, count in stacks.most_common():
+                frames = ";".join(f"{name} ({os.path.basename(path)}:{line})" for name, path, line in stack)
+                lines.append(f"{route};{frames} {count}" if frames else f"{route} {count}")
+        return "\n".join(lines) + "\n"
+
+    def speedscope(self, name: str = "profile") -> dict:
+        """speedscope sampled-profile document, one profile per route."""
+        frames, index = [], {}
+        profiles = []
+        for route, stacks in sorted(self.samples.items()):
+            samples, weights = [], []
+            for stack, count in stacks.items():
+                indices = []
+                for frame in stack:
+                    if frame not in index:
+                        index[frame] = len(frames)
+                        frames.append({"name": frame[0], "file": frame[1], "line": frame[2]})
+                    indices.append(index[frame])
+                samples.append(indices)
+                weights.append(count * self.interval)
+            profiles.append({
+                "type": "sampled",
+                "name": route,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            })
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "devops-sre-platform",
+            "shared": {"frames": frames},
+            "profiles": profiles,
+        }
+
+
+class Sampler:
+    """Samples one thread's stack at a fixed interval from a helper thread."""
+
+    def __init__(
+        self,
+        thread_id: int,
+        codes: Dict[object, str],
+        interval: float = 0.005,
+        tasks: Optional[TaskContexts] = None,
+        routes: Iterable = (),
+    ):
+        self.thread_id = thread_id
+        self.codes = codes
+        self.interval = interval
+        self.tasks = tasks
+        self.routes = list(routes)
+
+    def scope_route(self, scope: dict) -> Optional[str]:
+        """Route label for a request scope, matching it if the router has not yet."""
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            endpoint = next(
+                (r.endpoint for r in self.routes if r.matches(scope)[0] == Match.FULL), None
+            )
+        return self.codes.get(getattr(endpoint, "__code__", None))
+
+    def sample(self) -> Optional[Tuple[str, Tuple[Frame, ...]]]:
+        frame = sys._current_frames().get(self.thread_id)
+        if frame is None:
+            return None
+        leaf = frame.f_code.co_name
+        route = None
+        stack = []
+        while frame is not None and len(stack) < MAX_DEPTH:
+            code = frame.f_code
+            if route is None and code in self.codes:
+                route = self.codes[code]
+            stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+            frame = frame.f_back
+        stack.reverse()  # root first
+        if route is None and self.tasks is not None:
+            scope = self.tasks.current_scope()
+            if scope is not None:
+                route = self.scope_route(scope)
+        if route is None:
+            route = IDLE if leaf in _IDLE_FUNCTIONS else OTHER
+        return route, tuple(stack)
+
+    def run(self, seconds: float) -> Profile:
+        """Blocking: sample for ``seconds`` and return the aggregate."""
+        PROFILER_RUNS.inc()
+        profile = Profile(self.interval)
+        started = time.monotonic()
+        deadline = started + seconds
+        next_tick = started
+        while True:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            sampled = self.sample()
+            if sampled is not None:
+                profile.add(*sampled)
+            next_tick += self.interval
+            time.sleep(max(0.0, next_tick - time.monotonic()))
+        profile.duration = time.monotonic() - started
+        return profile
+
+
+profile_lock = threading.Lock()
@@ -0,0 +1,191 @@
+"""OpenTelemetry tracing with in-process tail sampling.
+
+Every request is traced (FastAPI server spans plus SQLAlchemy statement
+spans), but spans are held in memory until the trace's local root span
+ends. Then the whole trace is either forwarded to the batch exporter or
+dropped:
+
+- Slow traces (root span at least ``TRACE_SLOW_THRESHOLD_MS``) are kept.
+- Traces with any span in error are kept.
+- Of the remaining fast, successful traces, only ``TRACE_SAMPLE_RATIO``
+  are kept.
+
+The exporter sits behind a ``BatchSpanProcessor``. Its bounded queue drops
+spans when full rather than blocking, and export happens on a background
+thread, so the request path never waits on the collector.
+"""
+
+import logging
+import random
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+from opentelemetry import trace
+from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan, SpanProcessor, TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, SimpleSpanProcessor, SpanExporter
+from opentelemetry.trace import StatusCode
+from prometheus_client import Counter
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Prometheus Metrics
+TRACE_DECISIONS = Counter(
+    "trace_tail_sampling_decisions_total",
+    "Completed traces by tail-sampling decision",
+    ["decision"],
+)
+
+TRACES_EVICTED = Counter(
+    "trace_tail_sampling_evicted_total",
+    "Unfinished traces evicted from the tail-sampling buffer",
+)
+
+# ASGI instrumentation emits one internal span per send/receive message;
+# they add volume without explaining latency.
+NOISE_SPAN_SUFFIXES = (" http send", " http receive")
+
+EXCLUDED_URLS = "healthz,readyz,health,metrics"
+
+
+class TailSamplingProcessor(SpanProcessor):
+    """Buffers spans per trace and forwards whole traces worth keeping."""
+
+    def __init__(
+        self,
+        downstream: SpanProcessor,
+        slow_threshold: float,
+        keep_ratio: float,
+        max_traces: int = 2000,
+        max_spans_per_trace: int = 256,
+    ):
+        self.downstream = downstream
+        self.slow_threshold_ns = int(slow_threshold * 1e9)
+        self.keep_ratio = keep_ratio
+        self.max_traces = max_traces
+        self.max_spans_per_trace = max_spans_per_trace
+        self._pending: "OrderedDict[int, List[ReadableSpan]]" = OrderedDict()
+        self._decided: "OrderedDict[int, bool]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def on_start(self, span, parent_context=None) -> None:
+        pass
+
+    def on_end(self, span: ReadableSpan) -> None:
+        if span.name.endswith(NOISE_SPAN_SUFFIXES):
+            return
+        trace_id = span.context.trace_id
+        is_root = span.parent is None or span.parent.is_remote
+
+        with self._lock:
+            keep = self._decided.get(trace_id)
+            if keep is None and not is_root:
+                self._buffer(trace_id, span)
+                return
+            if keep is None:
+                spans = self._pending.pop(trace_id, [])
+                spans.append(span)
+                keep = self._decide(span, spans)
+                self._remember(trace_id, keep)
+            else:
+                spans = [span]  # straggler of an already decided trace
+
+        if keep:
+            for finished in spans:
+                self.downstream.on_end(finished)
+
+    def _buffer(self, trace_id: int, span: ReadableSpan) -> None:
+        spans = self._pending.get(trace_id)
+        if spans is None:
+            spans = self._pending[trace_id] = []
+            if len(self._pending) > self.max_traces:
+                self._pending.popitem(last=False)
+                TRACES_EVICTED.inc()
+        if len(spans) < self.max_spans_per_trace:
+            spans.append(span)
+
+    def _decide(self, root: ReadableSpan, spans: List[ReadableSpan]) -> bool:
+        if root.end_time - root.start_time >= self.slow_threshold_ns:
+            decision = "slow"
+        elif any(s.status.status_code == StatusCode.ERROR for s in spans):
+            decision = "error"
+        elif random.random() < self.keep_ratio:
+            decision = "sampled"
+        else:
+            decision = "dropped"
+        TRACE_DECISIONS.labels(decision=decision).inc()
+        return decision != "dropped"
+
+    def _remember(self, trace_id: int, keep: bool) -> None:
+        self._decided[trace_id] = keep
+        if len(self._decided) > self.max_traces:
+            self._decided.popitem(last=False)
+
+    def shutdown(self) -> None:
+        self.downstream.shutdown()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self.downstream.force_flush(timeout_millis)
+
+
+def build_provider(exporter: SpanExporter, batch: bool = True) -> TracerProvider:
+    """Tracer provider with tail sampling in front of the exporter."""
+    if batch:
+        downstream = BatchSpanProcessor(
+            exporter,
+            max_queue_size=settings.TRACE_EXPORT_QUEUE_SIZE,
+            schedule_delay_millis=1000,
+        )
+    else:
+        downstream = SimpleSpanProcessor(exporter)
+
+    provider = TracerProvider(
+        resource=Resource.create({
+            "service.name": settings.APP_NAME,
+            "service.version": settings.APP_VERSION,
+            "deployment.environment": settings.ENVIRONMENT,
+        }),
+        shutdown_on_exit=False,
+    )
+    provider.add_span_processor(TailSamplingProcessor(
+        downstream,
+        slow_threshold=settings.TRACE_SLOW_THRESHOLD_MS / 1000,
+        keep_ratio=settings.TRACE_SAMPLE_RATIO,
+        max_traces=settings.TRACE_MAX_PENDING_TRACES,
+    ))
+    return provider
+
+
+def instrument_app(app) -> None:
+    """Add the server-span middleware at import time.
+
+    It resolves tracers through the global provider, so spans stay no-op
+    until ``start_tracing`` installs the real provider on startup.
+    """
+    FastAPIInstrumentor.instrument_app(app, excluded_urls=EXCLUDED_URLS)
+
+
+def start_tracing(engine, exporter: Optional[SpanExporter] = None) -> TracerProvider:
+    """Install the global provider and instrument the database engine."""
+    from opentelemetry.instrumentation.sqlalchemy import SQLAlchemyInstrumentor
+
+    if exporter is None:
+        from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+        exporter = OTLPSpanExporter(endpoint=settings.OTEL_EXPORTER_ENDPOINT, insecure=True)
+
+    provider = build_provider(exporter)
+    trace.set_tracer_provider(provider)
+    SQLAlchemyInstrumentor().instrument(engine=engine.sync_engine, tracer_provider=provider)
+    logger.info("Tracing enabled, exporting to %s", settings.OTEL_EXPORTER_ENDPOINT)
+    return provider
+
+
+def stop_tracing(timeout_millis: int = 5000) -> None:
+    provider = trace.get_tracer_provider()
+    if isinstance(provider, TracerProvider):
+        provider.force_flush(timeout_millis)
+        provider.shutdown()
@@ -4,13 +4,24 @@ A production-grade FastAPI application for tracking deployments,
 incidents, SLOs, and engineering metrics.
 """
 
+import asyncio
+import time
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from prometheus_client import make_asgi_app
 
-from app.api import deployments, incidents, health, slos, metrics
+from app.api import deployments, incidents, health, slos, metrics, alerts, events, debug, prom
 from app.core.config import settings
 from app.core.middleware import RequestMetricsMiddleware
+from app.core.admission import AdmissionControlMiddleware
+from app.core.compression import CompressionMiddleware
+from app.core.profiler import RequestScopeMiddleware
+from app.core.lifecycle import (
+    APP_IMPORT_SECONDS, APP_STARTUP_SECONDS, DrainMiddleware, drain_state, install_drain_handler,
+    warm_up,
+)
+from app import IMPORT_STARTED
 
 app = FastAPI(
     title=settings.APP_NAME,
@@ -29,9 +40,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Admission control: per-route-class concurrency budgets and load shedding
+if settings.ADMISSION_ENABLED:
+    app.add_middleware(AdmissionControlMiddleware)
+
+# Graceful shutdown: in-flight tracking and rejection while draining
+app.add_middleware(DrainMiddleware)
+
 # Custom Prometheus metrics middleware
 app.add_middleware(RequestMetricsMiddleware)
 
+# Response compression (outermost, so metrics see uncompressed handler time)
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+
+# Request scope for the profiler's per-task route attribution (outermost)
+app.add_middleware(RequestScopeMiddleware)
+
 # Mount Prometheus metrics endpoint
 metrics_app = make_asgi_app()
 app.mount("/metrics", metrics_app)
@@ -42,17 +67,113 @@ app.include_router(deployments.router, prefix="/api/v1", tags=["Deployments"])
 app.include_router(incidents.router, prefix="/api/v1", tags=["Incidents"])
 app.include_router(slos.router, prefix="/api/v1", tags=["SLOs"])
 app.include_router(metrics.router, prefix="/api/v1", tags=["Metrics"])
+app.include_router(alerts.router, prefix="/api/v1", tags=["Alerts"])
+app.include_router(events.router, prefix="/api/v1", tags=["Events"])
+app.include_router(debug.router, tags=["Debug"])
+app.include_router(prom.router, tags=["Prometheus API"])
+
+# OpenTelemetry server spans (no-op until the provider is installed on startup)
+if settings.ENABLE_TRACING:
+    from app.core.tracing import instrument_app
+    instrument_app(app)
 
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize database connections and background tasks."""
+    started = time.perf_counter()
+
+    if settings.LOOP_MONITOR_ENABLED:
+        from app.core.loop_monitor import loop_monitor
+        loop_monitor.start()
+
+    if settings.ENABLE_TRACING:
+        from app.core.database import engine
+        from app.core.tracing import start_tracing
+        start_tracing(engine)
+
     from app.core.database import init_db
     await init_db()
+    await warm_up(settings.DB_POOL_WARM_SIZE, prepare=settings.DB_POOL_WARM_STATEMENTS)
+
+    from app.services.alert_dedup import alert_timeline
+    alert_timeline.start()
+
+    if settings.DEPLOYMENT_INGEST_ENABLED:
+        from app.services.deployment_ingest import deployment_ingest
+        deployment_ingest.start()
+
+    if settings.EVENT_STREAM_ENABLED:
+        from app.core.cache import invalidate_from_event, object_cache
+        from app.services.events import event_broker
+        event_broker.add_listener(invalidate_from_event)
+        event_broker.add_connect_hook(object_cache.clear)
+        if settings.NOTIFY_WEBHOOKS:
+            from app.services.notifications import notification_dispatcher
+            event_broker.add_listener(notification_dispatcher.wake)
+        # Streams never end on their own; close them when the drain starts
+        drain_state.add_hook(event_broker.close_streams)
+        event_broker.start()
+
+    if settings.NOTIFY_WEBHOOKS:
+        from app.services.notifications import notification_dispatcher
+        notification_dispatcher.start()
+
+    if settings.SCHEDULER_ENABLED:
+        from app.services.jobs import register_jobs
+        from app.services.scheduler import scheduler
+        register_jobs(scheduler)
+        scheduler.start()
+
+    # Drain on SIGTERM while uvicorn still serves, then let it shut down
+    install_drain_handler(settings.DRAIN_TIMEOUT_SECONDS)
+
+    APP_STARTUP_SECONDS.set(time.perf_counter() - started)
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    """Cleanup resources on shutdown."""
+    """Flush queued writes and release resources.
+
+    Requests were already drained by the SIGTERM handler; by the time this
+    runs uvicorn has stopped accepting connections.
+    """
+    deadline = time.monotonic() + settings.SHUTDOWN_FLUSH_TIMEOUT_SECONDS
+
+    # Give up leadership so another worker picks up periodic jobs
+    if settings.SCHEDULER_ENABLED:
+        from app.services.scheduler import scheduler
+        await scheduler.stop()
+
+    # Flush queued writes within what is left of the deadline
+    if settings.DEPLOYMENT_INGEST_ENABLED:
+        from app.services.deployment_ingest import deployment_ingest
+        await deployment_ingest.stop(timeout=min(
+            settings.DEPLOYMENT_INGEST_SHUTDOWN_TIMEOUT_SECONDS,
+            max(deadline - time.monotonic(), 0.1),
+        ))
+
+    from app.services.alert_dedup import alert_timeline
+    await alert_timeline.stop(timeout=max(deadline - time.monotonic(), 0.1))
+
+    if settings.NOTIFY_WEBHOOKS:
+        from app.services.notifications import notification_dispatcher
+        await notification_dispatcher.stop(timeout=max(deadline - time.monotonic(), 0.1))
+
+    if settings.EVENT_STREAM_ENABLED:
+        from app.services.events import event_broker
+        await event_broker.stop()
+
+    if settings.LOOP_MONITOR_ENABLED:
+        from app.core.loop_monitor import loop_monitor
+        await loop_monitor.stop()
+
     from app.core.database import close_db
     await close_db()
+
+    if settings.ENABLE_TRACING:
+        from app.core.tracing import stop_tracing
+        await asyncio.to_thread(stop_tracing)
+
+
+APP_IMPORT_SECONDS.set(time.perf_counter() - IMPORT_STARTED)
@@ -2,9 +2,12 @@
 
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, DateTime, Float, Integer, Text, Enum, Boolean, ForeignKey
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy import (
+    Column, String, DateTime, Float, Integer, SmallInteger, Text, Enum, Boolean, ForeignKey, Index,
+    select, text,
+)
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.orm import column_property, relationship
 import enum
 
 from app.core.database import Base
@@ -33,13 +36,44 @@ class IncidentStatus(str, enum.Enum):
     RESOLVED = "resolved"
 
 
+OPEN_FINGERPRINT_PREDICATE = "fingerprint IS NOT NULL AND status != 'RESOLVED'"
+PENDING_NOTIFICATION_PREDICATE = "delivered_at IS NULL AND failed_at IS NULL"
+
+
+# Fact-table dimension keys and the name attributes that read them back
+DIMENSION_NAMES = {"service_id": "service_name", "environment_id": "environment"}
+
+
+class Service(Base):
+    """Service dimension: one small integer key per distinct service name."""
+    __tablename__ = "services"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    name = Column(String(255), nullable=False, unique=True)
+
+
+class Environment(Base):
+    """Environment dimension: one small integer key per distinct environment."""
+    __tablename__ = "environments"
+
+    id = Column(SmallInteger, primary_key=True, autoincrement=True)
+    name = Column(String(50), nullable=False, unique=True)
+
+
+def name_of(dimension, key):
+    """Correlated lookup of a dimension name; a primary-key probe per row."""
+    return select(dimension.name).where(dimension.id == key).correlate_except(dimension).scalar_subquery()
+
+
 class Deployment(Base):
     """Track deployment events across environments."""
     __tablename__ = "deployments"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    service_name = Column(String(255), nullable=False, index=True)
-    environment = Column(String(50), nullable=False, index=True)
+    service_id = Column(Integer, ForeignKey("services.id"), nullable=False, index=True)
+    environment_id = Column(SmallInteger, ForeignKey("environments.id"), nullable=False, index=True)
+    service_name = column_property(name_of(Service, service_id))
+    environment = column_property(name_of(Environment, environment_id))
     version = Column(String(100), nullable=False)
     commit_sha = Column(String(40), nullable=False)
     status = Column(Enum(DeploymentStatus), default=DeploymentStatus.PENDING, index=True)
@@ -48,7 +82,12 @@ class Deployment(Base):
     duration_seconds = Column(Float, nullable=True)
     rollback_of = Column(UUID(as_uuid=True), ForeignKey("deployments.id"), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+
+    __table_args__ = (
+        # As-of lookup: latest deployment of a service/environment before a point in time
+        Index("ix_deployments_service_env_created", "service_id", "environment_id", "created_at"),
+    )
 
     incidents = relationship("Incident", back_populates="caused_by_deployment")
 
@@ -62,8 +101,10 @@ class Incident(Base):
     description = Column(Text, nullable=True)
     severity = Column(Enum(IncidentSeverity), nullable=False, index=True)
     status = Column(Enum(IncidentStatus), default=IncidentStatus.TRIGGERED, index=True)
-    service_name = Column(String(255), nullable=False, index=True)
-    environment = Column(String(50), nullable=False)
+    service_id = Column(Integer, ForeignKey("services.id"), nullable=False, index=True)
+    environment_id = Column(SmallInteger, ForeignKey("environments.id"), nullable=False)
+    service_name = column_property(name_of(Service, service_id))
+    environment = column_property(name_of(Environment, environment_id))
     triggered_at = Column(DateTime, default=datetime.utcnow, index=True)
     acknowledged_at = Column(DateTime, nullable=True)
     resolved_at = Column(DateTime, nullable=True)
@@ -72,8 +113,19 @@ class Incident(Base):
     action_items = Column(Text, nullable=True)
     deployment_id = Column(UUID(as_uuid=True), ForeignKey("deployments.id"), nullable=True)
     on_call_engineer = Column(String(255), nullable=True)
+    fingerprint = Column(String(64), nullable=True)  # Alertmanager label hash
     created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+
+    __table_args__ = (
+        # At most one open incident per alert fingerprint
+        Index(
+            "uq_incidents_open_fingerprint",
+            "fingerprint",
+            unique=True,
+            postgresql_where=text(OPEN_FINGERPRINT_PREDICATE),
+        ),
+    )
 
     caused_by_deployment = relationship("Deployment", back_populates="incidents")
     timeline = relationship("IncidentTimeline", back_populates="incident", order_by="IncidentTimeline.created_at")
@@ -98,7 +150,8 @@ class SLO(Base):
     __tablename__ = "slos"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    service_name = Column(String(255), nullable=False, index=True)
+    service_id = Column(Integer, ForeignKey("services.id"), nullable=False, index=True)
+    service_name = column_property(name_of(Service, service_id))
     name = Column(String(255), nullable=False)
     description = Column(Text, nullable=True)
     sli_type = Column(String(50), nullable=False)  # availability, latency, error_rate
@@ -109,3 +162,70 @@ class SLO(Base):
     is_breached = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class NotificationOutbox(Base):
+    """Webhook notifications written in the same transaction as the incident change."""
+    __tablename__ = "notification_outbox"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    destination = Column(String(100), nullable=False)
+    event_type = Column(String(100), nullable=False)
+    incident_id = Column(UUID(as_uuid=True), nullable=True)
+    payload = Column(JSONB, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    # Next delivery attempt; a claim pushes it out by the lease duration
+    available_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    last_error = Column(Text, nullable=True)
+    delivered_at = Column(DateTime, nullable=True)
+    failed_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index(
+            "ix_notification_outbox_pending",
+            "available_at",
+            postgresql_where=text(PENDING_NOTIFICATION_PREDICATE),
+        ),
+    )
+
+
+class IdempotencyKey(Base):
+    """Stored responses of create requests sent with an Idempotency-Key header."""
+    __tablename__ = "idempotency_keys"
+
+    scope = Column(String(50), primary_key=True)
+    key = Column(String(255), primary_key=True)
+    request_hash = Column(String(64), nullable=False)
+    status_code = Column(Integer, nullable=True)
+    response_body = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+
+class MetricRollup(Base):
+    """Time-bucketed aggregates served by the Prometheus-compatible query API."""
+    __tablename__ = "metric_rollups"
+
+    metric = Column(String(64), primary_key=True)
+    service_name = Column(String(255), primary_key=True)
+    environment = Column(String(50), primary_key=True)
+    dimension = Column(String(255), primary_key=True)  # status, severity or SLO name
+    bucket = Column(DateTime, primary_key=True)
+    value_sum = Column(Float, nullable=False)
+    value_count = Column(Integer, nullable=False)
+    computed_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_metric_rollups_metric_bucket", "metric", "bucket"),
+    )
+
+
+class DoraSnapshot(Base):
+    """Per-environment inputs of the DORA gauges, written by the scheduler leader."""
+    __tablename__ = "dora_snapshots"
+
+    environment_id = Column(SmallInteger, ForeignKey("environments.id"), primary_key=True)
+    environment = column_property(name_of(Environment, environment_id))
+    total = Column(Integer, nullable=False)
+    failed = Column(Integer, nullable=False)
+    computed_at = Column(DateTime, nullable=False)
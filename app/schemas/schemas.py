@@ -1,7 +1,7 @@
 """Pydantic schemas for API request/response validation."""
 
 from datetime import datetime
-from typing import Optional, List
+from typing import Dict, Optional, List
 from uuid import UUID
 from pydantic import BaseModel, Field
 
@@ -36,6 +36,19 @@ class DeploymentResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class DeploymentWebhookEvent(BaseModel):
+    """CI deployment event for asynchronous ingestion."""
+    event: str = Field(..., example="status_changed")  # created | status_changed
+    deployment_id: Optional[UUID] = None
+    deployment: Optional[DeploymentCreate] = None
+    status: Optional[str] = Field(None, example="success")
+    duration_seconds: Optional[float] = None
+
+class DeploymentWebhookAccepted(BaseModel):
+    deployment_id: UUID
+    event: str
+    queued: bool = True
+
 
 # ─── Incidents ──────────────────────────────────────────────
 
@@ -50,10 +63,28 @@ class IncidentCreate(BaseModel):
 
 class IncidentUpdate(BaseModel):
     status: Optional[str] = None
+    severity: Optional[str] = None
     root_cause: Optional[str] = None
     action_items: Optional[str] = None
     on_call_engineer: Optional[str] = None
 
+class IncidentBulkTransition(BaseModel):
+    """Move every incident matching the id list and/or filters to one status."""
+    status: str = Field(..., example="resolved")
+    incident_ids: Optional[List[UUID]] = Field(None, max_length=1000)
+    service_name: Optional[str] = None
+    environment: Optional[str] = None
+    severity: Optional[str] = None
+    current_status: Optional[str] = Field(None, example="triggered")
+    root_cause: Optional[str] = None
+    note: Optional[str] = Field(None, example="Upstream database recovered")
+    author: str = Field("bulk-transition", example="oncall-engineer")
+
+class IncidentBulkTransitionResult(BaseModel):
+    status: str
+    updated: int
+    incident_ids: List[UUID]
+
 class TimelineEventCreate(BaseModel):
     event_type: str = Field(..., example="investigation_started")
     description: str = Field(..., example="Checking application logs for errors")
@@ -73,12 +104,43 @@ class IncidentResponse(BaseModel):
     mttr_seconds: Optional[float]
     root_cause: Optional[str]
     on_call_engineer: Optional[str]
+    deployment_id: Optional[UUID] = None
     created_at: datetime
 
     class Config:
         from_attributes = True
 
 
+# ─── Alertmanager ──────────────────────────────────────────
+
+class AlertmanagerAlert(BaseModel):
+    status: str = Field(..., example="firing")
+    labels: Dict[str, str]
+    annotations: Dict[str, str] = {}
+    startsAt: Optional[datetime] = None
+    endsAt: Optional[datetime] = None
+    generatorURL: Optional[str] = None
+    fingerprint: Optional[str] = None
+
+class AlertmanagerWebhook(BaseModel):
+    """Alertmanager webhook payload (version 4)."""
+    version: str = "4"
+    groupKey: Optional[str] = None
+    status: str = Field(..., example="firing")
+    receiver: Optional[str] = None
+    groupLabels: Dict[str, str] = {}
+    commonLabels: Dict[str, str] = {}
+    commonAnnotations: Dict[str, str] = {}
+    externalURL: Optional[str] = None
+    alerts: List[AlertmanagerAlert]
+
+class AlertmanagerWebhookResult(BaseModel):
+    received: int
+    incidents_created: int
+    deduplicated: int
+    timeline_events: int
+
+
 # ─── SLOs ───────────────────────────────────────────────────
 
 class SLOCreate(BaseModel):
@@ -111,7 +173,8 @@ class DORAMetrics(BaseModel):
     """DORA (DevOps Research and Assessment) four key metrics."""
     deployment_frequency: float = Field(..., description="Deployments per day")
     lead_time_for_changes_hours: float = Field(..., description="Avg hours from commit to deploy")
-    change_failure_rate: float = Field(..., description="% of deployments causing incidents")
+    change_failure_rate: float = Field(..., description="% of deployments that failed or were rolled back")
+    incident_change_failure_rate: float = Field(..., description="% of deployments linked to at least one incident")
     mttr_hours: float = Field(..., description="Mean Time to Recovery in hours")
     period_days: int
     environment: str
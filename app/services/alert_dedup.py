@@ -0,0 +1,313 @@
+"""Alertmanager webhook processing with fingerprint deduplication.
+
+Each alert's label set is hashed into a fingerprint. A per-worker LRU maps
+fingerprints to the open incident they belong to; misses fall back to the
+``uq_incidents_open_fingerprint`` partial unique index, which also settles
+races between workers. Repeated firings only append ``IncidentTimeline``
+events, which are buffered and written in coalesced multi-row INSERTs.
+
+New incidents get what incidents created through the API get, in the same
+transaction as their INSERT: deployment correlation (as an as-of subquery
+per row) and an outbox notification when their severity notifies.
+"""
+
+import hashlib
+import time
+import uuid
+from collections import Counter as TallyCounter, OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import insert, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from prometheus_client import Counter, Gauge
+
+from app.core.config import settings
+from app.core.database import async_session
+from app.core.middleware import INCIDENT_COUNT
+from app.models.models import (
+    Incident, IncidentTimeline, IncidentSeverity, IncidentStatus, OPEN_FINGERPRINT_PREDICATE,
+)
+from app.services.batching import MicroBatcher
+from app.services.correlation import as_of_deployment
+from app.services.dimensions import interned
+from app.services.events import make_event, publish_many
+from app.services.notifications import enqueue_many, should_notify
+
+# Prometheus Metrics
+ALERTS_RECEIVED = Counter(
+    "alertmanager_alerts_received_total",
+    "Alerts received from Alertmanager",
+    ["status"],
+)
+
+ALERTS_DEDUPLICATED = Counter(
+    "alertmanager_alerts_deduplicated_total",
+    "Firing alerts attached to an already open incident",
+)
+
+FINGERPRINT_INDEX_LOOKUPS = Counter(
+    "alert_fingerprint_index_lookups_total",
+    "Fingerprint index lookups",
+    ["result"],
+)
+
+FINGERPRINT_INDEX_SIZE = Gauge(
+    "alert_fingerprint_index_size",
+    "Fingerprints held in the in-memory index",
+)
+
+ALERT_AUTHOR = "alertmanager"
+
+SEVERITY_MAP = {
+    "critical": IncidentSeverity.SEV1,
+    "page": IncidentSeverity.SEV1,
+    "error": IncidentSeverity.SEV2,
+    "major": IncidentSeverity.SEV2,
+    "warning": IncidentSeverity.SEV3,
+    "minor": IncidentSeverity.SEV3,
+}
+
+
+def fingerprint(labels: Dict[str, str]) -> str:
+    """Stable hash of an alert's label set."""
+    h = hashlib.blake2b(digest_size=16)
+    for key in sorted(labels):
+        h.update(key.encode())
+        h.update(b"\x00")
+        h.update(labels[key].encode())
+        h.update(b"\x01")
+    return h.hexdigest()
+
+
+def severity_for(labels: Dict[str, str]) -> IncidentSeverity:
+    """Map an Alertmanager ``severity`` label to an incident severity."""
+    value = labels.get("severity", "").lower()
+    try:
+        return IncidentSeverity(value)
+    except ValueError:
+        return SEVERITY_MAP.get(value, IncidentSeverity.SEV4)
+
+
+def _utc_naive(value: Optional[datetime]) -> datetime:
+    if value is None or value.year < 2000:
+        return datetime.utcnow()
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class FingerprintIndex:
+    """Bounded LRU of fingerprint -> open incident id with a short TTL.
+
+    The TTL bounds how long a worker keeps attaching firings to an incident
+    that another worker has since resolved.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[UUID, float]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, fp: str) -> Optional[UUID]:
+        entry = self._entries.get(fp)
+        if entry is None or entry[1] < time.monotonic():
+            FINGERPRINT_INDEX_LOOKUPS.labels(result="miss").inc()
+            return None
+        self._entries.move_to_end(fp)
+        FINGERPRINT_INDEX_LOOKUPS.labels(result="hit").inc()
+        return entry[0]
+
+    def put(self, fp: str, incident_id: UUID) -> None:
+        self._entries[fp] = (incident_id, time.monotonic() + self.ttl)
+        self._entries.move_to_end(fp)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        FINGERPRINT_INDEX_SIZE.set(len(self._entries))
+
+    def evict(self, fp: str) -> None:
+        self._entries.pop(fp, None)
+        FINGERPRINT_INDEX_SIZE.set(len(self._entries))
+
+
+def coalesce_timeline(events: List[Tuple[UUID, str, str]]) -> List[dict]:
+    """Collapse identical timeline events in a batch into one row with a count."""
+    now = datetime.utcnow()
+    rows = []
+    for (incident_id, event_type, description), count in TallyCounter(events).items():
+        if count > 1:
+            description = f"{description} (x{count})"
+        rows.append({
+            "id": uuid.uuid4(),
+            "incident_id": incident_id,
+            "event_type": event_type,
+            "description": description,
+            "author": ALERT_AUTHOR,
+            "created_at": now,
+        })
+    return rows
+
+
+async def write_timeline_batch(events: List[Tuple[UUID, str, str]]) -> None:
+    """Insert a batch of alert timeline events in one statement.
+
+    One ``incident.timeline`` event per touched incident lets every worker
+    drop its cached postmortem.
+    """
+    rows = coalesce_timeline(events)
+    now = datetime.utcnow().isoformat()
+    changed = [
+        {"type": "incident.timeline", "id": str(incident_id), "author": ALERT_AUTHOR, "at": now}
+        for incident_id in {row["incident_id"] for row in rows}
+    ]
+    async with async_session() as session:
+        async with session.begin():
+            await session.execute(insert(IncidentTimeline).values(rows))
+            await publish_many(session, changed)
+
+
+fingerprint_index = FingerprintIndex(
+    settings.ALERT_FINGERPRINT_CACHE_SIZE, settings.ALERT_FINGERPRINT_CACHE_TTL_SECONDS
+)
+
+alert_timeline: MicroBatcher[Tuple[UUID, str, str]] = MicroBatcher(
+    "incident_timeline",
+    write_timeline_batch,
+    max_queue=settings.ALERT_TIMELINE_QUEUE_SIZE,
+    max_batch=settings.ALERT_TIMELINE_MAX_BATCH,
+    flush_interval=settings.ALERT_TIMELINE_FLUSH_INTERVAL_MS / 1000,
+)
+
+
+def _incident_row(fp: str, alert) -> dict:
+    labels, annotations = alert.labels, alert.annotations
+    triggered_at = _utc_naive(alert.startsAt)
+    return {
+        "id": uuid.uuid4(),
+        "title": (annotations.get("summary") or labels.get("alertname") or "Alertmanager alert")[:500],
+        "description": annotations.get("description"),
+        "severity": severity_for(labels),
+        "status": IncidentStatus.TRIGGERED,
+        "service_name": labels.get("service") or labels.get("job") or "unknown",
+        "environment": labels.get("environment") or labels.get("env") or settings.ENVIRONMENT,
+        "triggered_at": triggered_at,
+        "fingerprint": fp,
+        "created_at": triggered_at,
+        "updated_at": triggered_at,
+    }
+
+
+def correlated(rows: List[dict]) -> List[dict]:
+    """Interned rows with ``deployment_id`` set to their as-of deployment lookup."""
+    if not settings.INCIDENT_CORRELATION_ENABLED:
+        return rows
+    return [
+        dict(row, deployment_id=as_of_deployment(
+            row["service_id"], row["environment_id"], row["triggered_at"]
+        ).scalar_subquery())
+        for row in rows
+    ]
+
+
+async def _open_incidents(db: AsyncSession, fingerprints) -> Dict[str, UUID]:
+    result = await db.execute(
+        select(Incident.fingerprint, Incident.id)
+        .where(Incident.fingerprint.in_(list(fingerprints)))
+        .where(Incident.status != IncidentStatus.RESOLVED)
+    )
+    return dict(result.all())
+
+
+async def process_alerts(db: AsyncSession, alerts) -> dict:
+    """
+    Deduplicate a webhook's alerts into incidents and timeline events.
+
+    Commits the incident inserts before queueing timeline events so the
+    batched timeline writer never references uncommitted incidents.
+    """
+    firing: Dict[str, object] = {}
+    resolved: Dict[str, object] = {}
+    timeline: List[Tuple[UUID, str, str]] = []
+    deduplicated = 0
+
+    for alert in alerts:
+        ALERTS_RECEIVED.labels(status=alert.status).inc()
+        fp = fingerprint(alert.labels)
+        alertname = alert.labels.get("alertname", "alert")
+        incident_id = fingerprint_index.get(fp)
+
+        if alert.status == "resolved":
+            if incident_id:
+                timeline.append((incident_id, "alert_resolved", f"{alertname} resolved"))
+            else:
+                resolved[fp] = alert
+        elif incident_id:
+            deduplicated += 1
+            timeline.append((incident_id, "alert_refired", f"{alertname} fired again"))
+        else:
+            firing.setdefault(fp, alert)
+
+    inserted: Dict[str, UUID] = {}
+    misses = set(firing) | set(resolved)
+    if misses:
+        known = await _open_incidents(db, misses)
+        new_rows = [_incident_row(fp, firing[fp]) for fp in firing if fp not in known]
+
+        if new_rows:
+            result = await db.execute(
+                pg_insert(Incident)
+                .values(correlated(await interned.intern_rows(new_rows)))
+                .on_conflict_do_nothing(
+                    index_elements=["fingerprint"],
+                    index_where=text(OPEN_FINGERPRINT_PREDICATE),
+                )
+                .returning(
+                    Incident.fingerprint, Incident.id, Incident.title, Incident.service_id,
+                    Incident.environment_id, Incident.status, Incident.severity,
+                    Incident.on_call_engineer, Incident.triggered_at,
+                )
+            )
+            created_rows = [interned.with_names(row) for row in result.all()]
+            inserted = {row.fingerprint: row.id for row in created_rows}
+            known.update(inserted)
+            for row in created_rows:
+                INCIDENT_COUNT.labels(severity=row.severity.value, status="triggered").inc()
+            await publish_many(db, [make_event("incident.created", row) for row in created_rows])
+            await enqueue_many(
+                db, "incident.created", [row for row in created_rows if should_notify(row.severity)]
+            )
+
+            lost_races = [row["fingerprint"] for row in new_rows if row["fingerprint"] not in known]
+            if lost_races:
+                known.update(await _open_incidents(db, lost_races))
+        await db.commit()
+
+        for fp, alert in firing.items():
+            incident_id = known.get(fp)
+            if incident_id is None:
+                continue
+            fingerprint_index.put(fp, incident_id)
+            if fp not in inserted:
+                deduplicated += 1
+                alertname = alert.labels.get("alertname", "alert")
+                timeline.append((incident_id, "alert_refired", f"{alertname} fired again"))
+        for fp, alert in resolved.items():
+            if fp in known:
+                alertname = alert.labels.get("alertname", "alert")
+                timeline.append((known[fp], "alert_resolved", f"{alertname} resolved"))
+
+    ALERTS_DEDUPLICATED.inc(deduplicated)
+    for event in timeline:
+        await alert_timeline.submit(event)
+
+    return {
+        "received": len(alerts),
+        "incidents_created": len(inserted),
+        "deduplicated": deduplicated,
+        "timeline_events": len(timeline),
+    }
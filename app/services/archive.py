@@ -0,0 +1,434 @@
+"""Cold archive of old deployments and incidents in compressed Arrow files.
+
+The archiver moves incidents resolved (with their timeline) and
+deployments created before the retention cutoff out of the primary tables:
+rows are deleted with ``RETURNING`` and written to zstd-compressed Arrow
+IPC (Feather v2) files in the same step. A file is written under a
+temporary name, and only renamed into place once the delete has
+committed. Aggregate readers never see rows that are still live. A crash
+between the commit and the rename leaves a temporary file whose rows are
+gone from the primary tables; the next run promotes it, and discards
+temporary files whose rows are still live.
+
+Archive files are immutable and named
+``<table>/<min_ts>_<max_ts>_<id>.arrow``, so readers can skip files that
+lie outside a window without opening them. Windowed aggregates
+memory-map only the columns they need. Files that lie entirely inside a
+window have their aggregates cached.
+"""
+
+import asyncio
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy import Boolean, DateTime, Float, Integer, delete, exists, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from prometheus_client import Counter, Gauge
+
+from app.core.config import settings
+from app.core.database import async_session
+from app.models.models import DIMENSION_NAMES, Deployment, Incident, IncidentStatus, IncidentTimeline
+
+# pyarrow (optional, ~125 ms to import) is loaded on first use, so workers
+# with archiving off never pay for it
+pa = pc = feather = None
+
+logger = logging.getLogger(__name__)
+
+# Prometheus Metrics
+ARCHIVED_ROWS = Counter(
+    "archive_rows_total",
+    "Rows moved from the primary tables to the cold archive",
+    ["table"],
+)
+
+ARCHIVE_FILES = Gauge(
+    "archive_files",
+    "Arrow files in the cold archive",
+    ["table"],
+)
+
+TIME_COLUMNS = {
+    Deployment.__tablename__: "created_at",
+    Incident.__tablename__: "triggered_at",
+    IncidentTimeline.__tablename__: "created_at",
+}
+
+MODELS = {m.__tablename__: m for m in (Deployment, Incident, IncidentTimeline)}
+
+_STAMP = "%Y%m%dT%H%M%S"
+
+
+def available() -> bool:
+    """Load pyarrow on first call; False if it is not installed."""
+    global pa, pc, feather
+    if pa is None:
+        try:
+            import pyarrow
+            import pyarrow.compute
+            import pyarrow.feather
+        except ImportError:  # optional dependency
+            return False
+        pa, pc, feather = pyarrow, pyarrow.compute, pyarrow.feather
+    return True
+
+
+def _require_arrow() -> None:
+    if not available():
+        raise RuntimeError("pyarrow is required for the cold archive")
+
+
+def archived_columns(model) -> list:
+    """The table's columns, with dimension keys replaced by their names.
+
+    Archive files stay self-describing and keep their original layout.
+    """
+    return [
+        getattr(model, DIMENSION_NAMES[column.name]).label(DIMENSION_NAMES[column.name])
+        if column.name in DIMENSION_NAMES else column
+        for column in model.__table__.columns
+    ]
+
+
+def arrow_schema(model):
+    """Arrow schema mirroring a model's table; UUIDs, enums and dimension names become strings."""
+    _require_arrow()
+    fields = []
+    for column in model.__table__.columns:
+        if column.name in DIMENSION_NAMES:
+            fields.append(pa.field(DIMENSION_NAMES[column.name], pa.string()))
+            continue
+        if isinstance(column.type, DateTime):
+            arrow_type = pa.timestamp("us")
+        elif isinstance(column.type, Float):
+            arrow_type = pa.float64()
+        elif isinstance(column.type, Boolean):
+            arrow_type = pa.bool_()
+        elif isinstance(column.type, Integer):
+            arrow_type = pa.int64()
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(column.name, arrow_type))
+    return pa.schema(fields)
+
+
+def _plain(value):
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return getattr(value, "value", value)
+
+
+class ArchiveAggregates:
+    """Additive aggregates over archived rows in a window."""
+
+    def __init__(self):
+        self.total = 0
+        self.success = 0
+        self.failed = 0
+        self.rolled_back = 0
+        self.duration_sum = 0.0
+        self.duration_count = 0
+        self.mttr_sum = 0.0
+        self.mttr_count = 0
+        self.caused_deployments = 0
+
+    def add(self, other: "ArchiveAggregates") -> "ArchiveAggregates":
+        for name in vars(self):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        return self
+
+
+class ArchiveStore:
+    """Writes and scans archive files under a root directory."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def files(self, table: str, since: Optional[datetime] = None) -> List[str]:
+        """Archive files for ``table`` whose newest row is at or after ``since``."""
+        directory = os.path.join(self.root, table)
+        if not os.path.isdir(directory):
+            return []
+        paths = []
+        for entry in os.scandir(directory):
+            if not entry.name.endswith(".arrow"):
+                continue
+            newest = datetime.strptime(entry.name.split("_")[1], _STAMP)
+            if since is None or newest >= since.replace(microsecond=0):
+                paths.append(entry.path)
+        return sorted(paths)
+
+    def stage(self, model, rows: List[dict]) -> Optional[tuple]:
+        """Write rows to a temporary file; returns (temp_path, final_path)."""
+        if not rows:
+            return None
+        _require_arrow()
+        table_name = model.__tablename__
+        time_column = TIME_COLUMNS[table_name]
+        table = pa.Table.from_pylist(
+            [{k: _plain(v) for k, v in row.items()} for row in rows], schema=arrow_schema(model)
+        )
+        oldest = min(row[time_column] for row in rows)
+        newest = max(row[time_column] for row in rows)
+        directory = os.path.join(self.root, table_name)
+        os.makedirs(directory, exist_ok=True)
+        final = os.path.join(
+            directory, f"{oldest:{_STAMP}}_{newest:{_STAMP}}_{uuid.uuid4().hex[:12]}.arrow"
+        )
+        temp = final + ".tmp"
+        feather.write_feather(table, temp, compression="zstd")
+        with open(temp, "rb") as handle:
+            os.fsync(handle.fileno())
+        return temp, final
+
+    def publish(self, staged: List[tuple]) -> None:
+        for temp, final in staged:
+            os.replace(temp, final)
+        for table in TIME_COLUMNS:
+            ARCHIVE_FILES.labels(table=table).set(len(self.files(table)))
+
+    def leftovers(self) -> List[tuple]:
+        """Staged files nobody published: (table, (temp_path, final_path), ids).
+
+        ``ids`` is ``None`` when the file cannot be read, i.e. the crash
+        came while writing it, before the delete could commit.
+        """
+        _require_arrow()
+        found = []
+        for table in TIME_COLUMNS:
+            directory = os.path.join(self.root, table)
+            if not os.path.isdir(directory):
+                continue
+            for entry in os.scandir(directory):
+                if not entry.name.endswith(".arrow.tmp"):
+                    continue
+                try:
+                    ids = feather.read_table(entry.path, columns=["id"])["id"].to_pylist()
+                except (OSError, pa.ArrowException):
+                    ids = None
+                found.append((table, (entry.path, entry.path[:-len(".tmp")]), ids))
+        return sorted(found)
+
+    def discard(self, staged: List[tuple]) -> None:
+        for temp, _ in staged:
+            try:
+                os.remove(temp)
+            except FileNotFoundError:
+                pass
+
+    def aggregates(self, since: datetime, environment: Optional[str] = None) -> ArchiveAggregates:
+        """DORA/stat aggregates over archived rows at or after ``since``."""
+        _require_arrow()
+        result = ArchiveAggregates()
+        deployment_ids: List = []
+        for path in self.files(Deployment.__tablename__, since):
+            aggregates, ids = _deployment_file_aggregates(path, since, environment)
+            result.add(aggregates)
+            deployment_ids.append(ids)
+
+        incident_deployments: Set[str] = set()
+        for path in self.files(Incident.__tablename__, since):
+            aggregates, ids = _incident_file_aggregates(path, since, environment)
+            result.add(aggregates)
+            incident_deployments.update(ids)
+
+        if deployment_ids and incident_deployments:
+            ids = pa.chunked_array(deployment_ids, type=pa.string())
+            value_set = pa.array(sorted(incident_deployments), type=pa.string())
+            result.caused_deployments = pc.sum(pc.is_in(ids, value_set=value_set)).as_py() or 0
+        return result
+
+
+def _window(table, column: str, since: datetime, environment: Optional[str]):
+    mask = pc.greater_equal(table[column], pa.scalar(since, pa.timestamp("us")))
+    if environment:
+        mask = pc.and_(mask, pc.equal(table["environment"], environment))
+    return table.filter(mask)
+
+
+def _count(array, value: str) -> int:
+    return pc.sum(pc.equal(array, value)).as_py() or 0
+
+
+@lru_cache(maxsize=4096)
+def _whole_file(path: str, kind: str, environment: Optional[str]):
+    """Aggregates of an entire immutable file; cached per environment."""
+    reader = _deployment_file_aggregates if kind == "deployments" else _incident_file_aggregates
+    return reader(path, datetime.min, environment, cache=False)
+
+
+def _file_oldest(path: str) -> datetime:
+    return datetime.strptime(os.path.basename(path).split("_")[0], _STAMP)
+
+
+def _deployment_file_aggregates(path, since, environment, cache: bool = True):
+    if cache and _file_oldest(path) >= since:
+        return _whole_file(path, "deployments", environment)
+    table = feather.read_table(
+        path, columns=["id", "environment", "status", "duration_seconds", "created_at"],
+        memory_map=True,
+    )
+    table = _window(table, "created_at", since, environment)
+    aggregates = ArchiveAggregates()
+    aggregates.total = table.num_rows
+    aggregates.success = _count(table["status"], "success")
+    aggregates.failed = _count(table["status"], "failed")
+    aggregates.rolled_back = _count(table["status"], "rolled_back")
+    durations = pc.filter(table["duration_seconds"], pc.greater(table["duration_seconds"], 0))
+    aggregates.duration_sum = pc.sum(durations).as_py() or 0.0
+    aggregates.duration_count = len(durations)
+    return aggregates, table["id"].combine_chunks()
+
+
+def _incident_file_aggregates(path, since, environment, cache: bool = True):
+    if cache and _file_oldest(path) >= since:
+        return _whole_file(path, "incidents", environment)
+    table = feather.read_table(
+        path, columns=["environment", "triggered_at", "mttr_seconds", "deployment_id"],
+        memory_map=True,
+    )
+    table = _window(table, "triggered_at", since, environment)
+    aggregates = ArchiveAggregates()
+    mttr = pc.drop_null(table["mttr_seconds"])
+    aggregates.mttr_sum = pc.sum(mttr).as_py() or 0.0
+    aggregates.mttr_count = len(mttr)
+    deployment_ids = frozenset(pc.unique(pc.drop_null(table["deployment_id"])).to_pylist())
+    return aggregates, deployment_ids
+
+
+archive_store = ArchiveStore(settings.ARCHIVE_PATH)
+
+
+async def archived_aggregates(since: datetime, environment: Optional[str] = None) -> ArchiveAggregates:
+    """Archived aggregates for a window, or zeros when archiving is off."""
+    if not settings.ARCHIVE_ENABLED or not available():
+        return ArchiveAggregates()
+    return await asyncio.to_thread(archive_store.aggregates, since, environment)
+
+
+def archive_cutoff(now: datetime = None) -> datetime:
+    """Rows whose time columns are all before this are eligible for archiving."""
+    return (now or datetime.utcnow()) - timedelta(days=settings.ARCHIVE_RETENTION_DAYS)
+
+
+def _rows(result) -> List[dict]:
+    return [dict(row._mapping) for row in result]
+
+
+async def archive_batch(db: AsyncSession, cutoff: datetime, limit: int) -> Dict[str, int]:
+    """Move one batch of rows older than ``cutoff`` into staged archive files.
+
+    Incidents resolved before ``cutoff`` go first, together with their
+    timeline. Deployments
+    still referenced by a live incident stay behind. The caller commits,
+    then publishes the staged files.
+    """
+    incident_ids = (
+        await db.execute(
+            select(Incident.id)
+            .where(
+                Incident.triggered_at < cutoff,
+                Incident.status == IncidentStatus.RESOLVED,
+                Incident.resolved_at < cutoff,
+            )
+            .order_by(Incident.triggered_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+    ).scalars().all()
+
+    timeline, incidents = [], []
+    if incident_ids:
+        timeline = _rows(await db.execute(
+            delete(IncidentTimeline)
+            .where(IncidentTimeline.incident_id.in_(incident_ids))
+            .returning(*IncidentTimeline.__table__.columns)
+        ))
+        incidents = _rows(await db.execute(
+            delete(Incident)
+            .where(Incident.id.in_(incident_ids))
+            .returning(*archived_columns(Incident))
+        ))
+
+    deployment_ids = (
+        await db.execute(
+            select(Deployment.id)
+            .where(
+                Deployment.created_at < cutoff,
+                ~exists().where(Incident.deployment_id == Deployment.id),
+            )
+            .order_by(Deployment.created_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+    ).scalars().all()
+    deployments = []
+    if deployment_ids:
+        deployments = _rows(await db.execute(
+            delete(Deployment)
+            .where(Deployment.id.in_(deployment_ids))
+            .returning(*archived_columns(Deployment))
+        ))
+
+    return {
+        IncidentTimeline.__tablename__: timeline,
+        Incident.__tablename__: incidents,
+        Deployment.__tablename__: deployments,
+    }
+
+
+async def recover_staged(store: ArchiveStore, session_factory=async_session) -> int:
+    """Settle files staged by a run that died; returns how many were published."""
+    published = 0
+    for table, staged, ids in await asyncio.to_thread(store.leftovers):
+        model = MODELS[table]
+        live = ids is None
+        if not live:
+            async with session_factory() as session:
+                live = (await session.execute(
+                    select(model.id).where(model.id.in_([uuid.UUID(i) for i in ids])).limit(1)
+                )).first() is not None
+        if live:
+            await asyncio.to_thread(store.discard, [staged])
+        else:
+            await asyncio.to_thread(store.publish, [staged])
+            published += 1
+    if published:
+        logger.warning("Published %d archive files left staged by an interrupted run", published)
+    return published
+
+
+async def run_archive(store: ArchiveStore = None, cutoff: datetime = None, max_batches: int = 100) -> int:
+    """Archive job entry point: move batches until nothing is left to move."""
+    store = store or archive_store
+    cutoff = cutoff or archive_cutoff()
+    await recover_staged(store)
+    moved = 0
+    for _ in range(max_batches):
+        staged = []
+        try:
+            async with async_session() as session:
+                async with session.begin():
+                    batch = await archive_batch(session, cutoff, settings.ARCHIVE_BATCH_SIZE)
+                    for table, rows in batch.items():
+                        files = await asyncio.to_thread(store.stage, MODELS[table], rows)
+                        if files:
+                            staged.append(files)
+        except BaseException:
+            await asyncio.to_thread(store.discard, staged)
+            raise
+        await asyncio.to_thread(store.publish, staged)
+
+        for table, rows in batch.items():
+            ARCHIVED_ROWS.labels(table=table).inc(len(rows))
+        count = sum(len(rows) for rows in batch.values())
+        moved += count
+        if count == 0:
+            break
+    if moved:
+        logger.info("Archived %d rows older than %s", moved, cutoff.isoformat())
+    return moved
@@ -0,0 +1,155 @@
+"""Bounded in-process queue with a background micro-batching writer.
+
+Producers ``submit`` items without touching the database; a single
+writer task wakes every few milliseconds, drains up to ``max_batch``
+items and hands them to a flush coroutine as one batch. When the queue
+is full, producers wait up to ``enqueue_timeout`` and then get
+``BackpressureError`` so the caller can shed load.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Generic, List, Optional, Tuple, TypeVar
+
+from prometheus_client import Counter, Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Prometheus Metrics
+INGEST_QUEUE_DEPTH = Gauge(
+    "ingest_queue_depth",
+    "Events waiting in the in-process ingestion queue",
+    ["pipeline"],
+)
+
+INGEST_QUEUE_LAG = Histogram(
+    "ingest_queue_lag_seconds",
+    "Time from enqueue to committed write",
+    ["pipeline"],
+    buckets=[0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0],
+)
+
+INGEST_BATCH_SIZE = Histogram(
+    "ingest_batch_size",
+    "Events written per flush",
+    ["pipeline"],
+    buckets=[1, 5, 10, 25, 50, 100, 250, 500, 1000],
+)
+
+INGEST_REJECTED = Counter(
+    "ingest_rejected_total",
+    "Events rejected because the ingestion queue was full",
+    ["pipeline"],
+)
+
+INGEST_DROPPED = Counter(
+    "ingest_dropped_total",
+    "Events dropped because a flush failed or shutdown timed out",
+    ["pipeline"],
+)
+
+
+class BackpressureError(Exception):
+    """Raised when the ingestion queue stays full past the enqueue timeout."""
+
+
+class MicroBatcher(Generic[T]):
+    """Coalesce submitted items into periodic batched flushes."""
+
+    def __init__(
+        self,
+        name: str,
+        flush: Callable[[List[T]], Awaitable[None]],
+        max_queue: int = 10000,
+        max_batch: int = 500,
+        flush_interval: float = 0.005,
+        enqueue_timeout: float = 0.1,
+    ):
+        self.name = name
+        self._flush = flush
+        self.max_queue = max_queue
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def start(self) -> None:
+        """Start the background writer on the running event loop."""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._closing = False
+        self._task = asyncio.create_task(self._run(), name=f"{self.name}-writer")
+
+    async def submit(self, item: T) -> None:
+        """Enqueue an item, waiting briefly for room if the queue is full."""
+        if not self.running or self._closing:
+            raise BackpressureError(f"{self.name} pipeline is not accepting events")
+
+        entry: Tuple[float, T] = (time.perf_counter(), item)
+        try:
+            self._queue.put_nowait(entry)
+        except asyncio.QueueFull:
+            try:
+                await asyncio.wait_for(self._queue.put(entry), timeout=self.enqueue_timeout)
+            except asyncio.TimeoutError:
+                INGEST_REJECTED.labels(pipeline=self.name).inc()
+                raise BackpressureError(f"{self.name} queue is full")
+        INGEST_QUEUE_DEPTH.labels(pipeline=self.name).set(self._queue.qsize())
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Stop accepting events and flush what is already queued."""
+        if not self.running:
+            return
+        self._closing = True
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            dropped = self._queue.qsize()
+            logger.error("%s: shutdown flush timed out, dropping %d events", self.name, dropped)
+            INGEST_DROPPED.labels(pipeline=self.name).inc(dropped)
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            # Give concurrent producers a few milliseconds to pile on.
+            await asyncio.sleep(self.flush_interval)
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            INGEST_QUEUE_DEPTH.labels(pipeline=self.name).set(self._queue.qsize())
+
+            try:
+                await self._flush([item for _, item in batch])
+            except Exception:
+                logger.exception("%s: failed to flush %d events", self.name, len(batch))
+                INGEST_DROPPED.labels(pipeline=self.name).inc(len(batch))
+            else:
+                now = time.perf_counter()
+                INGEST_BATCH_SIZE.labels(pipeline=self.name).observe(len(batch))
+                for enqueued_at, _ in batch:
+                    INGEST_QUEUE_LAG.labels(pipeline=self.name).observe(now - enqueued_at)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
@@ -0,0 +1,97 @@
+"""Automatic incident-to-deployment correlation.
+
+An incident is attributed to the most recent deployment of the same
+service and environment that happened within the correlation window before
+it triggered. The lookup is an as-of query served by the
+``ix_deployments_service_env_created`` index (one backward index probe per
+incident), both on incident creation and in the bulk backfill. The
+backfill publishes an ``incident.updated`` event per correlated incident,
+so cached copies drop the stale attribution.
+"""
+
+from datetime import datetime, timedelta
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import async_session
+from app.models.models import Deployment, Incident
+from app.services.events import make_event, publish_many
+
+
+def _window() -> timedelta:
+    return timedelta(minutes=settings.INCIDENT_CORRELATION_WINDOW_MINUTES)
+
+
+def as_of_deployment(service_id, environment_id, at):
+    """Select the id of the latest deployment at or before ``at`` within the window.
+
+    Arguments may be plain values or column expressions, so the same query
+    serves single lookups and the correlated backfill subquery.
+    """
+    return (
+        select(Deployment.id)
+        .where(Deployment.service_id == service_id)
+        .where(Deployment.environment_id == environment_id)
+        .where(Deployment.created_at <= at)
+        .where(Deployment.created_at >= at - _window())
+        .order_by(Deployment.created_at.desc())
+        .limit(1)
+    )
+
+
+async def find_deployment(
+    db: AsyncSession, service_id: int, environment_id: int, at: datetime
+) -> Optional[UUID]:
+    """Find the deployment most likely to have caused an incident at ``at``."""
+    result = await db.execute(as_of_deployment(service_id, environment_id, at))
+    return result.scalar_one_or_none()
+
+
+def backfill_statement(since: datetime, now: datetime):
+    """UPDATE correlating uncorrelated incidents triggered since ``since``."""
+    matches = (
+        select(
+            Incident.id.label("incident_id"),
+            as_of_deployment(
+                Incident.service_id, Incident.environment_id, Incident.triggered_at
+            ).scalar_subquery().label("deployment_id"),
+        )
+        .where(Incident.deployment_id.is_(None))
+        .where(Incident.triggered_at >= since)
+        .subquery()
+    )
+    return (
+        update(Incident)
+        .where(Incident.id == matches.c.incident_id)
+        .where(matches.c.deployment_id.is_not(None))
+        .values(deployment_id=matches.c.deployment_id, updated_at=now)
+        .returning(
+            Incident.id, Incident.service_name, Incident.environment,
+            Incident.status, Incident.severity, Incident.deployment_id,
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def backfill(db: AsyncSession, since: datetime) -> int:
+    """Correlate uncorrelated incidents triggered since ``since``.
+
+    Only rows with a match are written; returns the number correlated.
+    """
+    rows = (await db.execute(backfill_statement(since, datetime.utcnow()))).all()
+    await publish_many(db, [
+        make_event("incident.updated", row, deployment_id=str(row.deployment_id)) for row in rows
+    ])
+    return len(rows)
+
+
+async def run_backfill(days: int = 30) -> int:
+    """Backfill job entry point using its own session and transaction."""
+    since = datetime.utcnow() - timedelta(days=days)
+    async with async_session() as session:
+        async with session.begin():
+            return await backfill(session, since)
@@ -0,0 +1,169 @@
+"""Asynchronous, micro-batched ingestion of CI deployment events.
+
+Webhook events are queued in-process and written by a single background
+task: all creations in a batch become one multi-row INSERT and all status
+changes one ``UPDATE ... FROM (VALUES ...)``, in a single transaction.
+A CI retry repeats its client-supplied deployment id; the INSERT skips
+ids that already exist rather than failing the whole batch.
+"""
+
+import logging
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from sqlalchemy import DateTime, Float, cast, column, func, update, values
+from sqlalchemy.dialects.postgresql import UUID, insert as pg_insert
+
+from app.core.config import settings
+from app.core.database import async_session
+from app.core.middleware import DEPLOYMENT_COUNT
+from app.models.models import Deployment, DeploymentStatus
+from app.services.batching import MicroBatcher
+from app.services.dimensions import interned
+from app.services.events import make_event, publish_many
+
+logger = logging.getLogger(__name__)
+
+CREATE = "create"
+UPDATE = "update"
+
+
+def create_event(deployment_id, deployment, received_at: datetime) -> dict:
+    """Build a queued creation event; timestamps reflect receipt, not flush."""
+    return {
+        "op": CREATE,
+        "values": {
+            "id": deployment_id,
+            "service_name": deployment.service_name,
+            "environment": deployment.environment,
+            "version": deployment.version,
+            "commit_sha": deployment.commit_sha,
+            "deployed_by": deployment.deployed_by,
+            "description": deployment.description,
+            "status": DeploymentStatus.PENDING,
+            "duration_seconds": None,
+            "created_at": received_at,
+            "updated_at": received_at,
+        },
+    }
+
+
+def update_event(deployment_id, status: DeploymentStatus, duration_seconds, received_at: datetime) -> dict:
+    """Build a queued status-change event."""
+    return {
+        "op": UPDATE,
+        "id": deployment_id,
+        "status": status,
+        "duration_seconds": duration_seconds,
+        "updated_at": received_at,
+    }
+
+
+def coalesce(events: List[dict]) -> Tuple[List[dict], List[dict]]:
+    """Collapse a batch into one row per deployment to insert or update.
+
+    Status changes for a deployment created in the same batch are folded
+    into its INSERT row; repeated changes keep the latest status and the
+    latest non-null duration.
+    """
+    creates: Dict = {}
+    updates: Dict = {}
+    for event in events:
+        if event["op"] == CREATE:
+            creates[event["values"]["id"]] = dict(event["values"])
+            continue
+
+        target = creates.get(event["id"]) or updates.get(event["id"])
+        if target is None:
+            target = updates[event["id"]] = {"id": event["id"], "duration_seconds": None}
+        target["status"] = event["status"]
+        target["updated_at"] = event["updated_at"]
+        if event["duration_seconds"] is not None:
+            target["duration_seconds"] = event["duration_seconds"]
+    return list(creates.values()), list(updates.values())
+
+
+def insert_creates(rows: List[dict]):
+    """Multi-row INSERT of interned rows that skips already-known ids."""
+    return (
+        pg_insert(Deployment)
+        .values(rows)
+        .on_conflict_do_nothing(index_elements=["id"])
+        .returning(
+            Deployment.id, Deployment.service_id,
+            Deployment.environment_id, Deployment.status,
+        )
+    )
+
+
+async def write_batch(events: List[dict]) -> None:
+    """Flush a batch of deployment events in a single transaction."""
+    creates, updates = coalesce(events)
+    created, updated = [], []
+
+    async with async_session() as session:
+        async with session.begin():
+            if creates:
+                result = await session.execute(
+                    insert_creates(await interned.intern_rows(creates))
+                )
+                created = [interned.with_names(row) for row in result.all()]
+
+            if updates:
+                batch = values(
+                    column("id", UUID(as_uuid=True)),
+                    column("status", Deployment.status.type),
+                    column("duration_seconds", Float),
+                    column("updated_at", DateTime),
+                    name="batch",
+                ).data([
+                    (u["id"], u["status"], u["duration_seconds"], u["updated_at"])
+                    for u in updates
+                ])
+                result = await session.execute(
+                    update(Deployment)
+                    .where(Deployment.id == batch.c.id)
+                    .values(
+                        status=batch.c.status,
+                        duration_seconds=func.coalesce(
+                            cast(batch.c.duration_seconds, Float), Deployment.duration_seconds
+                        ),
+                        updated_at=batch.c.updated_at,
+                    )
+                    .returning(
+                        Deployment.id, Deployment.service_name,
+                        Deployment.environment, Deployment.status,
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+                updated = result.all()
+
+            await publish_many(
+                session,
+                [make_event("deployment.created", row) for row in created]
+                + [make_event("deployment.updated", row) for row in updated],
+            )
+
+    if len(created) < len(creates):
+        logger.info(
+            "Deployment ingest: skipped %d creations of already-known deployments",
+            len(creates) - len(created),
+        )
+    if len(updated) < len(updates):
+        logger.warning(
+            "Deployment ingest: %d status changes referenced unknown deployments",
+            len(updates) - len(updated),
+        )
+
+    for row in created + updated:
+        DEPLOYMENT_COUNT.labels(environment=row.environment, status=row.status.value).inc()
+
+
+deployment_ingest: MicroBatcher[dict] = MicroBatcher(
+    "deployments",
+    write_batch,
+    max_queue=settings.DEPLOYMENT_INGEST_QUEUE_SIZE,
+    max_batch=settings.DEPLOYMENT_INGEST_MAX_BATCH,
+    flush_interval=settings.DEPLOYMENT_INGEST_FLUSH_INTERVAL_MS / 1000,
+    enqueue_timeout=settings.DEPLOYMENT_INGEST_ENQUEUE_TIMEOUT_MS / 1000,
+)
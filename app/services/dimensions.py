@@ -0,0 +1,118 @@
+"""Interned service and environment keys.
+
+Deployments, incidents and SLOs store small integer keys into the
+``services`` and ``environments`` dimension tables instead of repeating
+the names on every row. Writers resolve names through a per-worker intern
+cache. On a miss, the name is inserted in its own short transaction, so a
+key handed out stays valid even if the caller's transaction rolls back.
+Readers filter on keys: a cached key is bound directly, otherwise the name
+is looked up by a scalar subquery that Postgres evaluates once per query.
+Names are read back through the models' ``service_name`` / ``environment``
+column properties, so the API still speaks names.
+
+The dimension tables hold one row per distinct name, so the cache is not
+bounded.
+"""
+
+from types import SimpleNamespace
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from prometheus_client import Counter
+
+from app.core.database import async_session
+from app.models.models import Environment, Service
+
+# Prometheus Metrics
+DIMENSION_INTERN_MISSES = Counter(
+    "dimension_intern_misses_total",
+    "Dimension names resolved from the database instead of the intern cache",
+    ["dimension"],
+)
+
+
+class InternCache:
+    """Per-worker two-way map between dimension names and their keys."""
+
+    def __init__(self, session_factory=async_session):
+        self.session_factory = session_factory
+        self._keys: Dict[Tuple[type, str], int] = {}
+        self._names: Dict[Tuple[type, int], str] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def cached(self, dimension, name: str) -> Optional[int]:
+        return self._keys.get((dimension, name))
+
+    def name(self, dimension, key: int) -> Optional[str]:
+        return self._names.get((dimension, key))
+
+    def remember(self, dimension, name: str, key: int) -> None:
+        self._keys[(dimension, name)] = key
+        self._names[(dimension, key)] = name
+
+    async def resolve(self, dimension, name: str) -> int:
+        """Key for ``name``, creating the dimension row if it is new."""
+        key = self.cached(dimension, name)
+        if key is None:
+            key = (await self.resolve_many(dimension, [name]))[name]
+        return key
+
+    async def resolve_many(self, dimension, names: Iterable[str]) -> Dict[str, int]:
+        keys = {name: self.cached(dimension, name) for name in set(names)}
+        missing = sorted(name for name, key in keys.items() if key is None)
+        if not missing:
+            return keys
+
+        DIMENSION_INTERN_MISSES.labels(dimension=dimension.__tablename__).inc(len(missing))
+        lookup = select(dimension.name, dimension.id).where(dimension.name.in_(missing))
+        async with self.session_factory() as session:
+            async with session.begin():
+                found = dict((await session.execute(lookup)).all())
+                new = [name for name in missing if name not in found]
+                if new:
+                    # Only unseen names reach the INSERT, so sequence values
+                    # are not burnt on every worker's cold start
+                    await session.execute(
+                        pg_insert(dimension)
+                        .values([{"name": name} for name in new])
+                        .on_conflict_do_nothing(index_elements=["name"])
+                    )
+                    found = dict((await session.execute(lookup)).all())
+        for name, key in found.items():
+            self.remember(dimension, name, key)
+            keys[name] = key
+        return keys
+
+    async def intern_rows(self, rows: List[dict]) -> List[dict]:
+        """Insert rows with their ``service_name`` / ``environment`` names replaced by keys."""
+        services = await self.resolve_many(Service, [row["service_name"] for row in rows])
+        environments = await self.resolve_many(Environment, [row["environment"] for row in rows])
+        interned_rows = []
+        for row in rows:
+            row = dict(row)
+            row["service_id"] = services[row.pop("service_name")]
+            row["environment_id"] = environments[row.pop("environment")]
+            interned_rows.append(row)
+        return interned_rows
+
+    def key(self, dimension, name: str):
+        """Comparison operand for ``name``'s key in a fact-table filter."""
+        key = self.cached(dimension, name)
+        if key is not None:
+            return key
+        return select(dimension.id).where(dimension.name == name).scalar_subquery()
+
+    def with_names(self, row) -> SimpleNamespace:
+        """A ``RETURNING`` row of keys, with the names it was written with added."""
+        values = dict(row._mapping)
+        if "service_id" in values:
+            values["service_name"] = self.name(Service, values["service_id"])
+        if "environment_id" in values:
+            values["environment"] = self.name(Environment, values["environment_id"])
+        return SimpleNamespace(**values)
+
+
+interned = InternCache()
@@ -0,0 +1,259 @@
+"""Live incident and deployment events via Postgres LISTEN/NOTIFY.
+
+Write handlers publish compact JSON events with ``pg_notify`` inside their
+own transaction, so events are only delivered once the change commits.
+Each worker holds a single dedicated LISTEN connection and fans incoming
+events out to its in-process subscribers (SSE clients). Every subscriber
+has a bounded buffer; when a slow consumer falls behind, its oldest
+events are dropped rather than growing memory without limit. In-process
+listeners (e.g. cache invalidation) receive every event regardless of
+subscriptions.
+"""
+
+import asyncio
+import json
+import logging
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Set
+
+import asyncpg
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+from prometheus_client import Counter, Gauge
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Prometheus Metrics
+EVENT_STREAM_SUBSCRIBERS = Gauge(
+    "event_stream_subscribers",
+    "Connected event stream subscribers",
+)
+
+EVENTS_RECEIVED = Counter(
+    "events_received_total",
+    "Events received on the LISTEN connection",
+    ["type"],
+)
+
+EVENTS_DROPPED = Counter(
+    "event_stream_dropped_total",
+    "Events dropped because a subscriber buffer was full",
+)
+
+EVENT_LISTENER_CONNECTED = Gauge(
+    "event_listener_connected",
+    "Whether the worker's LISTEN connection is up",
+)
+
+_NOTIFY = text("SELECT pg_notify(:channel, :payload)")
+_NOTIFY_MANY = text(
+    "SELECT pg_notify(:channel, payload) FROM unnest(CAST(:payloads AS text[])) AS payload"
+)
+
+
+def make_event(event_type: str, obj, **extra) -> dict:
+    """Build an event payload from a Deployment, Incident or SLO row."""
+    status = getattr(obj, "status", None)
+    event = {
+        "type": event_type,
+        "id": str(obj.id),
+        "service_name": obj.service_name,
+        "environment": getattr(obj, "environment", None),
+        "status": getattr(status, "value", status),
+        "at": datetime.utcnow().isoformat(),
+    }
+    severity = getattr(obj, "severity", None)
+    if severity is not None:
+        event["severity"] = getattr(severity, "value", severity)
+    event.update(extra)
+    return event
+
+
+async def publish(db: AsyncSession, event: dict) -> None:
+    """Queue an event for delivery when the current transaction commits."""
+    if not settings.EVENT_STREAM_ENABLED:
+        return
+    await db.execute(
+        _NOTIFY,
+        {"channel": settings.EVENT_CHANNEL, "payload": json.dumps(event, separators=(",", ":"))},
+    )
+
+
+async def publish_many(db: AsyncSession, events: List[dict]) -> None:
+    """Queue several events with a single statement."""
+    if not settings.EVENT_STREAM_ENABLED or not events:
+        return
+    await db.execute(
+        _NOTIFY_MANY,
+        {
+            "channel": settings.EVENT_CHANNEL,
+            "payloads": [json.dumps(e, separators=(",", ":")) for e in events],
+        },
+    )
+
+
+class Subscription:
+    """A filtered, bounded event buffer for one client."""
+
+    def __init__(
+        self,
+        service_name: Optional[str] = None,
+        environment: Optional[str] = None,
+        severity: Optional[str] = None,
+        buffer_size: int = 100,
+    ):
+        self.service_name = service_name
+        self.environment = environment
+        self.severity = severity
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=buffer_size)
+        self.dropped = 0
+        self.closed = False
+
+    def matches(self, event: dict) -> bool:
+        if self.service_name and event.get("service_name") != self.service_name:
+            return False
+        if self.environment and event.get("environment") != self.environment:
+            return False
+        if self.severity and event.get("severity") != self.severity:
+            return False
+        return True
+
+    def offer(self, event: dict) -> None:
+        """Enqueue without blocking, dropping the oldest event when full."""
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+            EVENTS_DROPPED.inc()
+        self.queue.put_nowait(event)
+
+    def close(self) -> None:
+        """End the stream: the reader gets ``None`` after what is queued."""
+        if not self.closed:
+            self.closed = True
+            self.offer(None)
+
+
+class EventBroker:
+    """Single LISTEN connection per worker fanned out to subscribers."""
+
+    def __init__(self, channel: str, reconnect_delay: float = 1.0):
+        self.channel = channel
+        self.reconnect_delay = reconnect_delay
+        self._subscribers: Set[Subscription] = set()
+        self._listeners: List[Callable[[dict], None]] = []
+        self._connect_hooks: List[Callable[[], None]] = []
+        self._task: Optional[asyncio.Task] = None
+        self._connection = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self, **filters) -> Subscription:
+        subscription = Subscription(buffer_size=settings.EVENT_STREAM_CLIENT_BUFFER, **filters)
+        self._subscribers.add(subscription)
+        EVENT_STREAM_SUBSCRIBERS.set(len(self._subscribers))
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscribers.discard(subscription)
+        EVENT_STREAM_SUBSCRIBERS.set(len(self._subscribers))
+
+    def close_streams(self) -> None:
+        """Close every subscription, so clients reconnect to another worker."""
+        for subscription in self._subscribers:
+            subscription.close()
+
+    def add_listener(self, callback: Callable[[dict], None]) -> None:
+        """Call ``callback`` synchronously for every received event."""
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+
+    def add_connect_hook(self, callback: Callable[[], None]) -> None:
+        """Call ``callback`` each time the LISTEN connection is (re)established.
+
+        Events published while disconnected are lost, so anything derived
+        from them must be reset here.
+        """
+        if callback not in self._connect_hooks:
+            self._connect_hooks.append(callback)
+
+    def dispatch(self, event: dict) -> None:
+        """Fan an event out to listeners and every matching subscriber."""
+        EVENTS_RECEIVED.labels(type=event.get("type", "unknown")).inc()
+        for listener in self._listeners:
+            try:
+                listener(event)
+            except Exception:
+                logger.exception("Event listener failed for %s", event.get("type"))
+        for subscription in self._subscribers:
+            if subscription.matches(event):
+                subscription.offer(event)
+
+    def start(self) -> None:
+        if not self.running:
+            self._task = asyncio.create_task(self._run(), name="event-listener")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._close()
+
+    def _on_notify(self, connection, pid, channel, payload) -> None:
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            logger.warning("Ignoring malformed event payload on %s", channel)
+            return
+        self.dispatch(event)
+
+    async def _run(self) -> None:
+        dsn = make_url(settings.DATABASE_URL).set(drivername="postgresql")
+        while True:
+            lost = asyncio.Event()
+            try:
+                self._connection = await asyncpg.connect(dsn.render_as_string(hide_password=False))
+                self._connection.add_termination_listener(lambda _: lost.set())
+                await self._connection.add_listener(self.channel, self._on_notify)
+                EVENT_LISTENER_CONNECTED.set(1)
+                for hook in self._connect_hooks:
+                    hook()
+                logger.info("Listening for events on %s", self.channel)
+                await lost.wait()
+                logger.warning("Event LISTEN connection lost, reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Event LISTEN connection failed")
+            finally:
+                EVENT_LISTENER_CONNECTED.set(0)
+            await self._close()
+            await asyncio.sleep(self.reconnect_delay)
+
+    async def _close(self) -> None:
+        connection, self._connection = self._connection, None
+        if connection is not None and not connection.is_closed():
+            try:
+                await connection.close(timeout=5)
+            except Exception:
+                connection.terminate()
+
+
+event_broker = EventBroker(settings.EVENT_CHANNEL)
+
+
+def format_sse(event: Dict) -> str:
+    """Render an event as a server-sent-events frame."""
+    return f"event: {event.get('type', 'message')}\ndata: {json.dumps(event)}\n\n"
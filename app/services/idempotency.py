@@ -0,0 +1,212 @@
+"""``Idempotency-Key`` handling for create endpoints.
+
+The first request with a key inserts an ``idempotency_keys`` row in the
+same transaction as the object it creates, stores the serialized response
+on it and commits both together. Postgres settles duplicates across
+workers and replicas. A concurrent duplicate's ``INSERT ... ON CONFLICT``
+blocks on the primary key until the first transaction commits, then reads
+the stored response instead of inserting again. Within a worker,
+duplicates await the first request's future rather than taking a
+connection, and recent responses are replayed from a short-TTL LRU
+without touching the database.
+"""
+
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, NamedTuple, Optional, Tuple, Type
+
+from fastapi import HTTPException, Response
+from pydantic import BaseModel
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from prometheus_client import Counter
+
+from app.core.config import settings
+from app.core.database import async_session
+from app.models.models import IdempotencyKey
+
+# Prometheus Metrics
+IDEMPOTENCY_REQUESTS = Counter(
+    "idempotency_requests_total",
+    "Requests carrying an Idempotency-Key by how they were served",
+    ["scope", "result"],
+)
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+class StoredResponse(NamedTuple):
+    request_hash: str
+    status_code: int
+    body: str
+
+
+def request_hash(payload: BaseModel) -> str:
+    return hashlib.blake2b(payload.model_dump_json().encode(), digest_size=32).hexdigest()
+
+
+def claim_statement(scope: str, key: str, fingerprint: str, now: datetime, cutoff: datetime):
+    """Insert the key, or take over an expired one; returns a row only if claimed."""
+    return (
+        pg_insert(IdempotencyKey)
+        .values(scope=scope, key=key, request_hash=fingerprint, created_at=now)
+        .on_conflict_do_update(
+            index_elements=["scope", "key"],
+            set_={"request_hash": fingerprint, "status_code": None, "response_body": None, "created_at": now},
+            where=IdempotencyKey.created_at < cutoff,
+        )
+        .returning(IdempotencyKey.key)
+    )
+
+
+def store_statement(scope: str, key: str, status_code: int, body: str):
+    return (
+        update(IdempotencyKey)
+        .where(IdempotencyKey.scope == scope, IdempotencyKey.key == key)
+        .values(status_code=status_code, response_body=body)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def stored_query(scope: str, key: str):
+    return select(
+        IdempotencyKey.request_hash, IdempotencyKey.status_code, IdempotencyKey.response_body
+    ).where(IdempotencyKey.scope == scope, IdempotencyKey.key == key)
+
+
+class IdempotencyStore:
+    """Runs create handlers at most once per (scope, key)."""
+
+    def __init__(self, max_entries: int, cache_ttl: float, key_ttl: float, wait_timeout: float):
+        self.max_entries = max_entries
+        self.cache_ttl = cache_ttl
+        self.key_ttl = key_ttl
+        self.wait_timeout = wait_timeout
+        self._responses: "OrderedDict[Tuple[str, str], Tuple[StoredResponse, float]]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+
+    async def execute(
+        self,
+        db: AsyncSession,
+        scope: str,
+        key: str,
+        payload: BaseModel,
+        handler: Callable[[], Awaitable[object]],
+        response_model: Type[BaseModel],
+        status_code: int,
+    ) -> Response:
+        """Run ``handler`` once for this key, or replay its stored response."""
+        ident = (scope, key)
+        fingerprint = request_hash(payload)
+        waited = False
+        while True:
+            stored = self._cached(ident)
+            if stored is not None:
+                return self._replay(scope, stored, fingerprint, "waited" if waited else "cached")
+            pending = self._inflight.get(ident)
+            if pending is None:
+                break
+            waited = True
+            try:
+                await asyncio.wait_for(asyncio.shield(pending), self.wait_timeout)
+            except asyncio.TimeoutError:
+                raise HTTPException(
+                    status_code=409, detail=f"A request with this {IDEMPOTENCY_HEADER} is still in progress"
+                )
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[ident] = future
+        stored = None
+        try:
+            stored, replayed = await self._execute(
+                db, ident, fingerprint, handler, response_model, status_code
+            )
+        finally:
+            del self._inflight[ident]
+            if stored is not None:
+                self._remember(ident, stored)
+            future.set_result(stored)  # waiters re-check the cache, or retry themselves
+
+        if replayed:
+            return self._replay(scope, stored, fingerprint, "stored")
+        IDEMPOTENCY_REQUESTS.labels(scope=scope, result="executed").inc()
+        return self._response(stored, replayed=False)
+
+    async def _execute(self, db, ident, fingerprint, handler, response_model, status_code):
+        scope, key = ident
+        now = datetime.utcnow()
+        claimed = await db.execute(
+            claim_statement(scope, key, fingerprint, now, now - timedelta(seconds=self.key_ttl))
+        )
+        if claimed.first() is None:
+            row = (await db.execute(stored_query(scope, key))).one()
+            if row.status_code is None:
+                raise HTTPException(
+                    status_code=409, detail=f"A request with this {IDEMPOTENCY_HEADER} is still in progress"
+                )
+            return StoredResponse(*row), True
+
+        result = await handler()
+        body = response_model.model_validate(result).model_dump_json()
+        await db.execute(store_statement(scope, key, status_code, body))
+        await db.commit()  # key, object and stored response become visible together
+        return StoredResponse(fingerprint, status_code, body), False
+
+    def _replay(self, scope: str, stored: StoredResponse, fingerprint: str, result: str) -> Response:
+        if stored.request_hash != fingerprint:
+            IDEMPOTENCY_REQUESTS.labels(scope=scope, result="mismatch").inc()
+            raise HTTPException(
+                status_code=422,
+                detail=f"{IDEMPOTENCY_HEADER} was already used with a different request body",
+            )
+        IDEMPOTENCY_REQUESTS.labels(scope=scope, result=result).inc()
+        return self._response(stored, replayed=True)
+
+    @staticmethod
+    def _response(stored: StoredResponse, replayed: bool) -> Response:
+        return Response(
+            stored.body,
+            status_code=stored.status_code,
+            media_type="application/json",
+            headers={REPLAYED_HEADER: "true" if replayed else "false"},
+        )
+
+    def _cached(self, ident) -> Optional[StoredResponse]:
+        entry = self._responses.get(ident)
+        if entry is None:
+            return None
+        if entry[1] < time.monotonic():
+            del self._responses[ident]
+            return None
+        return entry[0]
+
+    def _remember(self, ident, stored: StoredResponse) -> None:
+        self._responses[ident] = (stored, time.monotonic() + self.cache_ttl)
+        self._responses.move_to_end(ident)
+        while len(self._responses) > self.max_entries:
+            self._responses.popitem(last=False)
+
+
+def purge_statement(cutoff: datetime):
+    return delete(IdempotencyKey).where(IdempotencyKey.created_at < cutoff)
+
+
+async def purge_expired() -> None:
+    """Scheduler job: delete keys past their TTL."""
+    cutoff = datetime.utcnow() - timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS)
+    async with async_session() as session:
+        async with session.begin():
+            await session.execute(purge_statement(cutoff))
+
+
+idempotency_store = IdempotencyStore(
+    max_entries=settings.IDEMPOTENCY_CACHE_SIZE,
+    cache_ttl=settings.IDEMPOTENCY_CACHE_TTL_SECONDS,
+    key_ttl=settings.IDEMPOTENCY_KEY_TTL_HOURS * 3600,
+    wait_timeout=settings.IDEMPOTENCY_WAIT_TIMEOUT_SECONDS,
+)
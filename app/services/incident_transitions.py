@@ -0,0 +1,92 @@
+"""Bulk incident state transitions computed in SQL.
+
+A single UPDATE moves every matching incident to the target status and
+stamps ``acknowledged_at`` / ``resolved_at`` / ``mttr_seconds`` in the
+database; the RETURNING rows drive one multi-row timeline INSERT, the
+Prometheus observations, cache invalidation and change events.
+"""
+
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import DateTime, func, insert, literal, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import invalidate_incident
+from app.core.middleware import INCIDENT_COUNT, MTTR_HISTOGRAM
+from app.models.models import Incident, IncidentStatus, IncidentTimeline
+from app.services.alert_dedup import fingerprint_index
+from app.services.events import make_event, publish_many
+
+
+def transition_statement(
+    target: IncidentStatus, conditions: List, now: datetime, root_cause: Optional[str] = None
+):
+    """UPDATE ... RETURNING for every incident matching ``conditions``.
+
+    Incidents already in the target status are left untouched so their
+    timestamps and MTTR are not re-stamped.
+    """
+    stamp = literal(now, DateTime)
+    values = {"status": target, "updated_at": stamp}
+    if target == IncidentStatus.ACKNOWLEDGED:
+        values["acknowledged_at"] = stamp
+    elif target == IncidentStatus.RESOLVED:
+        values["resolved_at"] = stamp
+        values["mttr_seconds"] = func.extract("epoch", stamp - Incident.triggered_at)
+    if root_cause:
+        values["root_cause"] = root_cause
+
+    return (
+        update(Incident)
+        .where(Incident.status != target, *conditions)
+        .values(**values)
+        .returning(
+            Incident.id, Incident.service_name, Incident.environment, Incident.severity,
+            Incident.status, Incident.mttr_seconds, Incident.fingerprint,
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def bulk_transition(
+    db: AsyncSession,
+    target: IncidentStatus,
+    conditions: List,
+    author: str,
+    note: Optional[str] = None,
+    root_cause: Optional[str] = None,
+) -> list:
+    """Transition matching incidents and return the RETURNING rows."""
+    now = datetime.utcnow()
+    result = await db.execute(transition_statement(target, conditions, now, root_cause))
+    rows = result.all()
+    if not rows:
+        return rows
+
+    description = f"Status changed to {target.value} (bulk)"
+    if note:
+        description = f"{description}: {note}"
+    await db.execute(
+        insert(IncidentTimeline).values([
+            {
+                "incident_id": row.id,
+                "event_type": "status_changed",
+                "description": description,
+                "author": author,
+                "created_at": now,
+            }
+            for row in rows
+        ])
+    )
+    await publish_many(db, [make_event("incident.updated", row) for row in rows])
+
+    for row in rows:
+        INCIDENT_COUNT.labels(severity=row.severity.value, status=target.value).inc()
+        if target == IncidentStatus.RESOLVED:
+            if row.mttr_seconds is not None:
+                MTTR_HISTOGRAM.labels(severity=row.severity.value).observe(row.mttr_seconds)
+            if row.fingerprint:
+                fingerprint_index.evict(row.fingerprint)
+        invalidate_incident(row.id)
+    return rows
@@ -0,0 +1,143 @@
+"""Periodic jobs run by the leader-elected scheduler.
+
+DORA gauges are computed once by the leader into ``dora_snapshots``; every
+worker publishes them from there, since each uvicorn worker has its own
+Prometheus registry and a scrape reaches any one of them.
+"""
+
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, literal, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.core.config import settings
+from app.core.database import async_session
+from app.core.middleware import CHANGE_FAILURE_RATE, DEPLOYMENT_FREQUENCY
+from app.models.models import Deployment, DeploymentStatus, DoraSnapshot
+from app.services import archive, idempotency, notifications, rollups
+from app.services.correlation import run_backfill
+from app.services.scheduler import Scheduler
+
+logger = logging.getLogger(__name__)
+
+DORA_GAUGE_WINDOW_DAYS = 30
+DORA_SNAPSHOT_MAX_AGE_INTERVALS = 3
+
+# Environments this worker last published DORA gauges for
+_gauge_environments = set()
+
+
+def dora_snapshot_statements(since: datetime, now: datetime):
+    """Upsert per-environment totals and failures, then drop the rest."""
+    failed = Deployment.status.in_([DeploymentStatus.FAILED, DeploymentStatus.ROLLED_BACK])
+    totals = (
+        select(
+            Deployment.environment_id,
+            func.count(),
+            func.count().filter(failed),
+            literal(now, DoraSnapshot.computed_at.type),
+        )
+        .where(Deployment.created_at >= since)
+        .group_by(Deployment.environment_id)
+    )
+    upsert = pg_insert(DoraSnapshot).from_select(
+        ["environment_id", "total", "failed", "computed_at"], totals
+    )
+    upsert = upsert.on_conflict_do_update(
+        index_elements=[DoraSnapshot.environment_id],
+        set_={
+            "total": upsert.excluded.total,
+            "failed": upsert.excluded.failed,
+            "computed_at": upsert.excluded.computed_at,
+        },
+    )
+    return [upsert, delete(DoraSnapshot).where(DoraSnapshot.computed_at < now)]
+
+
+def dora_gauge_query(fresh_since: datetime):
+    """Snapshot rows recent enough to publish."""
+    return select(DoraSnapshot.environment, DoraSnapshot.total, DoraSnapshot.failed).where(
+        DoraSnapshot.computed_at >= fresh_since
+    )
+
+
+async def snapshot_dora_metrics() -> None:
+    """Leader job: recompute the DORA gauge inputs for every worker."""
+    now = datetime.utcnow()
+    since = now - timedelta(days=DORA_GAUGE_WINDOW_DAYS)
+    async with async_session() as session:
+        async with session.begin():
+            for statement in dora_snapshot_statements(since, now):
+                await session.execute(statement)
+
+
+async def refresh_dora_gauges() -> None:
+    """Worker job: publish deployment frequency and change failure rate.
+
+    A snapshot no leader has refreshed for a few intervals is dropped
+    rather than served as current.
+    """
+    max_age = DORA_SNAPSHOT_MAX_AGE_INTERVALS * settings.JOB_DORA_GAUGES_INTERVAL_SECONDS
+    fresh_since = datetime.utcnow() - timedelta(seconds=max_age)
+    async with async_session() as session:
+        rows = (await session.execute(dora_gauge_query(fresh_since))).all()
+    publish_dora_gauges(rows)
+
+
+def publish_dora_gauges(rows) -> None:
+    """Set the gauges from ``rows``; environments no longer in it are removed."""
+    environments = {row.environment for row in rows}
+    for environment in _gauge_environments - environments:
+        DEPLOYMENT_FREQUENCY.remove(environment)
+        CHANGE_FAILURE_RATE.remove(environment)
+    _gauge_environments.clear()
+    _gauge_environments.update(environments)
+
+    for row in rows:
+        DEPLOYMENT_FREQUENCY.labels(environment=row.environment).set(row.total / DORA_GAUGE_WINDOW_DAYS)
+        CHANGE_FAILURE_RATE.labels(environment=row.environment).set(
+            round(row.failed / row.total * 100, 2) if row.total else 0.0
+        )
+
+
+async def backfill_recent_correlation() -> None:
+    """Attribute the last day's uncorrelated incidents to deployments."""
+    await run_backfill(days=1)
+
+
+def register_jobs(scheduler: Scheduler) -> None:
+    scheduler.register(
+        "dora_snapshot", snapshot_dora_metrics,
+        interval=settings.JOB_DORA_GAUGES_INTERVAL_SECONDS, timeout=30,
+    )
+    scheduler.register(
+        "dora_gauges", refresh_dora_gauges,
+        interval=settings.JOB_DORA_GAUGES_INTERVAL_SECONDS, timeout=10, leader_only=False,
+    )
+    if settings.INCIDENT_CORRELATION_ENABLED:
+        scheduler.register(
+            "correlation_backfill", backfill_recent_correlation,
+            interval=settings.JOB_CORRELATION_BACKFILL_INTERVAL_SECONDS, timeout=120,
+        )
+    scheduler.register(
+        "metric_rollups", rollups.refresh_rollups,
+        interval=settings.JOB_METRIC_ROLLUPS_INTERVAL_SECONDS, timeout=120,
+    )
+    scheduler.register(
+        "idempotency_purge", idempotency.purge_expired,
+        interval=settings.JOB_IDEMPOTENCY_PURGE_INTERVAL_SECONDS, timeout=300,
+    )
+    if settings.NOTIFY_WEBHOOKS:
+        scheduler.register(
+            "outbox_maintenance", notifications.maintain_outbox,
+            interval=settings.JOB_OUTBOX_MAINTENANCE_INTERVAL_SECONDS, timeout=60,
+        )
+    if settings.ARCHIVE_ENABLED:
+        if archive.available():
+            scheduler.register(
+                "archive", archive.run_archive,
+                interval=settings.JOB_ARCHIVE_INTERVAL_SECONDS, timeout=900,
+            )
+        else:
+            logger.warning("ARCHIVE_ENABLED is set but pyarrow is not installed; archiving disabled")
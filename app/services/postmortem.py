@@ -0,0 +1,209 @@
+"""Postmortem reports assembled from an incident and its surroundings.
+
+The incident, its linked deployment (joined) and its ordered timeline
+(one batched ``selectinload`` query) are loaded together, followed by one
+indexed range scan for the service's deployments around the trigger time.
+The rendered report is cached per worker under ``POSTMORTEM`` and dropped
+with the incident on any incident or timeline change event; changes to
+nearby deployments only show up once the cache TTL expires.
+"""
+
+import json
+from datetime import datetime, timedelta
+from typing import List, Optional
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
+
+from app.core.cache import PostmortemRecord
+from app.core.config import settings
+from app.models.models import Deployment, Incident
+
+NEARBY_DEPLOYMENTS_LIMIT = 50
+
+
+def postmortem_query(incident_id: UUID):
+    return (
+        select(Incident)
+        .where(Incident.id == incident_id)
+        .options(joinedload(Incident.caused_by_deployment), selectinload(Incident.timeline))
+    )
+
+
+def nearby_deployments_query(
+    service_id: int, environment_id: int, triggered_at: datetime, window: timedelta
+):
+    """Deployments of the service within ``window`` either side of the trigger."""
+    return (
+        select(Deployment)
+        .where(
+            Deployment.service_id == service_id,
+            Deployment.environment_id == environment_id,
+            Deployment.created_at.between(triggered_at - window, triggered_at + window),
+        )
+        .order_by(Deployment.created_at)
+        .limit(NEARBY_DEPLOYMENTS_LIMIT)
+    )
+
+
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def _seconds(start: Optional[datetime], end: Optional[datetime]) -> Optional[float]:
+    if start is None or end is None:
+        return None
+    return (end - start).total_seconds()
+
+
+def _deployment(deployment: Deployment, triggered_at: Optional[datetime] = None) -> dict:
+    entry = {
+        "id": str(deployment.id),
+        "version": deployment.version,
+        "commit_sha": deployment.commit_sha,
+        "status": deployment.status.value if deployment.status else None,
+        "deployed_by": deployment.deployed_by,
+        "created_at": _iso(deployment.created_at),
+    }
+    if triggered_at is not None:
+        entry["offset_seconds"] = _seconds(triggered_at, deployment.created_at)
+    return entry
+
+
+def build_report(incident: Incident, nearby: List[Deployment]) -> dict:
+    """Plain, JSON-serialisable postmortem document."""
+    cause = incident.caused_by_deployment
+    return {
+        "incident": {
+            "id": str(incident.id),
+            "title": incident.title,
+            "description": incident.description,
+            "severity": incident.severity.value,
+            "status": incident.status.value,
+            "service_name": incident.service_name,
+            "environment": incident.environment,
+            "on_call_engineer": incident.on_call_engineer,
+            "triggered_at": _iso(incident.triggered_at),
+            "acknowledged_at": _iso(incident.acknowledged_at),
+            "resolved_at": _iso(incident.resolved_at),
+            "time_to_acknowledge_seconds": _seconds(incident.triggered_at, incident.acknowledged_at),
+            "mttr_seconds": incident.mttr_seconds,
+            "root_cause": incident.root_cause,
+            "action_items": incident.action_items,
+        },
+        "caused_by_deployment": _deployment(cause) if cause is not None else None,
+        "nearby_deployments": [_deployment(d, incident.triggered_at) for d in nearby],
+        "timeline": [
+            {
+                "created_at": _iso(event.created_at),
+                "event_type": event.event_type,
+                "description": event.description,
+                "author": event.author,
+            }
+            for event in incident.timeline
+        ],
+        "generated_at": datetime.utcnow().isoformat(),
+    }
+
+
+def _cell(value) -> str:
+    if value is None:
+        return "—"
+    return str(value).replace("|", "\\|").replace("\n", " ")
+
+
+def _duration(seconds: Optional[float], signed: bool = False) -> str:
+    if seconds is None:
+        return "—"
+    sign = "-" if seconds < 0 else "+" if signed and seconds > 0 else ""
+    minutes, secs = divmod(int(abs(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{sign}{hours}h {minutes:02d}m {secs:02d}s" if hours else f"{sign}{minutes}m {secs:02d}s"
+
+
+def render_markdown(report: dict) -> str:
+    incident = report["incident"]
+    lines = [
+        f"# Postmortem: {incident['title']}",
+        "",
+        f"**Severity:** {incident['severity'].upper()} · **Status:** {incident['status']} · "
+        f"**Service:** {incident['service_name']} ({incident['environment']}) · "
+        f"**On call:** {_cell(incident['on_call_engineer'])}",
+        "",
+        "## Summary",
+        "",
+        incident["description"] or "_No description._",
+        "",
+        "## Impact",
+        "",
+        "| Triggered | Acknowledged | Resolved | Time to acknowledge | Time to resolve |",
+        "|---|---|---|---|---|",
+        f"| {_cell(incident['triggered_at'])} | {_cell(incident['acknowledged_at'])} "
+        f"| {_cell(incident['resolved_at'])} | {_duration(incident['time_to_acknowledge_seconds'])} "
+        f"| {_duration(incident['mttr_seconds'])} |",
+        "",
+        "## Root cause",
+        "",
+        incident["root_cause"] or "_Not yet determined._",
+        "",
+    ]
+
+    cause = report["caused_by_deployment"]
+    if cause is not None:
+        lines += [
+            "## Suspected deployment",
+            "",
+            f"`{cause['version']}` ({cause['commit_sha'][:12]}) by {cause['deployed_by']} "
+            f"at {cause['created_at']}, status {cause['status']}.",
+            "",
+        ]
+
+    lines += ["## Deployments around the trigger time", ""]
+    if report["nearby_deployments"]:
+        lines += ["| Offset | Version | Commit | Status | Deployed by |", "|---|---|---|---|---|"]
+        lines += [
+            f"| {_duration(d['offset_seconds'], signed=True)} | {_cell(d['version'])} "
+            f"| {_cell(d['commit_sha'][:12])} | {_cell(d['status'])} | {_cell(d['deployed_by'])} |"
+            for d in report["nearby_deployments"]
+        ]
+    else:
+        lines.append("_None._")
+    lines.append("")
+
+    lines += ["## Timeline", ""]
+    if report["timeline"]:
+        lines += ["| Time | Event | Description | Author |", "|---|---|---|---|"]
+        lines += [
+            f"| {_cell(e['created_at'])} | {_cell(e['event_type'])} | {_cell(e['description'])} "
+            f"| {_cell(e['author'])} |"
+            for e in report["timeline"]
+        ]
+    else:
+        lines.append("_No timeline events._")
+    lines.append("")
+
+    lines += ["## Action items", "", incident["action_items"] or "_None recorded._", ""]
+    return "\n".join(lines)
+
+
+def render(report: dict) -> PostmortemRecord:
+    return PostmortemRecord(
+        markdown=render_markdown(report),
+        json=json.dumps(report, separators=(",", ":")).encode(),
+    )
+
+
+async def load_postmortem(db: AsyncSession, incident_id: UUID) -> Optional[dict]:
+    incident = (await db.execute(postmortem_query(incident_id))).unique().scalar_one_or_none()
+    if incident is None:
+        return None
+    nearby = []
+    if incident.triggered_at is not None:
+        window = timedelta(minutes=settings.INCIDENT_CORRELATION_WINDOW_MINUTES)
+        result = await db.execute(nearby_deployments_query(
+            incident.service_id, incident.environment_id, incident.triggered_at, window
+        ))
+        nearby = result.scalars().all()
+    return build_report(incident, nearby)
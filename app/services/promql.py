@@ -0,0 +1,374 @@
+"""A small PromQL subset evaluated against metric rollups.
+
+Supported expressions are instant-vector selectors with ``=``, ``!=``,
+``=~`` and ``!~`` matchers, optionally wrapped in ``sum(...)`` or
+``sum by (labels) (...)``. Steps are rounded up to a whole number of
+rollup buckets, and start/end are aligned to the step. So a point at
+``t`` always covers the buckets in ``[t - step, t)``, and equal panels
+produce equal cache keys.
+"""
+
+import re
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import and_, func, literal, not_, select, DateTime
+
+from app.services.rollups import COUNT, EPOCH, METRICS, RollupMetric, label_column
+from app.models.models import MetricRollup
+
+# Ranges ending this long ago only change through backfills
+HISTORICAL_AGE_SECONDS = 3600
+
+_TOKEN = re.compile(
+    r"""\s*(?:
+        (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+      | (?P<ident>[a-zA-Z_:][a-zA-Z0-9_:]*)
+      | (?P<op>=~|!~|!=|=|[{}(),])
+    )""",
+    re.VERBOSE,
+)
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h|d|w|y)")
+_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800, "y": 31536000}
+
+
+class PromQLError(ValueError):
+    """Raised for expressions or parameters outside the supported subset."""
+
+
+class Matcher(NamedTuple):
+    label: str
+    op: str
+    value: str
+
+    def matches(self, value: str) -> bool:
+        if self.op == "=":
+            return value == self.value
+        if self.op == "!=":
+            return value != self.value
+        found = re.fullmatch(self.value, value) is not None
+        return found if self.op == "=~" else not found
+
+    def condition(self, column):
+        if self.op == "=":
+            return column == self.value
+        if self.op == "!=":
+            return column != self.value
+        anchored = column.regexp_match(f"^(?:{self.value})$")
+        return anchored if self.op == "=~" else not_(anchored)
+
+
+class Selector(NamedTuple):
+    metric: RollupMetric
+    matchers: Tuple[Matcher, ...]
+
+    def conditions(self) -> Optional[list]:
+        """SQL filters, or None when a matcher on an absent label excludes everything."""
+        conditions = [MetricRollup.metric == self.metric.name]
+        for matcher in self.matchers:
+            column = label_column(self.metric, matcher.label)
+            if column is not None:
+                conditions.append(matcher.condition(column))
+            elif not matcher.matches(""):
+                return None
+        return conditions
+
+
+class Query(NamedTuple):
+    selector: Selector
+    by: Optional[Tuple[str, ...]]  # None: no aggregation
+
+    @property
+    def labels(self) -> Tuple[str, ...]:
+        labels = self.selector.metric.labels
+        return labels if self.by is None else tuple(l for l in labels if l in self.by)
+
+
+class _Tokens:
+    def __init__(self, text: str):
+        self.items: List[Tuple[str, str]] = []
+        pos = 0
+        text = text.strip()
+        while pos < len(text):
+            match = _TOKEN.match(text, pos)
+            if match is None or match.end() == pos:
+                raise PromQLError(f"unexpected character at position {pos}: {text[pos:pos + 10]!r}")
+            kind = match.lastgroup
+            self.items.append((kind, match.group(kind)))
+            pos = match.end()
+        self.pos = 0
+
+    def peek(self, offset: int = 0) -> Tuple[Optional[str], Optional[str]]:
+        index = self.pos + offset
+        return self.items[index] if index < len(self.items) else (None, None)
+
+    def next(self) -> Tuple[Optional[str], Optional[str]]:
+        item = self.peek()
+        self.pos += 1
+        return item
+
+    def expect(self, value: str) -> None:
+        _, got = self.next()
+        if got != value:
+            raise PromQLError(f"expected {value!r}, got {got!r}")
+
+
+def _unquote(token: str) -> str:
+    return re.sub(r"\\(.)", r"\1", token[1:-1])
+
+
+def _labels(tokens: _Tokens) -> Tuple[str, ...]:
+    tokens.expect("(")
+    labels = []
+    while tokens.peek()[1] != ")":
+        kind, value = tokens.next()
+        if kind != "ident":
+            raise PromQLError(f"expected label name, got {value!r}")
+        labels.append(value)
+        if tokens.peek()[1] == ",":
+            tokens.next()
+    tokens.expect(")")
+    return tuple(labels)
+
+
+def _selector(tokens: _Tokens) -> Selector:
+    name = None
+    if tokens.peek()[0] == "ident":
+        name = tokens.next()[1]
+    matchers = []
+    if tokens.peek()[1] == "{":
+        tokens.next()
+        while tokens.peek()[1] != "}":
+            kind, label = tokens.next()
+            op_kind, op = tokens.next()
+            value_kind, value = tokens.next()
+            if kind != "ident" or op_kind != "op" or op not in ("=", "!=", "=~", "!~") or value_kind != "string":
+                raise PromQLError(f"invalid label matcher near {label!r}")
+            matchers.append(Matcher(label, op, _unquote(value)))
+            if tokens.peek()[1] == ",":
+                tokens.next()
+        tokens.expect("}")
+
+    for matcher in [m for m in matchers if m.label == "__name__"]:
+        if matcher.op != "=" or (name and name != matcher.value):
+            raise PromQLError("only an exact __name__ matcher is supported")
+        name = matcher.value
+        matchers.remove(matcher)
+    if name is None:
+        raise PromQLError("a metric name is required")
+    if name not in METRICS:
+        raise PromQLError(f"unknown metric {name!r}; available: {', '.join(sorted(METRICS))}")
+    for matcher in matchers:
+        if matcher.op in ("=~", "!~"):
+            try:
+                re.compile(matcher.value)
+            except re.error as exc:
+                raise PromQLError(f"invalid regular expression {matcher.value!r}: {exc}")
+    return Selector(METRICS[name], tuple(matchers))
+
+
+def parse(expr: str) -> Query:
+    tokens = _Tokens(expr)
+    by = None
+    if tokens.peek() == ("ident", "sum") and tokens.peek(1)[1] in ("(", "by", "without"):
+        tokens.next()
+        if tokens.peek()[1] == "without":
+            raise PromQLError("'without' is not supported; use 'by'")
+        if tokens.peek()[1] == "by":
+            tokens.next()
+            by = _labels(tokens)
+        tokens.expect("(")
+        selector = _selector(tokens)
+        tokens.expect(")")
+        if tokens.peek()[1] == "by":
+            if by is not None:
+                raise PromQLError("duplicate 'by' clause")
+            tokens.next()
+            by = _labels(tokens)
+        by = by or ()
+    elif tokens.peek()[0] == "ident" and tokens.peek(1)[1] == "(":
+        raise PromQLError(f"unsupported function {tokens.peek()[1]!r}; only sum is supported")
+    else:
+        selector = _selector(tokens)
+    if tokens.peek()[0] is not None:
+        raise PromQLError(f"unexpected {tokens.peek()[1]!r} after expression")
+    return Query(selector, by)
+
+
+def parse_time(value: str) -> float:
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        raise PromQLError(f"cannot parse {value!r} to a valid timestamp")
+
+
+def parse_duration(value: str) -> float:
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION.findall(value)
+    if not parts or "".join(n + u for n, u in parts) != value:
+        raise PromQLError(f"cannot parse {value!r} to a valid duration")
+    return sum(float(n) * _UNITS[u] for n, u in parts)
+
+
+def align(start: float, end: float, step: float, bucket: float, max_points: int) -> Tuple[float, float, float]:
+    """Round the step up to whole buckets and snap start/end onto it."""
+    if step <= 0:
+        raise PromQLError("zero or negative query resolution step widths are not accepted")
+    if end < start:
+        raise PromQLError("end timestamp must not be before start time")
+    step = -(-step // bucket) * bucket
+    start, end = start - start % step, end - end % step
+    if (end - start) / step + 1 > max_points:
+        raise PromQLError(f"exceeded maximum resolution of {max_points} points per timeseries")
+    return start, end, step
+
+
+def to_datetime(timestamp: float) -> datetime:
+    return EPOCH + timedelta(seconds=timestamp)
+
+
+def range_statement(query: Query, start: float, end: float, step: float):
+    """One GROUP BY over the rollups: a row per output series and step."""
+    conditions = query.selector.conditions()
+    if conditions is None:
+        return None
+    metric = query.selector.metric
+    columns = [label_column(metric, label).label(label) for label in query.labels]
+    step_start = func.date_bin(
+        literal(timedelta(seconds=step)), MetricRollup.bucket, literal(EPOCH, DateTime)
+    ).label("step_start")
+    return (
+        select(
+            *columns, step_start,
+            func.sum(MetricRollup.value_sum).label("total"),
+            func.sum(MetricRollup.value_count).label("samples"),
+        )
+        .where(
+            *conditions,
+            MetricRollup.bucket >= to_datetime(start - step),
+            MetricRollup.bucket < to_datetime(end),
+        )
+        .group_by(*columns, step_start)
+        .order_by(*columns, step_start)
+    )
+
+
+def format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def matrix(query: Query, rows: Iterable, start: float, end: float, step: float) -> List[dict]:
+    """Prometheus ``matrix`` result; counters are zero-filled between series points."""
+    metric = query.selector.metric
+    series: Dict[Tuple, Dict[float, float]] = {}
+    for row in rows:
+        key = tuple(getattr(row, label) for label in query.labels)
+        at = (row.step_start - EPOCH).total_seconds() + step
+        if metric.kind == COUNT:
+            value = row.total
+        elif row.samples:
+            value = row.total / row.samples
+        else:
+            continue
+        series.setdefault(key, {})[at] = float(value)
+
+    points = int(round((end - start) / step)) + 1
+    result = []
+    for key, values in sorted(series.items()):
+        labels = {label: value for label, value in zip(query.labels, key) if value}
+        if query.by is None:
+            labels = {"__name__": metric.name, **labels}
+        if metric.kind == COUNT:
+            values = {start + i * step: values.get(start + i * step, 0.0) for i in range(points)}
+        result.append({
+            "metric": labels,
+            "values": [[at, format_value(v)] for at, v in sorted(values.items())],
+        })
+    return result
+
+
+def series_statement(selector: Selector, start: Optional[float], end: Optional[float]):
+    conditions = selector.conditions()
+    if conditions is None:
+        return None
+    if start is not None:
+        conditions.append(MetricRollup.bucket >= to_datetime(start))
+    if end is not None:
+        conditions.append(MetricRollup.bucket <= to_datetime(end))
+    return (
+        select(MetricRollup.service_name, MetricRollup.environment, MetricRollup.dimension)
+        .where(and_(*conditions))
+        .distinct()
+    )
+
+
+def series_labels(metric: RollupMetric, row) -> Dict[str, str]:
+    values = {"service": row.service_name, "environment": row.environment}
+    if metric.dimension:
+        values[metric.dimension] = row.dimension
+    labels = {"__name__": metric.name}
+    labels.update((label, values[label]) for label in metric.labels if values.get(label))
+    return labels
+
+
+def label_values_statement(label: str):
+    """Distinct values of a label across every metric that has it."""
+    if label == "service":
+        column = MetricRollup.service_name
+        metrics = [m.name for m in METRICS.values()]
+    elif label == "environment":
+        column = MetricRollup.environment
+        metrics = [m.name for m in METRICS.values() if "environment" in m.labels]
+    else:
+        column = MetricRollup.dimension
+        metrics = [m.name for m in METRICS.values() if m.dimension == label]
+        if not metrics:
+            return None
+    return (
+        select(column)
+        .where(MetricRollup.metric.in_(metrics), column != "")
+        .distinct()
+        .order_by(column)
+    )
+
+
+def label_names() -> List[str]:
+    return sorted({"__name__", *(label for m in METRICS.values() for label in m.labels)})
+
+
+class ResultCache:
+    """LRU of rendered results; ranges well in the past are kept longer."""
+
+    def __init__(self, max_entries: int, ttl: float, historical_ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.historical_ttl = historical_ttl
+        self._entries: "OrderedDict[tuple, Tuple[object, float]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: tuple):
+        entry = self._entries.get(key)
+        if entry is None or entry[1] < time.monotonic():
+            self._entries.pop(key, None)
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key: tuple, value, end: Optional[float] = None) -> None:
+        historical = end is not None and end < time.time() - HISTORICAL_AGE_SECONDS
+        ttl = self.historical_ttl if historical else self.ttl
+        self._entries[key] = (value, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
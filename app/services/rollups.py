@@ -0,0 +1,247 @@
+"""Time-bucketed metric rollups maintained by the scheduler.
+
+Deployment, incident and MTTR series are recomputed from the source
+tables with ``date_bin`` into ``ROLLUP_BUCKET_SECONDS`` buckets. Each run
+rebuilds, per metric, the most recent buckets plus the buckets that rows
+updated since the previous run (``updated_at`` is indexed) fall into by
+that metric's own time column, so resolving an old incident rebuilds its
+trigger and resolution buckets rather than everything since it. Buckets
+older than the archive cutoff are never rebuilt: their source rows may
+already have moved to the cold archive. SLO error budgets have no history
+in the source tables and are snapshotted into the current bucket instead.
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import DateTime, Float, Integer, String, and_, cast, delete, func, literal, or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.core.config import settings
+from app.core.database import async_session
+from app.models.models import SLO, Deployment, Incident, MetricRollup
+from app.services.archive import archive_cutoff
+
+EPOCH = datetime(1970, 1, 1)
+
+COUNT = "count"  # value per step is the number of events in the step
+MEAN = "mean"  # value per step is sum / count over the step
+
+
+class RollupMetric(NamedTuple):
+    name: str
+    kind: str
+    labels: Tuple[str, ...]
+    dimension: Optional[str]  # label stored in MetricRollup.dimension
+    help: str
+
+
+METRICS: Dict[str, RollupMetric] = {m.name: m for m in (
+    RollupMetric(
+        "devops_deployments_total", COUNT, ("service", "environment", "status"), "status",
+        "Deployments started in each step",
+    ),
+    RollupMetric(
+        "devops_deployment_duration_seconds", MEAN, ("service", "environment"), None,
+        "Mean duration of deployments started in each step",
+    ),
+    RollupMetric(
+        "devops_incidents_total", COUNT, ("service", "environment", "severity"), "severity",
+        "Incidents triggered in each step",
+    ),
+    RollupMetric(
+        "devops_incident_mttr_seconds", MEAN, ("service", "environment", "severity"), "severity",
+        "Mean time to recovery of incidents resolved in each step",
+    ),
+    RollupMetric(
+        "devops_slo_error_budget_remaining", MEAN, ("service", "slo"), "slo",
+        "SLO error budget remaining (%), sampled on each rollup run",
+    ),
+)}
+
+SLO_BUDGET = "devops_slo_error_budget_remaining"
+EVENT_METRICS = tuple(name for name in METRICS if name != SLO_BUDGET)
+
+# Source table and time column that place an event metric's rows in buckets
+TIME_COLUMNS = {
+    "devops_deployments_total": (Deployment, Deployment.created_at),
+    "devops_deployment_duration_seconds": (Deployment, Deployment.created_at),
+    "devops_incidents_total": (Incident, Incident.triggered_at),
+    "devops_incident_mttr_seconds": (Incident, Incident.resolved_at),
+}
+
+_COLUMNS = [
+    "metric", "service_name", "environment", "dimension", "bucket",
+    "value_sum", "value_count", "computed_at",
+]
+
+
+def label_column(metric: RollupMetric, label: str):
+    if label == "service":
+        return MetricRollup.service_name
+    if label == "environment":
+        return MetricRollup.environment
+    if label == metric.dimension:
+        return MetricRollup.dimension
+    return None
+
+
+def bucket_of(column, seconds: float):
+    return func.date_bin(literal(timedelta(seconds=seconds)), column, literal(EPOCH, DateTime))
+
+
+def floor_time(value: datetime, seconds: float) -> datetime:
+    offset = (value - EPOCH).total_seconds()
+    return EPOCH + timedelta(seconds=offset - offset % seconds)
+
+
+class Window(NamedTuple):
+    """Buckets of one metric to rebuild: all from ``start`` on, plus ``buckets``.
+
+    A ``start`` of ``None`` rebuilds the whole metric.
+    """
+    start: Optional[datetime]
+    buckets: Tuple[datetime, ...] = ()
+
+    def rows(self, column, seconds: float) -> List:
+        """Filter on source rows whose ``column`` falls in the window."""
+        if self.start is None:
+            return []
+        if not self.buckets:
+            return [column >= self.start]
+        return [or_(
+            column >= self.start,
+            and_(column >= min(self.buckets), bucket_of(column, seconds).in_(self.buckets)),
+        )]
+
+    def stored(self) -> List:
+        """Filter on the rollup rows the window replaces."""
+        if self.start is None:
+            return []
+        if not self.buckets:
+            return [MetricRollup.bucket >= self.start]
+        return [or_(MetricRollup.bucket >= self.start, MetricRollup.bucket.in_(self.buckets))]
+
+
+def _enum_label(column):
+    return func.coalesce(func.lower(cast(column, String)), "")
+
+
+def _rollup(name: str, model, time_column, dimension, value_sum, value_count, where, seconds: float, now: datetime):
+    """Aggregate on the integer dimension keys; names are looked up per group."""
+    bucket = bucket_of(time_column, seconds)
+    keys = [model.service_id, model.environment_id] + ([dimension] if dimension is not None else [])
+    return (
+        select(
+            literal(name), model.service_name, model.environment,
+            dimension if dimension is not None else literal(""), bucket,
+            cast(value_sum, Float), cast(value_count, Integer), literal(now, DateTime),
+        )
+        .where(*where)
+        .group_by(*keys, bucket)
+    )
+
+
+def event_rollups(windows: Dict[str, Window], seconds: float, now: datetime) -> List:
+    """INSERT ... SELECT statements rebuilding each event metric's window."""
+    def rows(name):
+        return windows[name].rows(TIME_COLUMNS[name][1], seconds)
+
+    selects = [
+        _rollup(
+            "devops_deployments_total", Deployment, Deployment.created_at, _enum_label(Deployment.status),
+            func.count(), func.count(), rows("devops_deployments_total"), seconds, now,
+        ),
+        _rollup(
+            "devops_deployment_duration_seconds", Deployment, Deployment.created_at, None,
+            func.sum(Deployment.duration_seconds), func.count(Deployment.duration_seconds),
+            rows("devops_deployment_duration_seconds") + [Deployment.duration_seconds.isnot(None)],
+            seconds, now,
+        ),
+        _rollup(
+            "devops_incidents_total", Incident, Incident.triggered_at, _enum_label(Incident.severity),
+            func.count(), func.count(), rows("devops_incidents_total"), seconds, now,
+        ),
+        _rollup(
+            "devops_incident_mttr_seconds", Incident, Incident.resolved_at, _enum_label(Incident.severity),
+            func.sum(Incident.mttr_seconds), func.count(Incident.mttr_seconds),
+            rows("devops_incident_mttr_seconds") + [Incident.mttr_seconds.isnot(None)], seconds, now,
+        ),
+    ]
+    return [pg_insert(MetricRollup).from_select(_COLUMNS, query) for query in selects]
+
+
+def slo_snapshot(seconds: float, now: datetime):
+    """Upsert every SLO's current error budget into the current bucket."""
+    query = (
+        select(
+            literal(SLO_BUDGET), SLO.service_name, literal(""), SLO.name,
+            literal(floor_time(now, seconds), DateTime),
+            func.avg(SLO.error_budget_remaining), literal(1), literal(now, DateTime),
+        )
+        .where(SLO.error_budget_remaining.isnot(None))
+        .group_by(SLO.service_id, SLO.name)
+    )
+    stmt = pg_insert(MetricRollup).from_select(_COLUMNS, query)
+    return stmt.on_conflict_do_update(
+        index_elements=["metric", "service_name", "environment", "dimension", "bucket"],
+        set_={
+            "value_sum": stmt.excluded.value_sum,
+            "value_count": 1,
+            "computed_at": stmt.excluded.computed_at,
+        },
+    )
+
+
+def watermark_query():
+    return select(func.max(MetricRollup.computed_at)).where(MetricRollup.metric.in_(EVENT_METRICS))
+
+
+def dirty_buckets_query(metric: str, changed_since: datetime, seconds: float):
+    """Buckets of ``metric`` holding rows written since ``changed_since``."""
+    model, column = TIME_COLUMNS[metric]
+    bucket = bucket_of(column, seconds)
+    return select(bucket).where(model.updated_at >= changed_since, column.isnot(None)).distinct()
+
+
+def clamp(window: Window, floor: Optional[datetime]) -> Window:
+    """Keep ``window`` clear of buckets below ``floor``."""
+    if floor is None:
+        return window
+    start = floor if window.start is None else max(window.start, floor)
+    return Window(start, tuple(sorted(b for b in window.buckets if b >= floor)))
+
+
+def refresh_statements(windows: Dict[str, Window], seconds: float, now: datetime) -> List:
+    stale = [
+        delete(MetricRollup).where(MetricRollup.metric == name, *windows[name].stored())
+        for name in EVENT_METRICS
+    ]
+    return [*stale, *event_rollups(windows, seconds, now), slo_snapshot(seconds, now)]
+
+
+def rebuild_floor(now: datetime, seconds: float) -> Optional[datetime]:
+    """First bucket that holds no archived rows, if the archiver runs."""
+    if not settings.ARCHIVE_ENABLED:
+        return None
+    return floor_time(archive_cutoff(now), seconds) + timedelta(seconds=seconds)
+
+
+async def refresh_rollups() -> None:
+    """Scheduler job: recompute dirty buckets and snapshot SLO budgets."""
+    now = datetime.utcnow()
+    seconds = settings.ROLLUP_BUCKET_SECONDS
+    floor = rebuild_floor(now, seconds)
+    async with async_session() as session:
+        async with session.begin():
+            windows = {name: Window(None) for name in EVENT_METRICS}
+            watermark = (await session.execute(watermark_query())).scalar()
+            if watermark is not None:
+                changed_since = watermark - timedelta(seconds=settings.ROLLUP_LATE_COMMIT_SECONDS)
+                recent = floor_time(now - timedelta(seconds=2 * seconds), seconds)
+                for name in EVENT_METRICS:
+                    dirty = (await session.execute(dirty_buckets_query(name, changed_since, seconds)))
+                    windows[name] = Window(recent, tuple(b for b in dirty.scalars() if b < recent))
+            windows = {name: clamp(window, floor) for name, window in windows.items()}
+            for statement in refresh_statements(windows, seconds, now):
+                await session.execute(statement)
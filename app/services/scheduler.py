@@ -0,0 +1,291 @@
+"""Leader-elected periodic job scheduler.
+
+Every worker runs a scheduler, but only the one holding a session-level
+Postgres advisory lock executes jobs, so each job runs once across all
+replicas and workers. The lock lives on a dedicated asyncpg connection
+(never a pooled one, which would hand the lock to whoever checks the
+connection out next); if that connection drops, leadership is lost, running
+jobs are cancelled and another worker takes over on its next attempt.
+
+A half-open connection raises no termination event, so the leader probes
+its lock on every tick and steps down if the probe fails or times out. TCP
+keepalives on the lock connection let Postgres end a session whose leader
+has vanished, and release the lock for the next one.
+
+Jobs registered with ``leader_only=False`` run in every worker, leader or
+not, for per-process state such as Prometheus gauges, which each worker
+serves from its own registry.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import asyncpg
+from sqlalchemy.engine import make_url
+from prometheus_client import Counter, Gauge, Histogram
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Prometheus Metrics
+SCHEDULER_IS_LEADER = Gauge(
+    "scheduler_is_leader",
+    "Whether this worker currently holds the scheduler leader lock",
+)
+
+SCHEDULER_JOB_RUNS = Counter(
+    "scheduler_job_runs_total",
+    "Scheduled job executions",
+    ["job", "outcome"],
+)
+
+SCHEDULER_JOB_DURATION = Histogram(
+    "scheduler_job_duration_seconds",
+    "Scheduled job run time",
+    ["job"],
+    buckets=[0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0],
+)
+
+SCHEDULER_JOB_LAG = Gauge(
+    "scheduler_job_lag_seconds",
+    "Delay between a job's scheduled time and its actual start",
+    ["job"],
+)
+
+SCHEDULER_JOB_LAST_SUCCESS = Gauge(
+    "scheduler_job_last_success_timestamp",
+    "Unix time of the job's last successful run",
+    ["job"],
+)
+
+
+# Whether this session still holds the advisory lock on a bigint key
+LOCK_HELD_QUERY = """
+SELECT EXISTS (
+    SELECT 1 FROM pg_locks
+    WHERE locktype = 'advisory' AND granted AND pid = pg_backend_pid()
+      AND classid = ($1::bigint >> 32)::oid
+      AND objid = ($1::bigint & 4294967295)::oid
+      AND objsubid = 1
+)
+"""
+
+
+class Job:
+    """A periodic coroutine with its own interval, jitter and timeout."""
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[], Awaitable[object]],
+        interval: float,
+        timeout: float,
+        jitter: float = 0.0,
+        leader_only: bool = True,
+    ):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.timeout = timeout
+        self.jitter = jitter
+        self.leader_only = leader_only
+        self.next_run = 0.0
+        self.task: Optional[asyncio.Task] = None
+
+    def schedule_next(self, now: float) -> None:
+        self.next_run = now + self.interval + random.uniform(0, self.jitter)
+
+    async def run(self, lag: float) -> None:
+        SCHEDULER_JOB_LAG.labels(job=self.name).set(max(0.0, lag))
+        started = time.perf_counter()
+        outcome = "success"
+        try:
+            await asyncio.wait_for(self.func(), timeout=self.timeout)
+            SCHEDULER_JOB_LAST_SUCCESS.labels(job=self.name).set(time.time())
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+            logger.warning("Scheduled job %s timed out after %.0fs", self.name, self.timeout)
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
+        except Exception:
+            outcome = "error"
+            logger.exception("Scheduled job %s failed", self.name)
+        finally:
+            SCHEDULER_JOB_RUNS.labels(job=self.name, outcome=outcome).inc()
+            SCHEDULER_JOB_DURATION.labels(job=self.name).observe(time.perf_counter() - started)
+
+
+class Scheduler:
+    """Runs registered jobs while this worker is the elected leader."""
+
+    def __init__(
+        self,
+        lock_key: int,
+        tick: float = 1.0,
+        election_interval: float = 10.0,
+        probe_timeout: float = 2.0,
+    ):
+        self.lock_key = lock_key
+        self.tick = tick
+        self.election_interval = election_interval
+        self.probe_timeout = probe_timeout
+        self.jobs: Dict[str, Job] = {}
+        self.is_leader = False
+        self._task: Optional[asyncio.Task] = None
+        self._connection = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def register(
+        self,
+        name: str,
+        func,
+        interval: float,
+        timeout: float = None,
+        jitter: float = None,
+        leader_only: bool = True,
+    ) -> Job:
+        job = Job(
+            name,
+            func,
+            interval,
+            timeout=timeout if timeout is not None else interval,
+            jitter=jitter if jitter is not None else interval * 0.1,
+            leader_only=leader_only,
+        )
+        self.jobs[name] = job
+        return job
+
+    def start(self) -> None:
+        if not self.running:
+            self._task = asyncio.create_task(self._run(), name="scheduler")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._cancel_jobs(leader_only=False)
+        await self._release()
+
+    def run_due(self, now: float) -> List[Job]:
+        """Start every due job not already running; returns the started jobs."""
+        started = []
+        for job in self.jobs.values():
+            if job.leader_only and not self.is_leader:
+                continue
+            if now < job.next_run or (job.task is not None and not job.task.done()):
+                continue
+            lag = now - job.next_run if job.next_run else 0.0
+            job.schedule_next(now)
+            job.task = asyncio.create_task(job.run(lag), name=f"job-{job.name}")
+            started.append(job)
+        return started
+
+    async def _run(self) -> None:
+        next_election = 0.0
+        while True:
+            try:
+                if self.is_leader:
+                    await self._verify_lock()
+                elif time.monotonic() >= next_election:
+                    next_election = time.monotonic() + self.election_interval * random.uniform(0.8, 1.2)
+                    await self._try_acquire()
+                self.run_due(time.monotonic())
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Scheduler election failed")
+                await self._step_down()
+                next_election = time.monotonic() + self.election_interval
+            await asyncio.sleep(self.tick)
+
+    async def _try_acquire(self) -> None:
+        if self._connection is None or self._connection.is_closed():
+            dsn = make_url(settings.DATABASE_URL).set(drivername="postgresql")
+            keepalive = str(settings.SCHEDULER_LOCK_KEEPALIVE_SECONDS)
+            self._connection = await asyncpg.connect(
+                dsn.render_as_string(hide_password=False),
+                server_settings={
+                    "tcp_keepalives_idle": keepalive,
+                    "tcp_keepalives_interval": keepalive,
+                    "tcp_keepalives_count": "3",
+                },
+            )
+            self._connection.add_termination_listener(self._on_connection_lost)
+
+        acquired = await self._connection.fetchval("SELECT pg_try_advisory_lock($1)", self.lock_key)
+        if acquired:
+            self.is_leader = True
+            SCHEDULER_IS_LEADER.set(1)
+            now = time.monotonic()
+            # Spread first runs so a new leader does not fire every job at once.
+            for job in self.jobs.values():
+                job.next_run = now + random.uniform(0, job.jitter)
+            logger.info("Scheduler leadership acquired (lock %d)", self.lock_key)
+
+    async def _verify_lock(self) -> None:
+        """Step down unless the lock connection answers and still holds the lock."""
+        connection = self._connection
+        try:
+            held = connection is not None and await asyncio.wait_for(
+                connection.fetchval(LOCK_HELD_QUERY, self.lock_key), timeout=self.probe_timeout
+            )
+        except Exception as exc:
+            logger.warning("Scheduler lock probe failed (%r), stepping down", exc)
+            held = False
+        else:
+            if not held:
+                logger.warning("Scheduler lock %d no longer held, stepping down", self.lock_key)
+        if not held:
+            await self._step_down()
+
+    def _on_connection_lost(self, connection) -> None:
+        if not self.is_leader:
+            return  # closed by us while releasing
+        logger.warning("Scheduler lock connection lost, stepping down")
+        asyncio.get_running_loop().create_task(self._step_down())
+
+    async def _step_down(self) -> None:
+        self.is_leader = False
+        SCHEDULER_IS_LEADER.set(0)
+        await self._cancel_jobs()
+        await self._release()
+
+    async def _cancel_jobs(self, leader_only: bool = True) -> None:
+        tasks = [
+            job.task for job in self.jobs.values()
+            if job.task is not None and not job.task.done() and (job.leader_only or not leader_only)
+        ]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _release(self) -> None:
+        # Closing the session releases the advisory lock.
+        connection, self._connection = self._connection, None
+        self.is_leader = False
+        SCHEDULER_IS_LEADER.set(0)
+        if connection is not None and not connection.is_closed():
+            try:
+                await connection.close(timeout=5)
+            except Exception:
+                connection.terminate()
+
+
+scheduler = Scheduler(
+    settings.SCHEDULER_LOCK_KEY,
+    tick=settings.SCHEDULER_TICK_SECONDS,
+    election_interval=settings.SCHEDULER_ELECTION_INTERVAL_SECONDS,
+    probe_timeout=settings.SCHEDULER_LOCK_PROBE_TIMEOUT_SECONDS,
+)
@@ -0,0 +1,141 @@
+"""Index size and aggregate speed: string dimensions vs integer keys.
+
+Builds two copies of a deployments-shaped fact table in a scratch schema.
+One stores ``service_name`` / ``environment`` strings, the other
+``service_id`` / ``environment_id`` keys into dimension tables. The
+benchmark compares their index sizes and the timing of a per-service
+GROUP BY and a filtered as-of lookup. Needs the Postgres in
+``DATABASE_URL``; the scratch schema is dropped afterwards:
+
+    python -m benchmarks.bench_dimension_keys --rows 5000000
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.config import settings
+
+SCHEMA = "bench_dimension_keys"
+
+
+def setup_statements(rows: int, services: int):
+    # Utility statements take no bind parameters; both values are ints
+    return [
+        f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE",
+        f"CREATE SCHEMA {SCHEMA}",
+        f"""CREATE TABLE {SCHEMA}.services AS
+            SELECT i AS id, 'service-' || lpad(i::text, 4, '0') || '-api' AS name
+            FROM generate_series(1, {services}) AS i""",
+        f"""CREATE TABLE {SCHEMA}.environments AS
+            SELECT i::smallint AS id, (ARRAY['production', 'staging', 'development', 'qa'])[i] AS name
+            FROM generate_series(1, 4) AS i""",
+        f"""CREATE TABLE {SCHEMA}.key_facts AS
+            SELECT 1 + (random() * ({services} - 1))::int AS service_id,
+                   (1 + (random() * 3)::int)::smallint AS environment_id,
+                   (random() * 4)::int AS status,
+                   now()::timestamp - random() * interval '365 days' AS created_at
+            FROM generate_series(1, {rows})""",
+        f"""CREATE TABLE {SCHEMA}.string_facts AS
+            SELECT s.name::varchar(255) AS service_name, e.name::varchar(50) AS environment,
+                   f.status, f.created_at
+            FROM {SCHEMA}.key_facts f
+            JOIN {SCHEMA}.services s ON s.id = f.service_id
+            JOIN {SCHEMA}.environments e ON e.id = f.environment_id""",
+        f"CREATE INDEX string_service ON {SCHEMA}.string_facts (service_name)",
+        f"CREATE INDEX string_environment ON {SCHEMA}.string_facts (environment)",
+        f"CREATE INDEX string_as_of ON {SCHEMA}.string_facts (service_name, environment, created_at)",
+        f"CREATE INDEX key_service ON {SCHEMA}.key_facts (service_id)",
+        f"CREATE INDEX key_environment ON {SCHEMA}.key_facts (environment_id)",
+        f"CREATE INDEX key_as_of ON {SCHEMA}.key_facts (service_id, environment_id, created_at)",
+        f"ANALYZE {SCHEMA}.string_facts",
+        f"ANALYZE {SCHEMA}.key_facts",
+    ]
+
+
+SIZES = text(f"""
+    SELECT relname, pg_relation_size(oid) AS bytes FROM pg_class
+    WHERE relnamespace = '{SCHEMA}'::regnamespace AND relkind IN ('r', 'i')
+""")
+
+QUERIES = {
+    "group by service": (
+        f"""SELECT service_name, environment, count(*), count(*) FILTER (WHERE status = 3)
+            FROM {SCHEMA}.string_facts GROUP BY service_name, environment""",
+        # The API's shape: aggregate on keys, then look names up per group
+        f"""SELECT (SELECT name FROM {SCHEMA}.services s WHERE s.id = f.service_id),
+                   (SELECT name FROM {SCHEMA}.environments e WHERE e.id = f.environment_id),
+                   count(*), count(*) FILTER (WHERE status = 3)
+            FROM {SCHEMA}.key_facts f GROUP BY service_id, environment_id""",
+    ),
+    "filtered count": (
+        f"""SELECT count(*) FROM {SCHEMA}.string_facts
+            WHERE service_name = 'service-0007-api' AND environment = 'production'""",
+        f"""SELECT count(*) FROM {SCHEMA}.key_facts
+            WHERE service_id = (SELECT id FROM {SCHEMA}.services WHERE name = 'service-0007-api')
+              AND environment_id = (SELECT id FROM {SCHEMA}.environments WHERE name = 'production')""",
+    ),
+    "as-of lookup": (
+        f"""SELECT created_at FROM {SCHEMA}.string_facts
+            WHERE service_name = 'service-0007-api' AND environment = 'production'
+              AND created_at <= now()::timestamp - interval '30 days'
+            ORDER BY created_at DESC LIMIT 1""",
+        f"""SELECT created_at FROM {SCHEMA}.key_facts
+            WHERE service_id = 7 AND environment_id = 1
+              AND created_at <= now()::timestamp - interval '30 days'
+            ORDER BY created_at DESC LIMIT 1""",
+    ),
+}
+
+
+async def timed(conn, sql: str, repeat: int) -> float:
+    await conn.execute(text(sql))  # warm the buffer cache
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await conn.execute(text(sql))
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+async def main(rows: int, services: int, repeat: int) -> None:
+    engine = create_async_engine(settings.DATABASE_URL)
+    try:
+        async with engine.begin() as conn:
+            print(f"building {rows:,} rows over {services} services ...")
+            for statement in setup_statements(rows, services):
+                await conn.execute(text(statement))
+
+        async with engine.connect() as conn:
+            sizes = dict((await conn.execute(SIZES)).all())
+            print(f"\n{'relation':<22}{'strings MiB':>14}{'keys MiB':>12}")
+            for label, string_rel, key_rel in (
+                ("table", "string_facts", "key_facts"),
+                ("service index", "string_service", "key_service"),
+                ("environment index", "string_environment", "key_environment"),
+                ("as-of index", "string_as_of", "key_as_of"),
+            ):
+                print(f"{label:<22}{sizes[string_rel] / 2**20:>14.1f}{sizes[key_rel] / 2**20:>12.1f}")
+
+            print(f"\n{'query':<22}{'strings ms':>14}{'keys ms':>12}{'speedup':>10}")
+            for label, (string_sql, key_sql) in QUERIES.items():
+                strings = await timed(conn, string_sql, repeat)
+                keys = await timed(conn, key_sql, repeat)
+                print(f"{label:<22}{strings:>14.2f}{keys:>12.2f}{strings / keys:>9.2f}x")
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--services", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.services, args.repeat))
@@ -0,0 +1,100 @@
+"""Payload size and latency of list responses: full vs sparse, raw vs compressed.
+
+Offline mode builds synthetic incident rows and times serialization plus
+compression in-process. With ``--url`` it measures a running instance:
+
+    python -m benchmarks.bench_list_payloads
+    python -m benchmarks.bench_list_payloads --url http://localhost:8000 --limit 100
+"""
+
+import argparse
+import statistics
+import time
+import uuid
+from datetime import datetime
+from types import SimpleNamespace
+from typing import List
+
+from pydantic import TypeAdapter
+
+from app.core.compression import brotli, compress
+from app.core.fieldsets import sparse_response
+from app.schemas.schemas import IncidentResponse
+
+DASHBOARD_FIELDS = ("id", "service_name", "status", "created_at")
+
+
+def synthetic_incidents(n: int):
+    now = datetime.utcnow()
+    return [
+        SimpleNamespace(
+            id=uuid.uuid4(), title=f"High error rate on checkout #{i}",
+            description="Error rate above 5% for 10 minutes. " * 20,
+            severity="sev2", status="resolved", service_name=f"service-{i % 12}",
+            environment="production", triggered_at=now, acknowledged_at=now, resolved_at=now,
+            mttr_seconds=1830.0, root_cause="Connection pool exhaustion after deploy. " * 15,
+            on_call_engineer="oncall@example.com", deployment_id=None, created_at=now,
+        )
+        for i in range(n)
+    ]
+
+
+def timed(fn, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return result, statistics.median(samples)
+
+
+def offline(limit: int, repeat: int) -> None:
+    rows = synthetic_incidents(limit)
+    full = TypeAdapter(List[IncidentResponse])
+    encodings = ["gzip"] + (["br"] if brotli is not None else [])
+
+    cases = {
+        "full": lambda: full.dump_json(full.validate_python(rows, from_attributes=True)),
+        "sparse": lambda: sparse_response(rows, IncidentResponse, DASHBOARD_FIELDS).body,
+    }
+    print(f"{'case':<14}{'bytes':>10}{'ms (p50)':>12}")
+    for name, render in cases.items():
+        body, ms = timed(render, repeat)
+        print(f"{name:<14}{len(body):>10}{ms:>12.3f}")
+        for encoding in encodings:
+            compressed, cms = timed(lambda: compress(body, encoding), repeat)
+            print(f"{name + '+' + encoding:<14}{len(compressed):>10}{ms + cms:>12.3f}")
+
+
+def online(url: str, limit: int, repeat: int) -> None:
+    import httpx
+
+    variants = {
+        "full": {},
+        "sparse": {"fields": ",".join(DASHBOARD_FIELDS)},
+    }
+    print(f"{'case':<14}{'wire bytes':>12}{'ms (p50)':>12}")
+    with httpx.Client(base_url=url) as client:
+        for name, extra in variants.items():
+            for encoding in ("identity", "gzip", "br"):
+                def call():
+                    return client.get(
+                        "/api/v1/incidents",
+                        params={"limit": limit, **extra},
+                        headers={"Accept-Encoding": encoding},
+                    )
+                response, ms = timed(call, repeat)
+                wire = int(response.headers.get("content-length", len(response.content)))
+                print(f"{name + '+' + encoding:<14}{wire:>12}{ms:>12.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="Base URL of a running instance")
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    if args.url:
+        online(args.url, args.limit, args.repeat)
+    else:
+        offline(args.limit, args.repeat)
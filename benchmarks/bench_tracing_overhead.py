@@ -0,0 +1,79 @@
+"""Per-request overhead of tracing with tail sampling.
+
+Serves a trivial FastAPI route in-process and compares request latency
+with tracing off, and on with the production span pipeline (tail
+sampling in front of a batch processor) exporting to a no-op exporter:
+
+    python -m benchmarks.bench_tracing_overhead --requests 5000
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from fastapi import FastAPI
+from httpx import AsyncClient, ASGITransport
+from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+
+from app.core.tracing import build_provider
+
+
+class NullExporter(SpanExporter):
+    def __init__(self):
+        self.exported = 0
+
+    def export(self, spans):
+        self.exported += len(spans)
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self):
+        pass
+
+
+def make_app(provider=None) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/item")
+    async def item():
+        return {"id": 1, "status": "ok"}
+
+    if provider is not None:
+        FastAPIInstrumentor.instrument_app(app, tracer_provider=provider)
+    return app
+
+
+async def measure(app: FastAPI, requests: int):
+    samples = []
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(200):  # warm-up
+            await client.get("/item")
+        for _ in range(requests):
+            started = time.perf_counter()
+            await client.get("/item")
+            samples.append((time.perf_counter() - started) * 1e6)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.99) - 1]
+
+
+async def main(requests: int) -> None:
+    exporter = NullExporter()
+    provider = build_provider(exporter)
+    cases = {"off": make_app(), "tail-sampled": make_app(provider)}
+    print(f"{'tracing':<14}{'p50 us':>10}{'p99 us':>10}")
+    results = {}
+    for name, app in cases.items():
+        results[name] = await measure(app, requests)
+        print(f"{name:<14}{results[name][0]:>10.1f}{results[name][1]:>10.1f}")
+    provider.force_flush()
+    print(f"overhead p50: {results['tail-sampled'][0] - results['off'][0]:.1f} us/request, "
+          f"spans exported: {exporter.exported}")
+    provider.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    asyncio.run(main(parser.parse_args().requests))
@@ -0,0 +1,114 @@
+"""Initial schema (as previously created by Base.metadata.create_all)
+
+Existing databases created by create_all should be stamped with
+``alembic stamp 0001`` before running ``alembic upgrade head``.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+deployment_status = sa.Enum(
+    "PENDING", "IN_PROGRESS", "SUCCESS", "FAILED", "ROLLED_BACK", name="deploymentstatus"
+)
+incident_severity = sa.Enum("SEV1", "SEV2", "SEV3", "SEV4", name="incidentseverity")
+incident_status = sa.Enum(
+    "TRIGGERED", "ACKNOWLEDGED", "INVESTIGATING", "MITIGATED", "RESOLVED", name="incidentstatus"
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "deployments",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("service_name", sa.String(255), nullable=False),
+        sa.Column("environment", sa.String(50), nullable=False),
+        sa.Column("version", sa.String(100), nullable=False),
+        sa.Column("commit_sha", sa.String(40), nullable=False),
+        sa.Column("status", deployment_status, nullable=True),
+        sa.Column("deployed_by", sa.String(255), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("duration_seconds", sa.Float(), nullable=True),
+        sa.Column("rollback_of", postgresql.UUID(as_uuid=True), sa.ForeignKey("deployments.id"), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_deployments_service_name", "deployments", ["service_name"])
+    op.create_index("ix_deployments_environment", "deployments", ["environment"])
+    op.create_index("ix_deployments_status", "deployments", ["status"])
+    op.create_index("ix_deployments_created_at", "deployments", ["created_at"])
+
+    op.create_table(
+        "incidents",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("title", sa.String(500), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("severity", incident_severity, nullable=False),
+        sa.Column("status", incident_status, nullable=True),
+        sa.Column("service_name", sa.String(255), nullable=False),
+        sa.Column("environment", sa.String(50), nullable=False),
+        sa.Column("triggered_at", sa.DateTime(), nullable=True),
+        sa.Column("acknowledged_at", sa.DateTime(), nullable=True),
+        sa.Column("resolved_at", sa.DateTime(), nullable=True),
+        sa.Column("mttr_seconds", sa.Float(), nullable=True),
+        sa.Column("root_cause", sa.Text(), nullable=True),
+        sa.Column("action_items", sa.Text(), nullable=True),
+        sa.Column("deployment_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("deployments.id"), nullable=True),
+        sa.Column("on_call_engineer", sa.String(255), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_incidents_severity", "incidents", ["severity"])
+    op.create_index("ix_incidents_status", "incidents", ["status"])
+    op.create_index("ix_incidents_service_name", "incidents", ["service_name"])
+    op.create_index("ix_incidents_triggered_at", "incidents", ["triggered_at"])
+
+    op.create_table(
+        "incident_timeline",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("incident_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("incidents.id"), nullable=False),
+        sa.Column("event_type", sa.String(100), nullable=False),
+        sa.Column("description", sa.Text(), nullable=False),
+        sa.Column("author", sa.String(255), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+    )
+
+    op.create_table(
+        "slos",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("service_name", sa.String(255), nullable=False),
+        sa.Column("name", sa.String(255), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("sli_type", sa.String(50), nullable=False),
+        sa.Column("target_percentage", sa.Float(), nullable=False),
+        sa.Column("window_days", sa.Integer(), nullable=True),
+        sa.Column("current_percentage", sa.Float(), nullable=True),
+        sa.Column("error_budget_remaining", sa.Float(), nullable=True),
+        sa.Column("is_breached", sa.Boolean(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_slos_service_name", "slos", ["service_name"])
+
+
+def downgrade() -> None:
+    op.drop_table("slos")
+    op.drop_table("incident_timeline")
+    op.drop_table("incidents")
+    op.drop_table("deployments")
+    incident_status.drop(op.get_bind(), checkfirst=True)
+    incident_severity.drop(op.get_bind(), checkfirst=True)
+    deployment_status.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,40 @@
+"""Alert fingerprint on incidents and deployment as-of index
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("incidents", sa.Column("fingerprint", sa.String(64), nullable=True))
+    op.create_index(
+        "uq_incidents_open_fingerprint",
+        "incidents",
+        ["fingerprint"],
+        unique=True,
+        postgresql_where=sa.text("fingerprint IS NOT NULL AND status != 'RESOLVED'"),
+    )
+    op.create_index(
+        "ix_deployments_service_env_created",
+        "deployments",
+        ["service_name", "environment", "created_at"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_deployments_service_env_created", table_name="deployments")
+    op.drop_index("uq_incidents_open_fingerprint", table_name="incidents")
+    op.drop_column("incidents", "fingerprint")
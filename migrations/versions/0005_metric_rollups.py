@@ -0,0 +1,43 @@
+"""Metric rollups for the Prometheus-compatible query API
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "metric_rollups",
+        sa.Column("metric", sa.String(64), primary_key=True),
+        sa.Column("service_name", sa.String(255), primary_key=True),
+        sa.Column("environment", sa.String(50), primary_key=True),
+        sa.Column("dimension", sa.String(255), primary_key=True),
+        sa.Column("bucket", sa.DateTime(), primary_key=True),
+        sa.Column("value_sum", sa.Float(), nullable=False),
+        sa.Column("value_count", sa.Integer(), nullable=False),
+        sa.Column("computed_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_metric_rollups_metric_bucket", "metric_rollups", ["metric", "bucket"])
+    # Rollup refreshes find rows changed since the last run
+    op.create_index("ix_deployments_updated_at", "deployments", ["updated_at"])
+    op.create_index("ix_incidents_updated_at", "incidents", ["updated_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_incidents_updated_at", table_name="incidents")
+    op.drop_index("ix_deployments_updated_at", table_name="deployments")
+    op.drop_index("ix_metric_rollups_metric_bucket", table_name="metric_rollups")
+    op.drop_table("metric_rollups")
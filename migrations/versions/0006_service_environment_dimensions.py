@@ -0,0 +1,167 @@
+"""Service and environment dimension tables with integer keys (expand)
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 00:00:00
+
+This is the expand half of an expand/contract change, so it can run while
+pods of the previous release still serve. Those pods keep reading and
+writing the ``service_name`` / ``environment`` strings, the new ones the
+keys, and a trigger on each fact table fills in whichever side a writer
+left out. Keys are backfilled in batches that commit one at a time, and
+the key indexes are built concurrently, so no fact table is locked for the
+length of a rewrite.
+
+The contract revision (drop the triggers, the string columns and their
+indexes; make the keys NOT NULL) ships in a later release, once no pod of
+the previous release is left.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 5000
+
+# (table, has environment column, new key indexes)
+FACT_TABLES = [
+    (
+        "deployments", True,
+        {
+            "ix_deployments_service_id": ["service_id"],
+            "ix_deployments_environment_id": ["environment_id"],
+            "ix_deployments_service_env_created": ["service_id", "environment_id", "created_at"],
+        },
+    ),
+    ("incidents", True, {"ix_incidents_service_id": ["service_id"]}),
+    ("slos", False, {"ix_slos_service_id": ["service_id"]}),
+]
+
+# The as-of index keeps its name for the key columns; the string version
+# stays until the contract revision under this name
+OLD_AS_OF_INDEX = "ix_deployments_service_name_env_created"
+
+# (key column, name column, dimension table)
+DIMENSIONS = {
+    "service": ("service_id", "service_name", "services"),
+    "environment": ("environment_id", "environment", "environments"),
+}
+
+SYNC_FUNCTION = """
+CREATE FUNCTION sync_{dimension}_key() RETURNS trigger AS $$
+BEGIN
+    -- A writer that only knows names renamed the row: key it again
+    IF TG_OP = 'UPDATE' AND NEW.{name} IS DISTINCT FROM OLD.{name}
+            AND NEW.{key} IS NOT DISTINCT FROM OLD.{key} THEN
+        NEW.{key} := NULL;
+    END IF;
+    IF NEW.{key} IS NULL THEN
+        INSERT INTO {table} (name) VALUES (NEW.{name}) ON CONFLICT (name) DO NOTHING;
+        SELECT id INTO NEW.{key} FROM {table} WHERE name = NEW.{name};
+    ELSIF NEW.{name} IS NULL OR TG_OP = 'UPDATE' AND NEW.{key} IS DISTINCT FROM OLD.{key} THEN
+        SELECT name INTO NEW.{name} FROM {table} WHERE id = NEW.{key};
+    END IF;
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql
+"""
+
+
+def _dimensions(has_environment: bool):
+    return ["service", "environment"] if has_environment else ["service"]
+
+
+def _backfill(table: str, key: str, name: str, dimension_table: str) -> None:
+    """Key ``table`` in primary-key order, one committed batch at a time."""
+    bind = op.get_bind()
+    after = None
+    while True:
+        page, params = f"SELECT id FROM {table}", {"limit": BACKFILL_BATCH_SIZE}
+        if after is not None:
+            page, params["after"] = f"{page} WHERE id > :after", after
+        ids = bind.execute(sa.text(f"{page} ORDER BY id LIMIT :limit"), params).scalars().all()
+        if not ids:
+            return
+        bind.execute(
+            sa.text(
+                f"UPDATE {table} SET {key} = d.id FROM {dimension_table} d"
+                f" WHERE d.name = {table}.{name} AND {table}.{key} IS NULL"
+                f" AND {table}.id >= :first AND {table}.id <= :last"
+            ),
+            {"first": ids[0], "last": ids[-1]},
+        )
+        after = ids[-1]
+
+
+def upgrade() -> None:
+    op.create_table(
+        "services",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("name", sa.String(255), nullable=False, unique=True),
+    )
+    op.create_table(
+        "environments",
+        sa.Column("id", sa.SmallInteger(), primary_key=True, autoincrement=True),
+        sa.Column("name", sa.String(50), nullable=False, unique=True),
+    )
+    op.execute(
+        "INSERT INTO services (name) SELECT service_name FROM deployments"
+        " UNION SELECT service_name FROM incidents"
+        " UNION SELECT service_name FROM slos ORDER BY 1"
+    )
+    op.execute(
+        "INSERT INTO environments (name) SELECT environment FROM deployments"
+        " UNION SELECT environment FROM incidents ORDER BY 1"
+    )
+    for dimension, (key, name, table) in DIMENSIONS.items():
+        op.execute(SYNC_FUNCTION.format(dimension=dimension, key=key, name=name, table=table))
+
+    # Nullable columns without defaults and NOT VALID foreign keys only
+    # touch the catalog; rows written from here on are keyed by the trigger
+    op.execute(f"ALTER INDEX ix_deployments_service_env_created RENAME TO {OLD_AS_OF_INDEX}")
+    for table, has_environment, _ in FACT_TABLES:
+        for dimension in _dimensions(has_environment):
+            key, _, dimension_table = DIMENSIONS[dimension]
+            key_type = sa.Integer() if dimension == "service" else sa.SmallInteger()
+            op.add_column(table, sa.Column(key, key_type, nullable=True))
+            op.execute(
+                f"ALTER TABLE {table} ADD CONSTRAINT {table}_{key}_fkey"
+                f" FOREIGN KEY ({key}) REFERENCES {dimension_table} (id) NOT VALID"
+            )
+            op.execute(
+                f"CREATE TRIGGER {table}_sync_{dimension}_key BEFORE INSERT OR UPDATE ON {table}"
+                f" FOR EACH ROW EXECUTE FUNCTION sync_{dimension}_key()"
+            )
+
+    with op.get_context().autocommit_block():
+        for table, has_environment, new_indexes in FACT_TABLES:
+            for dimension in _dimensions(has_environment):
+                key, name, dimension_table = DIMENSIONS[dimension]
+                _backfill(table, key, name, dimension_table)
+                op.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT {table}_{key}_fkey")
+            for index, columns in new_indexes.items():
+                op.create_index(index, table, columns, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    for table, has_environment, new_indexes in FACT_TABLES:
+        for index in new_indexes:
+            op.drop_index(index, table_name=table)
+        for dimension in _dimensions(has_environment):
+            key, _, _ = DIMENSIONS[dimension]
+            op.execute(f"DROP TRIGGER {table}_sync_{dimension}_key ON {table}")
+            op.drop_constraint(f"{table}_{key}_fkey", table, type_="foreignkey")
+            op.drop_column(table, key)
+    op.execute(f"ALTER INDEX {OLD_AS_OF_INDEX} RENAME TO ix_deployments_service_env_created")
+
+    for dimension in DIMENSIONS:
+        op.execute(f"DROP FUNCTION sync_{dimension}_key()")
+    op.drop_table("environments")
+    op.drop_table("services")
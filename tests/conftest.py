@@ -0,0 +1,72 @@
+"""Shared test fixtures."""
+
+from contextlib import asynccontextmanager
+
+import pytest
+
+
+class FakeResult:
+    """Result of a FakeSession statement.
+
+    Rows stand in for both rows and scalars, so ``scalars()`` is the result
+    itself.
+    """
+
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+
+    def all(self):
+        return self.rows
+
+    def first(self):
+        return self.rows[0] if self.rows else None
+
+    def one(self):
+        return self.rows[0]
+
+    def scalars(self):
+        return self
+
+
+class FakeSession:
+    """AsyncSession stand-in that records what it executes.
+
+    Every statement returns ``rows``, unless ``respond(statement, params)``
+    is given and decides the rows per statement. The session is its own
+    async context manager, so ``lambda: session`` serves as a session
+    factory.
+    """
+
+    def __init__(self, rows=(), respond=None):
+        self.rows = rows
+        self.respond = respond
+        self.statements = []
+        self.params = []
+        self.commits = 0
+        self.transactions = 0
+
+    async def execute(self, statement, params=None):
+        self.statements.append(statement)
+        self.params.append(params)
+        rows = self.respond(statement, params) if self.respond is not None else self.rows
+        return FakeResult(rows)
+
+    async def commit(self):
+        self.commits += 1
+
+    @asynccontextmanager
+    async def begin(self):
+        self.transactions += 1
+        yield self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+@pytest.fixture
+def fake_session():
+    """Factory for FakeSession: ``fake_session(rows=..., respond=...)``."""
+    return FakeSession
@@ -0,0 +1,84 @@
+"""Tests for admission control and load shedding."""
+
+import asyncio
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from app.core.admission import (
+    AGGREGATE, READ, WRITE,
+    AdmissionControlMiddleware, AdmissionRejected, ConcurrencyLimiter, classify,
+)
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def test_classify_route_classes():
+    assert classify("GET", "/api/v1/metrics/dora") == AGGREGATE
+    assert classify("GET", "/api/v1/deployments/stats/summary") == AGGREGATE
+    assert classify("POST", "/api/v1/deployments") == WRITE
+    assert classify("PATCH", "/api/v1/incidents/abc") == WRITE
+    assert classify("GET", "/api/v1/incidents") == READ
+
+
+@pytest.mark.anyio
+async def test_limiter_sheds_when_queue_full():
+    limiter = ConcurrencyLimiter("test", limit=1, max_queue=0, timeout=1.0)
+    await limiter.acquire()
+    with pytest.raises(AdmissionRejected) as exc:
+        await limiter.acquire()
+    assert exc.value.reason == "queue_full"
+    limiter.release()
+    await limiter.acquire()
+    limiter.release()
+
+
+@pytest.mark.anyio
+async def test_limiter_sheds_after_deadline():
+    limiter = ConcurrencyLimiter("test", limit=1, max_queue=1, timeout=0.01)
+    await limiter.acquire()
+    with pytest.raises(AdmissionRejected) as exc:
+        await limiter.acquire()
+    assert exc.value.reason == "timeout"
+    assert limiter.queue_depth == 0
+
+
+@pytest.mark.anyio
+async def test_limiter_admits_queued_request():
+    limiter = ConcurrencyLimiter("test", limit=1, max_queue=1, timeout=1.0)
+    await limiter.acquire()
+    waiter = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+    assert limiter.queue_depth == 1
+    limiter.release()
+    await waiter
+    assert limiter.in_flight == 1
+    limiter.release()
+
+
+@pytest.mark.anyio
+async def test_middleware_returns_503_with_retry_after():
+    async def endpoint(request):
+        return PlainTextResponse("ok")
+
+    limiters = {
+        name: ConcurrencyLimiter(name, limit=0, max_queue=0, timeout=0.01)
+        for name in (WRITE, READ, AGGREGATE)
+    }
+    paths = ("/api/v1/incidents", "/healthz", "/readyz")
+    app = Starlette(routes=[Route(path, endpoint) for path in paths])
+    app.add_middleware(AdmissionControlMiddleware, limiters=limiters)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        response = await ac.get("/api/v1/incidents")
+        probes = [(await ac.get(path)).status_code for path in ("/healthz", "/readyz")]
+    assert response.status_code == 503
+    assert "Retry-After" in response.headers
+    assert probes == [200, 200]
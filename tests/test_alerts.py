@@ -0,0 +1,122 @@
+"""Tests for Alertmanager fingerprint deduplication."""
+
+import uuid
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects.postgresql.asyncpg import dialect
+
+from app.core.config import settings
+from app.models.models import Environment, IncidentSeverity, IncidentStatus, Service
+from app.schemas.schemas import AlertmanagerAlert
+from app.services import alert_dedup
+from app.services.alert_dedup import (
+    FingerprintIndex, coalesce_timeline, fingerprint, process_alerts, severity_for,
+)
+from app.services.dimensions import InternCache
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def test_fingerprint_ignores_label_order():
+    a = fingerprint({"alertname": "HighErrorRate", "service": "payments"})
+    b = fingerprint({"service": "payments", "alertname": "HighErrorRate"})
+    assert a == b
+    assert a != fingerprint({"alertname": "HighErrorRate", "service": "checkout"})
+
+
+def test_fingerprint_separates_keys_and_values():
+    assert fingerprint({"ab": "c"}) != fingerprint({"a": "bc"})
+
+
+def test_severity_mapping():
+    assert severity_for({"severity": "critical"}) == IncidentSeverity.SEV1
+    assert severity_for({"severity": "sev2"}) == IncidentSeverity.SEV2
+    assert severity_for({"severity": "warning"}) == IncidentSeverity.SEV3
+    assert severity_for({}) == IncidentSeverity.SEV4
+
+
+def test_fingerprint_index_lru_and_ttl():
+    index = FingerprintIndex(max_size=2, ttl=60)
+    ids = [uuid.uuid4() for _ in range(3)]
+    index.put("a", ids[0])
+    index.put("b", ids[1])
+    assert index.get("a") == ids[0]
+    index.put("c", ids[2])  # evicts "b", the least recently used
+    assert index.get("b") is None
+    assert index.get("a") == ids[0]
+
+    expired = FingerprintIndex(max_size=2, ttl=-1)
+    expired.put("a", ids[0])
+    assert expired.get("a") is None
+
+
+def test_coalesce_timeline_counts_repeats():
+    incident_id = uuid.uuid4()
+    rows = coalesce_timeline(
+        [(incident_id, "alert_refired", "HighErrorRate fired again")] * 3
+        + [(incident_id, "alert_resolved", "HighErrorRate resolved")]
+    )
+    descriptions = sorted(row["description"] for row in rows)
+    assert descriptions == ["HighErrorRate fired again (x3)", "HighErrorRate resolved"]
+
+
+def _table(statement):
+    table = getattr(statement, "table", None)
+    return table.name if table is not None else None
+
+
+@pytest.mark.anyio
+async def test_new_incidents_are_correlated_and_notify_in_the_insert_transaction(
+    monkeypatch, fake_session
+):
+    monkeypatch.setattr(settings, "NOTIFY_WEBHOOKS", {"paging": "http://paging.test/hook"})
+    monkeypatch.setattr(settings, "INCIDENT_CORRELATION_ENABLED", True)
+    interned = InternCache()
+    interned.remember(Service, "payments", 7)
+    interned.remember(Environment, "production", 1)
+    monkeypatch.setattr(alert_dedup, "interned", interned)
+    monkeypatch.setattr(alert_dedup, "fingerprint_index", FingerprintIndex(max_size=10, ttl=60))
+    started = datetime(2026, 10, 19, 12, 0)
+    alerts = [
+        AlertmanagerAlert(
+            status="firing", startsAt=started,
+            labels={"alertname": name, "service": "payments", "environment": "production",
+                    "severity": severity},
+        )
+        for name, severity in (("HighErrorRate", "critical"), ("SlowRequests", "warning"))
+    ]
+
+    def respond(statement, params):
+        if _table(statement) == "incidents":
+            return [
+                SimpleNamespace(_mapping={
+                    "fingerprint": fingerprint(alert.labels), "id": uuid.uuid4(),
+                    "title": alert.labels["alertname"], "service_id": 7, "environment_id": 1,
+                    "status": IncidentStatus.TRIGGERED, "severity": severity_for(alert.labels),
+                    "on_call_engineer": None, "triggered_at": started,
+                })
+                for alert in alerts
+            ]
+        return []
+
+    session = fake_session(respond=respond)
+    result = await process_alerts(session, alerts)
+
+    assert result["incidents_created"] == 2
+    insert_sql = next(
+        str(statement.compile(dialect=dialect())) for statement in session.statements
+        if _table(statement) == "incidents"
+    )
+    assert insert_sql.count("(SELECT deployments.id") == 2
+    outbox = [
+        statement.compile(dialect=dialect()).params for statement in session.statements
+        if _table(statement) == "notification_outbox"
+    ]
+    assert len(outbox) == 1  # only the SEV1 notifies
+    assert outbox[0]["payload_m0"]["incident"]["title"] == "HighErrorRate"
+    assert session.commits == 1
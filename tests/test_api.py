@@ -82,6 +82,7 @@ async def test_dora_metrics(client):
     data = response.json()
     assert "deployment_frequency" in data
     assert "change_failure_rate" in data
+    assert "incident_change_failure_rate" in data
     assert "mttr_hours" in data
     assert "rating" in data
 
@@ -0,0 +1,119 @@
+"""Tests for the cold archive of old deployments and incidents."""
+
+import subprocess
+import sys
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from app.models.models import (  # noqa: E402
+    Deployment, DeploymentStatus, Incident, IncidentSeverity, IncidentStatus,
+)
+from app.services.archive import ArchiveStore, recover_staged  # noqa: E402
+
+NOW = datetime(2024, 6, 1)
+
+
+def _deployment(days_ago, status=DeploymentStatus.SUCCESS, environment="production", duration=60.0):
+    created = NOW - timedelta(days=days_ago)
+    return {
+        "id": uuid.uuid4(), "service_name": "api", "environment": environment,
+        "version": "v1", "commit_sha": "abc1234", "status": status, "deployed_by": "ci",
+        "description": None, "duration_seconds": duration, "created_at": created, "updated_at": created,
+    }
+
+
+def _incident(days_ago, deployment_id=None, mttr=600.0, environment="production"):
+    triggered = NOW - timedelta(days=days_ago)
+    return {
+        "id": uuid.uuid4(), "title": "down", "description": None, "severity": IncidentSeverity.SEV2,
+        "status": IncidentStatus.RESOLVED, "service_name": "api", "environment": environment,
+        "triggered_at": triggered, "acknowledged_at": None, "resolved_at": triggered,
+        "mttr_seconds": mttr, "root_cause": None, "action_items": None,
+        "deployment_id": deployment_id, "on_call_engineer": None, "fingerprint": None,
+        "created_at": triggered, "updated_at": triggered,
+    }
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ArchiveStore(str(tmp_path))
+    bad = _deployment(200, status=DeploymentStatus.FAILED, duration=None)
+    deployments = [
+        _deployment(300),
+        _deployment(250, status=DeploymentStatus.ROLLED_BACK, duration=120.0),
+        bad,
+        _deployment(210, environment="staging"),
+    ]
+    incidents = [_incident(199, deployment_id=bad["id"]), _incident(320, mttr=1200.0)]
+    store.publish([store.stage(Deployment, deployments), store.stage(Incident, incidents)])
+    return store
+
+
+def test_staged_files_are_invisible_until_published(tmp_path):
+    store = ArchiveStore(str(tmp_path))
+    staged = store.stage(Deployment, [_deployment(300)])
+    assert store.files("deployments") == []
+    store.discard([staged])
+    assert store.files("deployments") == []
+
+
+def _live_ids(live_ids):
+    """``respond`` answering id lookups from ``live_ids``."""
+    def respond(statement, params):
+        wanted = next(v for v in statement.compile().params.values() if isinstance(v, list))
+        return [(i,) for i in wanted if i in live_ids]
+    return respond
+
+
+@pytest.mark.anyio
+async def test_files_staged_before_a_crash_are_settled_on_the_next_run(tmp_path, fake_session):
+    store = ArchiveStore(str(tmp_path))
+    committed, rolled_back = _deployment(300), _deployment(310)
+    store.stage(Deployment, [committed])  # delete committed, then the process died
+    store.stage(Deployment, [rolled_back])  # died before the delete committed
+    (tmp_path / "deployments" / "torn_write.arrow.tmp").write_bytes(b"not arrow")
+
+    session = fake_session(respond=_live_ids({rolled_back["id"]}))
+    published = await recover_staged(store, session_factory=lambda: session)
+    assert published == 1
+    assert store.leftovers() == []
+    [path] = store.files("deployments")
+    assert committed["created_at"].strftime("%Y%m%d") in path
+
+
+def test_file_names_prune_windows(store):
+    assert len(store.files("deployments")) == 1
+    assert store.files("deployments", NOW - timedelta(days=100)) == []
+
+
+def test_window_aggregates_merge_counts_durations_and_mttr(store):
+    aggregates = store.aggregates(NOW - timedelta(days=260), "production")
+    assert aggregates.total == 2
+    assert aggregates.failed == 1 and aggregates.rolled_back == 1
+    assert aggregates.duration_count == 1 and aggregates.duration_sum == 120.0
+    assert aggregates.mttr_count == 1 and aggregates.mttr_sum == 600.0
+    assert aggregates.caused_deployments == 1
+
+
+def test_whole_file_aggregates_match_partial_scan(store):
+    everything = store.aggregates(NOW - timedelta(days=400))
+    assert everything.total == 4
+    assert everything.success == 2
+    assert everything.mttr_count == 2
+    assert store.aggregates(NOW - timedelta(days=400)).total == 4  # cached path
+
+
+def test_app_import_does_not_load_pyarrow():
+    code = "import sys, app.main; sys.exit('pyarrow' in sys.modules)"
+    root = Path(__file__).resolve().parent.parent
+    assert subprocess.run([sys.executable, "-c", code], cwd=root).returncode == 0
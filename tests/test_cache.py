@@ -0,0 +1,82 @@
+"""Tests for the per-worker hot object cache."""
+
+import json
+import time
+import uuid
+from datetime import datetime
+from types import SimpleNamespace
+
+from app.core.cache import (
+    DEPLOYMENT, INCIDENT, DeploymentRecord, ObjectCache, invalidate_from_event, object_cache,
+)
+from app.models.models import DeploymentStatus
+from app.schemas.schemas import DeploymentResponse
+from app.services.events import EventBroker, make_event
+
+
+def _deployment(**overrides):
+    now = datetime.utcnow()
+    row = SimpleNamespace(
+        id=uuid.uuid4(), service_name="api-gateway", environment="production",
+        version="v1.0.0", commit_sha="abc1234", status=DeploymentStatus.SUCCESS,
+        deployed_by="ci", description=None, duration_seconds=12.5,
+        created_at=now, updated_at=now, action_items="not cached",
+    )
+    for key, value in overrides.items():
+        setattr(row, key, value)
+    return row
+
+
+def test_record_serializes_like_orm_row():
+    row = _deployment()
+    record = DeploymentRecord.from_row(row)
+    assert not hasattr(record, "__dict__")
+    assert DeploymentResponse.model_validate(record) == DeploymentResponse.model_validate(row)
+
+
+def test_lru_eviction_and_memory_accounting():
+    cache = ObjectCache(max_entries=2, ttl=60)
+    rows = [_deployment() for _ in range(3)]
+    for row in rows:
+        cache.put(DEPLOYMENT, row.id, DeploymentRecord.from_row(row), cache.token())
+    assert len(cache) == 2
+    assert cache.get(DEPLOYMENT, rows[0].id) is None
+    assert cache.get(DEPLOYMENT, rows[2].id) is not None
+    assert cache.bytes > 0
+
+    cache.clear()
+    assert cache.bytes == 0
+
+
+def test_stale_read_is_not_cached_after_invalidation():
+    cache = ObjectCache(max_entries=10, ttl=60)
+    row = _deployment()
+    token = cache.token()
+    cache.invalidate(DEPLOYMENT, row.id)  # write lands while the read is in flight
+    cache.put(DEPLOYMENT, row.id, DeploymentRecord.from_row(row), token)
+    assert cache.get(DEPLOYMENT, row.id) is None
+
+    cache.put(DEPLOYMENT, row.id, DeploymentRecord.from_row(row), cache.token())
+    assert cache.get(DEPLOYMENT, row.id) is not None
+
+
+def test_ttl_expires_entries():
+    cache = ObjectCache(max_entries=10, ttl=0)
+    row = _deployment()
+    cache.put(DEPLOYMENT, row.id, DeploymentRecord.from_row(row), cache.token())
+    time.sleep(0.001)
+    assert cache.get(DEPLOYMENT, row.id) is None
+
+
+def test_notify_event_invalidates_across_workers():
+    row = _deployment()
+    object_cache.put(DEPLOYMENT, row.id, DeploymentRecord.from_row(row), object_cache.token())
+    broker = EventBroker("test")
+    broker.add_listener(invalidate_from_event)
+    broker._on_notify(None, 0, "test", json.dumps(make_event("deployment.updated", row)))
+    assert object_cache.get(DEPLOYMENT, row.id) is None
+
+
+def test_unrelated_events_are_ignored():
+    invalidate_from_event({"type": "unknown", "id": str(uuid.uuid4())})
+    invalidate_from_event({"type": INCIDENT + ".updated"})
@@ -0,0 +1,63 @@
+"""Tests for incident-to-deployment correlation queries."""
+
+import uuid
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects.postgresql.asyncpg import dialect
+
+from app.core.config import settings
+from app.models.models import Deployment, Incident, IncidentSeverity, IncidentStatus
+from app.services.correlation import as_of_deployment, backfill, backfill_statement
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def _sql(stmt) -> str:
+    return str(stmt.compile(dialect=dialect())).replace("\n", " ")
+
+
+def test_as_of_lookup_is_a_single_index_probe():
+    sql = _sql(as_of_deployment(3, 1, datetime.utcnow()))
+    assert "ORDER BY deployments.created_at DESC" in sql
+    assert "LIMIT" in sql
+
+
+def test_as_of_lookup_correlates_to_incident_columns():
+    sql = _sql(
+        as_of_deployment(Incident.service_id, Incident.environment_id, Incident.triggered_at)
+    )
+    assert "deployments.service_id = incidents.service_id" in sql
+    assert "deployments.created_at <= incidents.triggered_at" in sql
+
+
+def test_deployments_have_as_of_index():
+    indexes = {index.name: [c.name for c in index.columns] for index in Deployment.__table__.indexes}
+    assert indexes["ix_deployments_service_env_created"] == [
+        "service_id", "environment_id", "created_at",
+    ]
+
+
+def test_backfill_returns_what_the_change_events_need():
+    sql = _sql(backfill_statement(datetime(2026, 1, 1), datetime(2026, 1, 2)))
+    assert "SET deployment_id=anon_1.deployment_id, updated_at=" in sql
+    assert "RETURNING incidents.id, (SELECT services.name" in sql
+
+
+@pytest.mark.anyio
+async def test_backfill_publishes_an_update_per_correlated_incident(monkeypatch, fake_session):
+    monkeypatch.setattr(settings, "EVENT_STREAM_ENABLED", True)
+    deployment_id = uuid.uuid4()
+    row = SimpleNamespace(
+        id=uuid.uuid4(), service_name="api", environment="production",
+        status=IncidentStatus.TRIGGERED, severity=IncidentSeverity.SEV2, deployment_id=deployment_id,
+    )
+    session = fake_session(respond=lambda statement, params: [] if params else [row])
+    assert await backfill(session, datetime(2026, 1, 1)) == 1
+    [payload] = session.params[1]["payloads"]
+    assert '"type":"incident.updated"' in payload
+    assert f'"deployment_id":"{deployment_id}"' in payload
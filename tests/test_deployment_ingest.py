@@ -0,0 +1,115 @@
+"""Tests for micro-batched deployment ingestion."""
+
+import asyncio
+import uuid
+from datetime import datetime
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy.dialects.postgresql.asyncpg import dialect
+
+from app.main import app
+from app.models.models import DeploymentStatus
+from app.schemas.schemas import DeploymentCreate
+from app.services.batching import BackpressureError, MicroBatcher
+from app.services.deployment_ingest import coalesce, create_event, insert_creates, update_event
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def _deployment():
+    return DeploymentCreate(
+        service_name="test-service",
+        environment="staging",
+        version="v1.0.0",
+        commit_sha="abc123def456",
+        deployed_by="pytest",
+    )
+
+
+def test_coalesce_folds_updates_into_creates():
+    now = datetime.utcnow()
+    new_id, existing_id = uuid.uuid4(), uuid.uuid4()
+    creates, updates = coalesce([
+        create_event(new_id, _deployment(), now),
+        update_event(new_id, DeploymentStatus.IN_PROGRESS, None, now),
+        update_event(new_id, DeploymentStatus.SUCCESS, 42.0, now),
+        update_event(existing_id, DeploymentStatus.IN_PROGRESS, 10.0, now),
+        update_event(existing_id, DeploymentStatus.FAILED, None, now),
+    ])
+
+    assert len(creates) == 1
+    assert creates[0]["status"] == DeploymentStatus.SUCCESS
+    assert creates[0]["duration_seconds"] == 42.0
+    assert updates == [{
+        "id": existing_id,
+        "status": DeploymentStatus.FAILED,
+        "duration_seconds": 10.0,
+        "updated_at": now,
+    }]
+
+
+def test_coalesce_keeps_zero_durations():
+    now = datetime.utcnow()
+    existing_id = uuid.uuid4()
+    _, updates = coalesce([
+        update_event(existing_id, DeploymentStatus.IN_PROGRESS, 10.0, now),
+        update_event(existing_id, DeploymentStatus.SUCCESS, 0.0, now),
+    ])
+    assert updates[0]["duration_seconds"] == 0.0
+
+
+def test_retried_creations_do_not_fail_the_batch():
+    row = {"id": uuid.uuid4(), "service_id": 1, "environment_id": 1, "version": "v1"}
+    sql = str(insert_creates([row]).compile(dialect=dialect()))
+    assert "ON CONFLICT (id) DO NOTHING" in sql
+
+
+@pytest.mark.anyio
+async def test_batcher_coalesces_and_flushes_on_stop():
+    flushed = []
+
+    async def flush(batch):
+        flushed.append(batch)
+
+    batcher = MicroBatcher("test", flush, max_queue=100, flush_interval=0.01)
+    batcher.start()
+    for i in range(10):
+        await batcher.submit(i)
+    await batcher.stop(timeout=1.0)
+
+    assert [item for batch in flushed for item in batch] == list(range(10))
+    assert len(flushed) < 10
+
+
+@pytest.mark.anyio
+async def test_batcher_applies_backpressure():
+    release = asyncio.Event()
+
+    async def flush(batch):
+        await release.wait()
+
+    batcher = MicroBatcher("test", flush, max_queue=2, flush_interval=0, enqueue_timeout=0.01)
+    batcher.start()
+    await batcher.submit(0)
+    await asyncio.sleep(0.01)  # writer picks up item 0 and blocks in flush
+    await batcher.submit(1)
+    await batcher.submit(2)
+    with pytest.raises(BackpressureError):
+        await batcher.submit(3)
+    release.set()
+    await batcher.stop(timeout=1.0)
+
+
+@pytest.mark.anyio
+async def test_webhook_disabled_by_default():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        response = await ac.post(
+            "/api/v1/deployments/webhook",
+            json={"event": "created", "deployment": _deployment().model_dump()},
+        )
+    assert response.status_code == 404
@@ -0,0 +1,82 @@
+"""Tests for interned service / environment keys."""
+
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql.asyncpg import dialect
+from sqlalchemy.sql.dml import Insert
+
+from app.models.models import Deployment, Environment, Service
+from app.services.dimensions import InternCache
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def _sql(stmt) -> str:
+    return " ".join(str(stmt.compile(dialect=dialect())).split())
+
+
+def _dimension_table(**rows):
+    """``respond`` for a dimension table keyed by name, and the names it inserted."""
+    inserted = []
+
+    def respond(statement, params):
+        if isinstance(statement, Insert):
+            for name in statement.compile().params.values():
+                inserted.append(name)
+                rows.setdefault(name, len(rows) + 1)
+            return []
+        wanted = statement.compile().params["name_1"]
+        return [(name, key) for name, key in rows.items() if name in wanted]
+
+    return respond, inserted
+
+
+@pytest.mark.anyio
+async def test_resolve_creates_unseen_names_once_and_then_serves_from_memory(fake_session):
+    respond, inserted = _dimension_table(api=1)
+    database = fake_session(respond=respond)
+    cache = InternCache(session_factory=lambda: database)
+
+    keys = await cache.resolve_many(Service, ["api", "checkout", "api"])
+    assert keys == {"api": 1, "checkout": 2}
+    assert inserted == ["checkout"]
+
+    assert await cache.resolve(Service, "checkout") == 2
+    assert database.transactions == 1
+    assert cache.name(Service, 2) == "checkout"
+
+
+@pytest.mark.anyio
+async def test_intern_rows_and_with_names_round_trip(fake_session):
+    respond, _ = _dimension_table(api=1, production=1)
+    cache = InternCache(session_factory=lambda: fake_session(respond=respond))
+
+    [row] = await cache.intern_rows([{"id": "x", "service_name": "api", "environment": "production"}])
+    assert row == {"id": "x", "service_id": 1, "environment_id": 1}
+
+    returned = SimpleNamespace(_mapping={"id": "x", "service_id": 1, "environment_id": 1})
+    named = cache.with_names(returned)
+    assert (named.service_name, named.environment) == ("api", "production")
+
+
+def test_filters_bind_cached_keys_or_look_names_up_once():
+    cache = InternCache(session_factory=None)
+    cache.remember(Environment, "production", 1)
+
+    assert cache.key(Environment, "production") == 1
+    sql = _sql(select(Deployment.id).where(Deployment.service_id == cache.key(Service, "api")))
+    assert "deployments.service_id = (SELECT services.id FROM services WHERE services.name =" in sql
+
+
+def test_fact_tables_store_keys_and_read_names_back():
+    columns = {c.name for c in Deployment.__table__.columns}
+    assert {"service_id", "environment_id"} <= columns
+    assert not {"service_name", "environment"} & columns
+
+    sql = _sql(select(Deployment))
+    assert "(SELECT services.name FROM services WHERE services.id = deployments.service_id)" in sql
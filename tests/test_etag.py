@@ -0,0 +1,71 @@
+"""Tests for conditional GET support."""
+
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+from starlette.requests import Request
+
+from app.core.cache import DEPLOYMENT, DeploymentRecord, object_cache
+from app.core.etag import collection_etag, entity_etag, etag_matches
+from app.main import app
+from app.models.models import DeploymentStatus
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def _request(if_none_match=None):
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "headers": headers})
+
+
+def test_entity_etag_changes_with_updated_at():
+    key, now = uuid.uuid4(), datetime.utcnow()
+    assert entity_etag(key, now) == entity_etag(key, now)
+    assert entity_etag(key, now) != entity_etag(key, now + timedelta(microseconds=1))
+    assert entity_etag(key, now).startswith('W/"')
+
+
+def test_collection_etag_depends_on_filters_and_aggregate():
+    now = datetime.utcnow()
+    base = collection_etag({"status": "success", "limit": 20}, 5, now)
+    assert base == collection_etag({"limit": 20, "status": "success", "service_name": None}, 5, now)
+    assert base != collection_etag({"status": "failed", "limit": 20}, 5, now)
+    assert base != collection_etag({"status": "success", "limit": 20}, 6, now)
+
+
+def test_if_none_match_parsing():
+    etag = entity_etag(uuid.uuid4(), datetime.utcnow())
+    assert etag_matches(_request(etag), etag)
+    assert etag_matches(_request(f'"other", {etag.removeprefix("W/")}'), etag)
+    assert etag_matches(_request("*"), etag)
+    assert not etag_matches(_request('"other"'), etag)
+    assert not etag_matches(_request(), etag)
+
+
+@pytest.mark.anyio
+async def test_cached_detail_returns_304_without_database():
+    now = datetime.utcnow()
+    record = DeploymentRecord.__new__(DeploymentRecord)
+    for name, value in dict(
+        id=uuid.uuid4(), service_name="api-gateway", environment="production",
+        version="v1", commit_sha="abc1234", status=DeploymentStatus.SUCCESS, deployed_by="ci",
+        description=None, duration_seconds=None, created_at=now, updated_at=now,
+    ).items():
+        setattr(record, name, value)
+    object_cache.put(DEPLOYMENT, record.id, record, object_cache.token())
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        first = await ac.get(f"/api/v1/deployments/{record.id}")
+        etag = first.headers["etag"]
+        second = await ac.get(f"/api/v1/deployments/{record.id}", headers={"If-None-Match": etag})
+
+    assert first.status_code == 200
+    assert second.status_code == 304
+    assert second.headers["etag"] == etag
+    assert second.content == b""
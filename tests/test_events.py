@@ -0,0 +1,100 @@
+"""Tests for the live event stream fan-out."""
+
+import asyncio
+import json
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+
+from app.api import events as events_api
+from app.core.lifecycle import DrainState
+from app.main import app
+from app.models.models import IncidentSeverity, IncidentStatus
+from app.services.events import EventBroker, Subscription, format_sse, make_event
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def _incident_event(service_name="payment-service", severity=IncidentSeverity.SEV1):
+    incident = SimpleNamespace(
+        id=uuid.uuid4(),
+        service_name=service_name,
+        environment="production",
+        status=IncidentStatus.TRIGGERED,
+        severity=severity,
+    )
+    return make_event("incident.created", incident)
+
+
+def test_make_event_serializes_enums():
+    event = _incident_event()
+    assert event["status"] == "triggered"
+    assert event["severity"] == "sev1"
+    assert json.loads(format_sse(event).split("data: ", 1)[1])["id"] == event["id"]
+
+
+@pytest.mark.anyio
+async def test_subscription_filters():
+    subscription = Subscription(service_name="payment-service", severity="sev1")
+    assert subscription.matches(_incident_event())
+    assert not subscription.matches(_incident_event(service_name="checkout"))
+    assert not subscription.matches(_incident_event(severity=IncidentSeverity.SEV3))
+
+
+@pytest.mark.anyio
+async def test_slow_subscriber_drops_oldest():
+    subscription = Subscription(buffer_size=2)
+    events = [_incident_event() for _ in range(3)]
+    for event in events:
+        subscription.offer(event)
+    assert subscription.dropped == 1
+    assert subscription.queue.get_nowait() is events[1]
+    assert subscription.queue.get_nowait() is events[2]
+
+
+@pytest.mark.anyio
+async def test_broker_fans_out_to_matching_subscribers():
+    broker = EventBroker("test")
+    payments = broker.subscribe(service_name="payment-service")
+    checkout = broker.subscribe(service_name="checkout")
+    broker._on_notify(None, 0, "test", json.dumps(_incident_event()))
+    assert payments.queue.qsize() == 1
+    assert checkout.queue.qsize() == 0
+    broker.unsubscribe(payments)
+    assert broker.subscriber_count == 1
+
+
+@pytest.mark.anyio
+async def test_stream_unavailable_without_listener():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        response = await ac.get("/api/v1/events/stream")
+    assert response.status_code == 503
+
+
+@pytest.mark.anyio
+async def test_stream_ends_when_drain_starts(monkeypatch):
+    broker = EventBroker("test")
+    state = DrainState()
+    state.add_hook(broker.close_streams)
+    monkeypatch.setattr(EventBroker, "running", property(lambda self: True))
+    monkeypatch.setattr(events_api, "event_broker", broker)
+    monkeypatch.setattr(events_api, "drain_state", state)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        request = asyncio.create_task(ac.get("/api/v1/events/stream"))
+        while broker.subscriber_count == 0:
+            await asyncio.sleep(0.01)
+        broker.dispatch(_incident_event())
+        await state.drain(1.0)
+        response = await asyncio.wait_for(request, 1)
+
+    assert response.status_code == 200
+    assert "event: incident.created" in response.text
+    assert broker.subscriber_count == 0
@@ -0,0 +1,168 @@
+"""Tests for Idempotency-Key handling on create endpoints."""
+
+import asyncio
+import uuid
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.dialects.postgresql.asyncpg import dialect
+from sqlalchemy.sql.dml import Insert, Update
+
+from app.models.models import DeploymentStatus
+from app.schemas.schemas import DeploymentCreate, DeploymentResponse
+from app.services.idempotency import IdempotencyStore, StoredResponse, claim_statement, request_hash
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def _sql(stmt) -> str:
+    return str(stmt.compile(dialect=dialect())).replace("\n", " ")
+
+
+def _store():
+    return IdempotencyStore(max_entries=100, cache_ttl=60, key_ttl=3600, wait_timeout=1)
+
+
+def _payload(version="v1.2.3"):
+    return DeploymentCreate(
+        service_name="api", environment="production", version=version,
+        commit_sha="abc1234", deployed_by="ci",
+    )
+
+
+def _created(payload):
+    now = datetime.utcnow()
+    return SimpleNamespace(
+        id=uuid.uuid4(), status=DeploymentStatus.PENDING, description=None,
+        duration_seconds=None, created_at=now, updated_at=now, **payload.model_dump(exclude={"description"}),
+    )
+
+
+def _claims(stored=None):
+    """``respond``: claims succeed unless another transaction already stored a response."""
+    def respond(statement, params):
+        if isinstance(statement, Insert):
+            return [] if stored else [SimpleNamespace(key="k")]
+        if isinstance(statement, Update):
+            return []
+        return [stored]
+    return respond
+
+
+def test_claim_takes_over_only_expired_keys():
+    now = datetime.utcnow()
+    sql = _sql(claim_statement("deployments", "k", "h", now, now))
+    assert sql.startswith("INSERT INTO idempotency_keys")
+    assert "ON CONFLICT (scope, key) DO UPDATE" in sql
+    assert "WHERE idempotency_keys.created_at <" in sql
+    assert "RETURNING idempotency_keys.key" in sql
+
+
+@pytest.mark.anyio
+async def test_replay_returns_stored_response_without_running_handler(fake_session):
+    store, session, payload = _store(), fake_session(respond=_claims()), _payload()
+    calls = []
+
+    async def handler():
+        calls.append(1)
+        return _created(payload)
+
+    first = await store.execute(session, "deployments", "k1", payload, handler, DeploymentResponse, 201)
+    second = await store.execute(session, "deployments", "k1", payload, handler, DeploymentResponse, 201)
+
+    assert first.status_code == second.status_code == 201
+    assert first.body == second.body
+    assert first.headers["Idempotent-Replayed"] == "false"
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert len(calls) == 1
+    assert session.commits == 1
+    assert len(session.statements) == 2  # claim + store; the replay came from memory
+
+
+@pytest.mark.anyio
+async def test_concurrent_duplicates_wait_for_the_first(fake_session):
+    store, session, payload = _store(), fake_session(respond=_claims()), _payload()
+    release = asyncio.Event()
+    calls = []
+
+    async def handler():
+        calls.append(1)
+        await release.wait()
+        return _created(payload)
+
+    first = asyncio.create_task(
+        store.execute(session, "deployments", "k2", payload, handler, DeploymentResponse, 201)
+    )
+    await asyncio.sleep(0)
+    second = asyncio.create_task(
+        store.execute(session, "deployments", "k2", payload, handler, DeploymentResponse, 201)
+    )
+    await asyncio.sleep(0.01)
+    release.set()
+
+    responses = await asyncio.gather(first, second)
+    assert len(calls) == 1
+    assert responses[0].body == responses[1].body
+
+
+@pytest.mark.anyio
+async def test_key_reused_with_different_body_is_rejected(fake_session):
+    store, session = _store(), fake_session(respond=_claims())
+    payload = _payload()
+
+    async def handler():
+        return _created(payload)
+
+    await store.execute(session, "deployments", "k3", payload, handler, DeploymentResponse, 201)
+    with pytest.raises(HTTPException) as exc:
+        await store.execute(session, "deployments", "k3", _payload("v9"), handler, DeploymentResponse, 201)
+    assert exc.value.status_code == 422
+
+
+@pytest.mark.anyio
+async def test_response_stored_by_another_worker_is_replayed(fake_session):
+    payload = _payload()
+    session = fake_session(respond=_claims(StoredResponse(request_hash(payload), 201, '{"id":"x"}')))
+
+    async def handler():
+        raise AssertionError("handler must not run")
+
+    response = await _store().execute(session, "deployments", "k4", payload, handler, DeploymentResponse, 201)
+    assert response.body == b'{"id":"x"}'
+    assert response.headers["Idempotent-Replayed"] == "true"
+
+
+@pytest.mark.anyio
+async def test_waiter_runs_handler_itself_if_the_first_request_fails(fake_session):
+    store, session, payload = _store(), fake_session(respond=_claims()), _payload()
+    release = asyncio.Event()
+    calls = []
+
+    async def failing():
+        calls.append("failed")
+        await release.wait()
+        raise RuntimeError("insert failed")
+
+    async def handler():
+        calls.append("ok")
+        return _created(payload)
+
+    first = asyncio.create_task(
+        store.execute(session, "deployments", "k5", payload, failing, DeploymentResponse, 201)
+    )
+    await asyncio.sleep(0)
+    second = asyncio.create_task(
+        store.execute(session, "deployments", "k5", payload, handler, DeploymentResponse, 201)
+    )
+    await asyncio.sleep(0.01)
+    release.set()
+
+    with pytest.raises(RuntimeError):
+        await first
+    assert (await second).status_code == 201
+    assert calls == ["failed", "ok"]
@@ -0,0 +1,73 @@
+"""Tests for bulk incident state transitions."""
+
+import uuid
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy.dialects.postgresql.asyncpg import dialect
+
+from app.core.middleware import MTTR_HISTOGRAM
+from app.main import app
+from app.models.models import Incident, IncidentSeverity, IncidentStatus
+from app.services.incident_transitions import bulk_transition, transition_statement
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def _sql(stmt) -> str:
+    return str(stmt.compile(dialect=dialect())).replace("\n", " ")
+
+
+def test_resolve_computes_mttr_in_sql():
+    sql = _sql(transition_statement(IncidentStatus.RESOLVED, [Incident.service_id == 3], datetime.utcnow()))
+    assert sql.startswith("UPDATE incidents SET")
+    assert "resolved_at=" in sql
+    assert "mttr_seconds=EXTRACT(epoch FROM" in sql
+    assert "incidents.status != " in sql
+    assert "RETURNING incidents.id" in sql
+    assert "acknowledged_at" not in sql
+
+
+def test_acknowledge_only_stamps_acknowledged_at():
+    sql = _sql(transition_statement(IncidentStatus.ACKNOWLEDGED, [], datetime.utcnow()))
+    assert "acknowledged_at=" in sql
+    assert "resolved_at" not in sql and "mttr_seconds=" not in sql
+
+
+@pytest.mark.anyio
+async def test_bulk_transition_batches_timeline_and_metrics(fake_session):
+    rows = [
+        SimpleNamespace(
+            id=uuid.uuid4(), service_name="db", environment="production",
+            severity=IncidentSeverity.SEV2, status=IncidentStatus.RESOLVED,
+            mttr_seconds=120.0, fingerprint=None,
+        )
+        for _ in range(3)
+    ]
+    session = fake_session(rows)
+    before = MTTR_HISTOGRAM.labels(severity="sev2")._sum.get()
+
+    result = await bulk_transition(session, IncidentStatus.RESOLVED, [], "oncall", note="db recovered")
+
+    assert result == rows
+    timeline = session.statements[1]
+    assert timeline.table.name == "incident_timeline"
+    assert len(timeline._multi_values[0]) == 3
+    assert MTTR_HISTOGRAM.labels(severity="sev2")._sum.get() - before == 360.0
+
+
+@pytest.mark.anyio
+async def test_bulk_transition_requires_a_filter():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        empty = await ac.post("/api/v1/incidents/bulk-transition", json={"status": "resolved"})
+        invalid = await ac.post(
+            "/api/v1/incidents/bulk-transition", json={"status": "closed", "service_name": "db"}
+        )
+    assert empty.status_code == 422
+    assert invalid.status_code == 422
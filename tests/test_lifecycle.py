@@ -0,0 +1,84 @@
+"""Tests for pool warm-up statements and graceful drain."""
+
+import asyncio
+import os
+import signal
+import time
+import uuid
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql.asyncpg import dialect
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from app.core.lifecycle import DrainMiddleware, DrainState, hot_statements, install_drain_handler
+from app.models.models import Deployment
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def test_hot_statements_match_handler_sql():
+    handler_sql = str(
+        select(Deployment).where(Deployment.id == uuid.uuid4()).compile(dialect=dialect())
+    )
+    warmed_sql = {str(stmt.compile(dialect=dialect())) for stmt in hot_statements()}
+    assert handler_sql in warmed_sql
+
+
+def _app(state):
+    async def endpoint(request):
+        return PlainTextResponse("ok")
+
+    app = Starlette(routes=[Route("/healthz", endpoint), Route("/api/v1/incidents", endpoint)])
+    app.add_middleware(DrainMiddleware, state=state)
+    return app
+
+
+@pytest.mark.anyio
+async def test_draining_rejects_new_requests_but_not_probes():
+    state = DrainState()
+    transport = ASGITransport(app=_app(state))
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        assert (await ac.get("/api/v1/incidents")).status_code == 200
+        state.begin()
+        response = await ac.get("/api/v1/incidents")
+        assert response.status_code == 503
+        assert response.headers["Connection"] == "close"
+        assert (await ac.get("/healthz")).status_code == 200
+    assert state.in_flight == 0
+
+
+@pytest.mark.anyio
+async def test_wait_idle_reports_requests_left_at_deadline():
+    state = DrainState()
+    assert await state.wait_idle(time.monotonic() + 1) == 0
+    state.in_flight = 2
+    assert await state.wait_idle(time.monotonic() + 0.01, poll_interval=0.001) == 2
+
+
+@pytest.mark.anyio
+async def test_signal_drains_while_serving_then_reaches_previous_handler():
+    received = []
+    original = signal.signal(signal.SIGUSR1, lambda sig, frame: received.append(sig))
+    try:
+        state = DrainState()
+        install_drain_handler(1.0, state=state, signum=signal.SIGUSR1)
+        transport = ASGITransport(app=_app(state))
+        async with AsyncClient(transport=transport, base_url="http://test") as ac:
+            state.in_flight = 1  # a request that is still running
+            os.kill(os.getpid(), signal.SIGUSR1)
+            await asyncio.sleep(0.01)
+            assert (await ac.get("/api/v1/incidents")).status_code == 503
+            assert received == []
+
+            state.in_flight = 0
+            await asyncio.wait_for(state.drain_task, 1)
+        assert received == [signal.SIGUSR1]
+    finally:
+        signal.signal(signal.SIGUSR1, original)
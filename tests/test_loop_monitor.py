@@ -0,0 +1,47 @@
+"""Tests for the event-loop lag monitor."""
+
+import asyncio
+import time
+
+import pytest
+
+from app.core.loop_monitor import EVENT_LOOP_BLOCKED, EVENT_LOOP_LAG, LoopMonitor
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def _totals():
+    return EVENT_LOOP_LAG._sum.get(), EVENT_LOOP_BLOCKED._value.get()
+
+
+def blocking_handler():
+    time.sleep(0.2)
+
+
+@pytest.mark.anyio
+async def test_blocking_call_is_measured_and_its_stack_captured():
+    monitor = LoopMonitor(interval=0.02, threshold=0.05, capture_stacks=True)
+    lag_before, blocked_before = _totals()
+    monitor.start()
+    await asyncio.sleep(0.05)
+    blocking_handler()
+    await asyncio.sleep(0.05)
+    await monitor.stop()
+
+    lag_after, blocked_after = _totals()
+    assert lag_after - lag_before >= 0.1
+    assert blocked_after > blocked_before
+    assert any("blocking_handler" in stack for stack in monitor.captured)
+
+
+@pytest.mark.anyio
+async def test_idle_loop_reports_no_blocking():
+    monitor = LoopMonitor(interval=0.01, threshold=0.5, capture_stacks=True)
+    monitor.start()
+    await asyncio.sleep(0.05)
+    await monitor.stop()
+    assert not monitor.captured
+    assert not monitor.running
@@ -0,0 +1,17 @@
+"""Tests keeping Alembic migrations and the application in sync."""
+
+from pathlib import Path
+
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+
+from app.core.database import SCHEMA_REVISION
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_schema_revision_matches_alembic_head():
+    config = Config(str(ROOT / "alembic.ini"))
+    config.set_main_option("script_location", str(ROOT / "migrations"))
+    script = ScriptDirectory.from_config(config)
+    assert script.get_heads() == [SCHEMA_REVISION]
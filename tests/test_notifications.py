@@ -0,0 +1,180 @@
+"""Tests for the incident notification outbox and dispatcher."""
+
+import asyncio
+import json
+import subprocess
+import sys
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from sqlalchemy.dialects.postgresql.asyncpg import dialect
+
+from app.core.config import settings
+from app.models.models import IncidentSeverity, IncidentStatus
+from app.services.notifications import (
+    NotificationDispatcher, RECORD_STATEMENT, backoff, claim_statement, enqueue, should_notify,
+)
+
+DESTINATIONS = {"chat": "http://chat.test/hook", "paging": "http://paging.test/hook"}
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def _sql(stmt) -> str:
+    return str(stmt.compile(dialect=dialect())).replace("\n", " ")
+
+
+def _row(destination="chat", attempts=1):
+    return SimpleNamespace(
+        id=uuid.uuid4(), destination=destination, payload={"type": "incident.created"},
+        attempts=attempts, created_at=datetime.utcnow() - timedelta(seconds=1),
+    )
+
+
+def _incident(severity=IncidentSeverity.SEV1):
+    return SimpleNamespace(
+        id=uuid.uuid4(), title="API down", severity=severity, status=IncidentStatus.TRIGGERED,
+        service_name="api", environment="production", on_call_engineer=None,
+        triggered_at=datetime.utcnow(),
+    )
+
+
+def test_claim_skips_locked_rows_and_extends_lease():
+    sql = _sql(claim_statement(datetime.utcnow(), 60, 100))
+    assert sql.startswith("UPDATE notification_outbox SET")
+    assert "available_at=" in sql
+    assert "attempts=(notification_outbox.attempts + " in sql
+    assert "FOR UPDATE SKIP LOCKED" in sql
+    assert "delivered_at IS NULL" in sql and "failed_at IS NULL" in sql
+    assert "RETURNING notification_outbox.id" in sql
+
+
+def test_should_notify_uses_configured_severities():
+    assert should_notify(IncidentSeverity.SEV1)
+    assert should_notify("sev1")
+    assert not should_notify(IncidentSeverity.SEV2)
+
+
+def test_app_import_does_not_load_httpx():
+    code = "import sys, app.main; sys.exit('httpx' in sys.modules)"
+    root = Path(__file__).resolve().parent.parent
+    assert subprocess.run([sys.executable, "-c", code], cwd=root).returncode == 0
+
+
+def test_backoff_grows_and_is_capped():
+    assert 0.5 <= backoff(1, 300) <= 1.0
+    assert 4.0 <= backoff(4, 300) <= 8.0
+    assert backoff(30, 300) <= 300
+
+
+@pytest.mark.anyio
+async def test_enqueue_writes_one_row_per_destination(monkeypatch, fake_session):
+    monkeypatch.setattr(settings, "NOTIFY_WEBHOOKS", DESTINATIONS)
+    session = fake_session()
+    assert await enqueue(session, "incident.created", _incident()) == 2
+    assert len(session.statements) == 1
+    assert _sql(session.statements[0]).startswith("INSERT INTO notification_outbox")
+
+
+@pytest.mark.anyio
+async def test_enqueue_is_a_noop_without_destinations(monkeypatch, fake_session):
+    monkeypatch.setattr(settings, "NOTIFY_WEBHOOKS", {})
+    session = fake_session()
+    assert await enqueue(session, "incident.created", _incident()) == 0
+    assert session.statements == []
+
+
+@pytest.mark.anyio
+async def test_deliver_classifies_responses():
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.headers["X-Notification-Id"]
+        assert json.loads(request.content) == {"type": "incident.created"}
+        if request.url.host == "chat.test":
+            return httpx.Response(200)
+        return httpx.Response(503, headers={"Retry-After": "30"})
+
+    dispatcher = NotificationDispatcher(DESTINATIONS, transport=httpx.MockTransport(handler))
+    chat, paging, gone = _row("chat"), _row("paging"), _row("removed")
+    delivered, retried, failed = await dispatcher.deliver([chat, paging, gone])
+    await dispatcher.stop()
+
+    assert delivered["row_id"] == chat.id and delivered["delivered"] and not delivered["failed"]
+    assert retried["delivered"] is None and retried["failed"] is None
+    assert retried["next_at"] >= datetime.utcnow() + timedelta(seconds=29)
+    assert retried["error"] == "HTTP 503"
+    assert failed["failed"] and failed["error"] == "destination is not configured"
+
+
+@pytest.mark.anyio
+async def test_client_errors_and_exhausted_retries_fail_permanently():
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "chat.test":
+            return httpx.Response(400)
+        raise httpx.ConnectError("refused", request=request)
+
+    dispatcher = NotificationDispatcher(DESTINATIONS, max_attempts=3, transport=httpx.MockTransport(handler))
+    rejected, early, exhausted = await dispatcher.deliver([_row("chat"), _row("paging", 1), _row("paging", 3)])
+    await dispatcher.stop()
+
+    assert rejected["failed"] and rejected["error"] == "HTTP 400"
+    assert early["failed"] is None and early["error"].startswith("ConnectError")
+    assert exhausted["failed"]
+
+
+@pytest.mark.anyio
+async def test_per_destination_concurrency_limit():
+    active = {"chat": 0, "paging": 0}
+    peak = {"chat": 0, "paging": 0}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        name = request.url.host.split(".")[0]
+        active[name] += 1
+        peak[name] = max(peak[name], active[name])
+        await asyncio.sleep(0.01)
+        active[name] -= 1
+        return httpx.Response(204)
+
+    dispatcher = NotificationDispatcher(DESTINATIONS, concurrency=2, transport=httpx.MockTransport(handler))
+    rows = [_row("chat") for _ in range(6)] + [_row("paging") for _ in range(6)]
+    outcomes = await dispatcher.deliver(rows)
+    await dispatcher.stop()
+
+    assert all(o["delivered"] for o in outcomes)
+    assert peak == {"chat": 2, "paging": 2}
+
+
+@pytest.mark.anyio
+async def test_run_once_claims_delivers_and_records_in_one_statement(fake_session):
+    rows = [_row("chat"), _row("paging")]
+    session = fake_session(rows)
+    dispatcher = NotificationDispatcher(
+        DESTINATIONS,
+        session_factory=lambda: session,
+        transport=httpx.MockTransport(lambda request: httpx.Response(200)),
+    )
+    assert await dispatcher.run_once() == 2
+    await dispatcher.stop()
+
+    claim, record = session.statements
+    params = session.params[1]
+    assert "SKIP LOCKED" in _sql(claim)
+    assert record is RECORD_STATEMENT
+    assert [p["row_id"] for p in params] == [row.id for row in rows]
+    assert all(p["delivered"] for p in params)
+
+
+def test_wake_only_for_notifying_incident_events():
+    dispatcher = NotificationDispatcher(DESTINATIONS)
+    dispatcher.wake({"type": "deployment.created", "severity": None})
+    assert not dispatcher._wake.is_set()
+    dispatcher.wake({"type": "incident.updated", "severity": "sev3"})
+    assert not dispatcher._wake.is_set()
+    dispatcher.wake({"type": "incident.created", "severity": "sev1"})
+    assert dispatcher._wake.is_set()
@@ -0,0 +1,93 @@
+"""Tests for sparse fieldsets and response compression."""
+
+import json
+import uuid
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import select
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+
+from app.core.compression import CompressionMiddleware, negotiate
+from app.core.fieldsets import load_columns, parse_fields, sparse_response
+from app.models.models import Incident
+from app.schemas.schemas import IncidentResponse
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def test_parse_fields_keeps_schema_order_and_id():
+    assert parse_fields(None, IncidentResponse) is None
+    assert parse_fields("status, service_name", IncidentResponse) == ("id", "status", "service_name")
+    with pytest.raises(HTTPException) as exc:
+        parse_fields("status,password", IncidentResponse)
+    assert exc.value.status_code == 422
+
+
+def test_load_only_prunes_select():
+    fields = parse_fields("status,created_at", IncidentResponse)
+    sql = str(select(Incident).options(load_columns(Incident, fields)))
+    assert "incidents.status" in sql
+    assert "root_cause" not in sql and "description" not in sql
+
+
+def test_sparse_response_serializes_subset():
+    row = SimpleNamespace(
+        id=uuid.uuid4(), status="resolved", service_name="checkout",
+        created_at=datetime(2024, 1, 1), root_cause="x" * 1000,
+    )
+    response = sparse_response([row], IncidentResponse, ("id", "status", "service_name"), {"ETag": 'W/"a"'})
+    body = json.loads(response.body)
+    assert body == [{"id": str(row.id), "status": "resolved", "service_name": "checkout"}]
+    assert response.headers["etag"] == 'W/"a"'
+
+
+def test_negotiate_encoding():
+    assert negotiate("gzip, deflate", brotli_available=False) == "gzip"
+    assert negotiate("br;q=1.0, gzip;q=0.5", brotli_available=True) == "br"
+    assert negotiate("br", brotli_available=False) is None
+    assert negotiate("gzip;q=0") is None
+    assert negotiate("") is None
+
+
+def _app():
+    async def big(request):
+        return PlainTextResponse("x" * 4096)
+
+    async def small(request):
+        return PlainTextResponse("tiny")
+
+    async def stream(request):
+        async def events():
+            yield "data: 1\n\n"
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    app = Starlette(routes=[Route("/big", big), Route("/small", small), Route("/stream", stream)])
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+    return app
+
+
+@pytest.mark.anyio
+async def test_compresses_large_responses_only():
+    headers = {"Accept-Encoding": "gzip"}
+    transport = ASGITransport(app=_app())
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        big = await ac.get("/big", headers=headers)
+        small = await ac.get("/small", headers=headers)
+        stream = await ac.get("/stream", headers=headers)
+
+    assert big.headers["content-encoding"] == "gzip"
+    assert int(big.headers["content-length"]) < 4096
+    assert "Accept-Encoding" in big.headers["vary"]
+    assert big.text == "x" * 4096  # httpx decodes transparently
+    assert "content-encoding" not in small.headers
+    assert "content-encoding" not in stream.headers
+    assert stream.text == "data: 1\n\n"
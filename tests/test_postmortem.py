@@ -0,0 +1,140 @@
+"""Tests for the postmortem report endpoint."""
+
+import json
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy.dialects.postgresql.asyncpg import dialect
+
+from app.api import incidents
+from app.core.cache import invalidate_from_event, object_cache
+from app.core.database import get_db
+from app.models.models import DeploymentStatus, IncidentSeverity, IncidentStatus
+from app.services.postmortem import (
+    build_report, nearby_deployments_query, postmortem_query, render_markdown,
+)
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def _sql(stmt) -> str:
+    return str(stmt.compile(dialect=dialect())).replace("\n", " ")
+
+
+def _deployment(minutes: int, triggered_at: datetime):
+    return SimpleNamespace(
+        id=uuid.uuid4(), version=f"v1.{minutes + 100}", commit_sha="0123456789abcdef0123",
+        status=DeploymentStatus.SUCCESS, deployed_by="ci",
+        created_at=triggered_at + timedelta(minutes=minutes),
+    )
+
+
+def _incident():
+    triggered_at = datetime(2026, 10, 1, 12, 0, 0)
+    cause = _deployment(-5, triggered_at)
+    return SimpleNamespace(
+        id=uuid.uuid4(), title="Checkout errors", description="5xx | spike",
+        severity=IncidentSeverity.SEV1, status=IncidentStatus.RESOLVED,
+        service_name="checkout", environment="production", on_call_engineer="alice",
+        triggered_at=triggered_at,
+        acknowledged_at=triggered_at + timedelta(minutes=3),
+        resolved_at=triggered_at + timedelta(minutes=42),
+        mttr_seconds=2520.0, root_cause="Bad config", action_items=None,
+        caused_by_deployment=cause,
+        timeline=[
+            SimpleNamespace(
+                created_at=triggered_at + timedelta(minutes=1), event_type="note",
+                description="Rolled back", author="alice",
+            )
+        ],
+    ), cause
+
+
+def test_incident_deployment_and_timeline_load_together():
+    sql = _sql(postmortem_query(uuid.uuid4()))
+    assert "LEFT OUTER JOIN deployments" in sql
+
+    sql = _sql(nearby_deployments_query(3, 1, datetime.utcnow(), timedelta(hours=2)))
+    assert "deployments.created_at BETWEEN" in sql
+    assert "ORDER BY deployments.created_at" in sql
+
+
+def test_report_and_markdown():
+    incident, cause = _incident()
+    report = build_report(incident, [cause, _deployment(10, incident.triggered_at)])
+
+    assert report["incident"]["time_to_acknowledge_seconds"] == 180.0
+    assert report["caused_by_deployment"]["id"] == str(cause.id)
+    assert [d["offset_seconds"] for d in report["nearby_deployments"]] == [-300.0, 600.0]
+    json.dumps(report)
+
+    markdown = render_markdown(report)
+    assert markdown.startswith("# Postmortem: Checkout errors")
+    assert "**Severity:** SEV1" in markdown
+    assert "| 3m 00s | 42m 00s |" in markdown
+    assert "| -5m 00s | v1.95 |" in markdown
+    assert "| +10m 00s | v1.110 |" in markdown
+    assert "| note | Rolled back | alice |" in markdown
+    assert "5xx | spike" in markdown  # free text is not a table cell
+
+
+def _app():
+    app = FastAPI()
+    app.include_router(incidents.router, prefix="/api/v1")
+
+    async def fake_db():
+        yield None
+
+    app.dependency_overrides[get_db] = fake_db
+    return app
+
+
+@pytest.mark.anyio
+async def test_rendered_report_is_cached_until_the_incident_changes(monkeypatch):
+    incident, cause = _incident()
+    calls = []
+
+    async def load(db, incident_id):
+        calls.append(incident_id)
+        return build_report(incident, [cause])
+
+    monkeypatch.setattr(incidents, "load_postmortem", load)
+    object_cache.clear()
+    url = f"/api/v1/incidents/{incident.id}/postmortem"
+
+    transport = ASGITransport(app=_app())
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        first = await client.get(url)
+        assert first.status_code == 200
+        assert first.headers["content-type"].startswith("text/markdown")
+
+        second = await client.get(url, params={"format": "json"})
+        assert second.json()["incident"]["id"] == str(incident.id)
+        assert len(calls) == 1
+
+        invalidate_from_event({"type": "incident.timeline", "id": str(incident.id)})
+        await client.get(url)
+        assert len(calls) == 2
+
+        assert (await client.get(url, params={"format": "pdf"})).status_code == 422
+
+    object_cache.clear()
+
+
+@pytest.mark.anyio
+async def test_missing_incident_is_404(monkeypatch):
+    async def load(db, incident_id):
+        return None
+
+    monkeypatch.setattr(incidents, "load_postmortem", load)
+    transport = ASGITransport(app=_app())
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get(f"/api/v1/incidents/{uuid.uuid4()}/postmortem")
+    assert response.status_code == 404
@@ -0,0 +1,109 @@
+"""Tests for the on-demand sampling profiler."""
+
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+from fastapi import Depends, FastAPI
+from httpx import AsyncClient, ASGITransport
+
+from app.core.config import settings
+from app.core.profiler import OTHER, Profile, RequestScopeMiddleware, Sampler, TaskContexts, route_codes
+from app.main import app
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def busy_endpoint(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_samples_are_attributed_to_the_route_on_the_stack():
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_endpoint, args=(stop,))
+    worker.start()
+    try:
+        sampler = Sampler(worker.ident, {busy_endpoint.__code__: "GET /busy"}, interval=0.002)
+        profile = sampler.run(0.1)
+    finally:
+        stop.set()
+        worker.join()
+
+    assert profile.total > 10
+    assert set(profile.samples) == {"GET /busy"}
+    assert "GET /busy;" in profile.collapsed()
+    assert "busy_endpoint (test_profiler.py:" in profile.collapsed()
+
+
+@pytest.mark.anyio
+async def test_dependency_time_is_attributed_to_the_route_of_its_task():
+    async def slow_dependency():
+        deadline = time.monotonic() + 0.15
+        while time.monotonic() < deadline:  # blocks the loop, outside the endpoint
+            sum(range(1000))
+
+    api = FastAPI()
+
+    @api.get("/slow", dependencies=[Depends(slow_dependency)])
+    async def slow():
+        return {}
+
+    api.add_middleware(RequestScopeMiddleware)
+    tasks = TaskContexts(asyncio.get_running_loop())
+    tasks.install()
+    profiles = []
+    try:
+        sampler = Sampler(
+            threading.get_ident(), route_codes(api.routes),
+            interval=0.002, tasks=tasks, routes=api.routes,
+        )
+        thread = threading.Thread(target=lambda: profiles.append(sampler.run(0.1)))
+        thread.start()
+        async with AsyncClient(transport=ASGITransport(app=api), base_url="http://test") as ac:
+            assert (await asyncio.create_task(ac.get("/slow"))).status_code == 200
+        thread.join()
+    finally:
+        tasks.uninstall()
+
+    [profile] = profiles
+    assert sum(profile.samples["GET /slow"].values()) > 10
+    assert "slow_dependency (test_profiler.py:" in profile.collapsed()
+
+
+def test_speedscope_document_shares_frames():
+    profile = Profile(interval=0.01)
+    stack = (("main", "app.py", 1), ("handler", "api.py", 10))
+    profile.add("GET /a", stack)
+    profile.add("GET /a", stack)
+    profile.add(OTHER, stack[:1])
+    doc = profile.speedscope()
+    json.dumps(doc)
+    assert len(doc["shared"]["frames"]) == 2
+    by_name = {p["name"]: p for p in doc["profiles"]}
+    assert by_name["GET /a"]["samples"] == [[0, 1]]
+    assert by_name["GET /a"]["weights"] == [0.02]
+
+
+@pytest.mark.anyio
+async def test_profile_endpoint_requires_admin_key(monkeypatch):
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        disabled = await ac.get("/debug/profile?seconds=0.05")
+        monkeypatch.setattr(settings, "ADMIN_API_KEY", "s3cret")
+        denied = await ac.get("/debug/profile?seconds=0.05", headers={"X-API-Key": "nope"})
+        started = time.monotonic()
+        allowed = await ac.get(
+            "/debug/profile?seconds=0.05&format=speedscope", headers={"X-API-Key": "s3cret"}
+        )
+
+    assert disabled.status_code == 404
+    assert denied.status_code == 401
+    assert allowed.status_code == 200
+    assert time.monotonic() - started >= 0.05
+    assert allowed.json()["profiles"]
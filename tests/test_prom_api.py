@@ -0,0 +1,151 @@
+"""Tests for the Prometheus-compatible API served from metric rollups."""
+
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.dialects.postgresql.asyncpg import dialect
+
+from app.api import prom
+from app.core.database import get_db
+from app.services.promql import PromQLError, ResultCache, align, matrix, parse, range_statement
+from app.services.rollups import EPOCH, EVENT_METRICS, Window, clamp, refresh_statements
+
+
+def _sql(stmt) -> str:
+    return str(stmt.compile(dialect=dialect())).replace("\n", " ")
+
+
+def _row(step_start: float, total: float, samples: int, **labels):
+    return SimpleNamespace(
+        step_start=EPOCH + timedelta(seconds=step_start), total=total, samples=samples, **labels
+    )
+
+
+def _client(session, monkeypatch):
+    monkeypatch.setattr(prom, "result_cache", ResultCache(100, 60, 600))
+    app = FastAPI()
+    app.include_router(prom.router)
+    app.dependency_overrides[get_db] = lambda: session
+    return TestClient(app)
+
+
+def test_parse_selector_and_sum_by():
+    query = parse('sum by (service) (devops_deployments_total{environment="production", status=~"fail.*"})')
+    assert query.selector.metric.name == "devops_deployments_total"
+    assert query.by == ("service",)
+    assert query.labels == ("service",)
+    assert [m.op for m in query.selector.matchers] == ["=", "=~"]
+
+    assert parse("sum(devops_incidents_total) by (severity)").by == ("severity",)
+    assert parse('{__name__="devops_incident_mttr_seconds"}').by is None
+
+
+@pytest.mark.parametrize("expr", [
+    "rate(devops_deployments_total[5m])",
+    "unknown_metric",
+    'devops_deployments_total{status=~"("}',
+    "sum without (service) (devops_deployments_total)",
+    "devops_deployments_total extra",
+])
+def test_parse_rejects_unsupported_expressions(expr):
+    with pytest.raises(PromQLError):
+        parse(expr)
+
+
+def test_align_rounds_step_to_buckets_and_snaps_range():
+    assert align(1000, 4000, 400, 300, 100) == (600, 3600, 600)
+    with pytest.raises(PromQLError):
+        align(0, 86400 * 30, 300, 300, 1000)
+
+
+def test_range_statement_groups_rollups_by_step():
+    query = parse('sum by (service) (devops_deployments_total{environment!="dev"})')
+    sql = _sql(range_statement(query, 600, 3600, 600))
+    assert "date_bin(" in sql
+    assert "FROM metric_rollups" in sql
+    assert "GROUP BY metric_rollups.service_name" in sql
+    assert "metric_rollups.environment != " in sql
+
+    # A matcher requiring a label the metric does not have matches nothing
+    assert range_statement(parse('devops_deployment_duration_seconds{severity="sev1"}'), 0, 600, 300) is None
+
+
+def test_refresh_rebuilds_recent_and_dirty_buckets_per_metric():
+    now = datetime(2026, 1, 1, 12, 0)
+    old_bucket = datetime(2025, 6, 1, 9, 0)
+    windows = {name: Window(datetime(2026, 1, 1, 11, 50)) for name in EVENT_METRICS}
+    windows["devops_incidents_total"] = Window(datetime(2026, 1, 1, 11, 50), (old_bucket,))
+    statements = refresh_statements(windows, 300, now)
+    deletes, inserts, snapshot = statements[:4], statements[4:8], statements[8]
+
+    assert all("metric_rollups.bucket >=" in _sql(d) for d in deletes)
+    assert "metric_rollups.bucket IN" in _sql(deletes[2])
+    assert "metric_rollups.bucket IN" not in _sql(deletes[3])
+    assert all(_sql(s).startswith("INSERT INTO metric_rollups") for s in inserts)
+    assert "date_bin" in _sql(inserts[2]).rsplit("WHERE", 1)[1]
+    assert "ON CONFLICT (metric, service_name, environment, dimension, bucket) DO UPDATE" in _sql(snapshot)
+
+
+def test_rebuild_never_reaches_below_the_archive_cutoff():
+    floor = datetime(2025, 7, 1)
+    assert clamp(Window(None), floor) == Window(floor)
+    window = Window(datetime(2026, 1, 1), (datetime(2025, 6, 1), datetime(2025, 8, 1)))
+    assert clamp(window, floor) == Window(datetime(2026, 1, 1), (datetime(2025, 8, 1),))
+    assert clamp(Window(None), None) == Window(None)
+
+
+def test_matrix_zero_fills_counters_and_averages_gauges():
+    counters = parse("devops_deployments_total")
+    rows = [_row(0, 3, 3, service="api", environment="prod", status="success")]
+    [series] = matrix(counters, rows, 300, 900, 300)
+    assert series["metric"] == {
+        "__name__": "devops_deployments_total", "service": "api", "environment": "prod", "status": "success",
+    }
+    assert series["values"] == [[300, "3"], [600, "0"], [900, "0"]]
+
+    mean = parse("sum by (service) (devops_deployment_duration_seconds)")
+    [series] = matrix(mean, [_row(300, 90, 4, service="api")], 300, 900, 300)
+    assert series["metric"] == {"service": "api"}
+    assert series["values"] == [[600, "22.5"]]
+
+
+def test_query_range_returns_matrix_and_caches_result(monkeypatch, fake_session):
+    session = fake_session([_row(0, 2, 2, service="api", environment="prod", status="failed")])
+    client = _client(session, monkeypatch)
+    params = {"query": "devops_deployments_total", "start": "300", "end": "600", "step": "300"}
+
+    first = client.get("/prom/api/v1/query_range", params=params)
+    second = client.post("/prom/api/v1/query_range", data=params)
+
+    assert first.status_code == second.status_code == 200
+    body = first.json()
+    assert body["status"] == "success"
+    assert body["data"]["resultType"] == "matrix"
+    assert body["data"]["result"][0]["values"] == [[300, "2"], [600, "0"]]
+    assert second.json() == body
+    assert len(session.statements) == 1
+
+
+def test_query_range_reports_bad_data(monkeypatch, fake_session):
+    client = _client(fake_session([]), monkeypatch)
+    response = client.get(
+        "/prom/api/v1/query_range",
+        params={"query": "rate(devops_deployments_total[5m])", "start": "0", "end": "600", "step": "60"},
+    )
+    assert response.status_code == 400
+    assert response.json()["errorType"] == "bad_data"
+
+
+def test_series_and_labels(monkeypatch, fake_session):
+    session = fake_session([SimpleNamespace(service_name="api", environment="prod", dimension="sev1")])
+    client = _client(session, monkeypatch)
+
+    series = client.get("/prom/api/v1/series", params={"match[]": "devops_incidents_total"}).json()
+    assert series["data"] == [{
+        "__name__": "devops_incidents_total", "environment": "prod", "service": "api", "severity": "sev1",
+    }]
+    labels = client.get("/prom/api/v1/labels").json()["data"]
+    assert {"__name__", "service", "environment", "status", "severity", "slo"} <= set(labels)
@@ -0,0 +1,172 @@
+"""Tests for the leader-elected job scheduler."""
+
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy.dialects.postgresql.asyncpg import dialect
+
+from app.services.jobs import dora_gauge_query, dora_snapshot_statements, publish_dora_gauges
+from app.services.scheduler import SCHEDULER_JOB_RUNS, Job, Scheduler
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def _runs(job: str, outcome: str) -> float:
+    return SCHEDULER_JOB_RUNS.labels(job=job, outcome=outcome)._value.get()
+
+
+@pytest.mark.anyio
+async def test_due_jobs_run_once_and_do_not_overlap():
+    calls = []
+    release = asyncio.Event()
+
+    async def slow():
+        calls.append(1)
+        await release.wait()
+
+    scheduler = Scheduler(lock_key=1)
+    job = scheduler.register("slow", slow, interval=10, timeout=5, jitter=0)
+    scheduler.is_leader = True
+    assert scheduler.run_due(0.0) == [job]
+    await asyncio.sleep(0.01)
+    assert scheduler.run_due(5.0) == []  # not due yet
+    assert scheduler.run_due(10.0) == []  # due, but the previous run is in flight
+    release.set()
+    await job.task
+    assert calls == [1]
+    assert scheduler.run_due(11.0) == [job]
+    await job.task
+
+
+@pytest.mark.anyio
+async def test_job_timeout_and_error_are_recorded():
+    async def hang():
+        await asyncio.sleep(10)
+
+    async def boom():
+        raise RuntimeError("boom")
+
+    before_timeout, before_error = _runs("hang", "timeout"), _runs("boom", "error")
+    await Job("hang", hang, interval=60, timeout=0.01).run(lag=0)
+    await Job("boom", boom, interval=60, timeout=1).run(lag=0)
+    assert _runs("hang", "timeout") == before_timeout + 1
+    assert _runs("boom", "error") == before_error + 1
+
+
+def test_jitter_spreads_next_run():
+    job = Job("j", None, interval=60, timeout=1, jitter=6)
+    runs = set()
+    for _ in range(20):
+        job.schedule_next(100.0)
+        assert 160.0 <= job.next_run <= 166.0
+        runs.add(job.next_run)
+    assert len(runs) > 1
+
+
+@pytest.mark.anyio
+async def test_step_down_cancels_running_jobs():
+    async def forever():
+        await asyncio.sleep(3600)
+
+    scheduler = Scheduler(lock_key=1)
+    job = scheduler.register("forever", forever, interval=60)
+    scheduler.is_leader = True
+    scheduler.run_due(0.0)
+    await asyncio.sleep(0.01)
+    await scheduler._step_down()
+    assert job.task.cancelled()
+    assert not scheduler.is_leader
+
+
+@pytest.mark.anyio
+async def test_worker_jobs_run_without_leadership_and_survive_step_down():
+    async def forever():
+        await asyncio.sleep(3600)
+
+    scheduler = Scheduler(lock_key=1)
+    leader_job = scheduler.register("leader", forever, interval=60)
+    worker_job = scheduler.register("worker", forever, interval=60, leader_only=False)
+    assert scheduler.run_due(0.0) == [worker_job]
+    scheduler.is_leader = True
+    assert scheduler.run_due(0.0) == [leader_job]
+    await asyncio.sleep(0.01)
+    await scheduler._step_down()
+    assert leader_job.task.cancelled()
+    assert not worker_job.task.done()
+    await scheduler.stop()
+    assert worker_job.task.cancelled()
+
+
+class _LockConnection:
+    def __init__(self, held=True, delay=0.0):
+        self.held = held
+        self.delay = delay
+        self.closed = False
+
+    async def fetchval(self, query, key):
+        await asyncio.sleep(self.delay)
+        return self.held
+
+    def is_closed(self):
+        return self.closed
+
+    async def close(self, timeout=None):
+        self.closed = True
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("connection", [
+    _LockConnection(held=False),
+    _LockConnection(delay=10),  # half-open: the probe never answers
+])
+async def test_leader_steps_down_when_lock_probe_fails(connection):
+    scheduler = Scheduler(lock_key=1, probe_timeout=0.01)
+    scheduler.is_leader, scheduler._connection = True, connection
+    await scheduler._verify_lock()
+    assert not scheduler.is_leader
+    assert connection.closed
+
+
+@pytest.mark.anyio
+async def test_leader_keeps_lock_while_probe_succeeds():
+    scheduler = Scheduler(lock_key=1, probe_timeout=0.01)
+    scheduler.is_leader, scheduler._connection = True, _LockConnection()
+    await scheduler._verify_lock()
+    assert scheduler.is_leader
+
+
+def test_dora_snapshot_uses_one_grouped_aggregate():
+    upsert, prune = (
+        str(statement.compile(dialect=dialect()))
+        for statement in dora_snapshot_statements(datetime(2026, 9, 19), datetime(2026, 10, 19))
+    )
+    assert "count(*) FILTER (WHERE deployments.status IN" in upsert
+    assert "GROUP BY deployments.environment_id" in upsert
+    assert "ON CONFLICT (environment_id) DO UPDATE" in upsert
+    assert prune.startswith("DELETE FROM dora_snapshots WHERE dora_snapshots.computed_at <")
+
+
+def test_dora_gauges_read_only_fresh_snapshots():
+    sql = str(dora_gauge_query(datetime.utcnow()).compile(dialect=dialect()))
+    assert "FROM dora_snapshots" in sql
+    assert "WHERE dora_snapshots.computed_at >=" in sql
+
+
+def test_dora_gauges_drop_environments_without_deployments():
+    def frequency(environment):
+        return REGISTRY.get_sample_value("deployment_frequency_per_day", {"environment": environment})
+
+    publish_dora_gauges([
+        SimpleNamespace(environment="production", total=30, failed=3),
+        SimpleNamespace(environment="qa", total=60, failed=0),
+    ])
+    assert frequency("qa") == 2.0
+    publish_dora_gauges([SimpleNamespace(environment="production", total=30, failed=3)])
+    assert frequency("qa") is None
+    assert frequency("production") == 1.0
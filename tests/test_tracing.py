@@ -0,0 +1,107 @@
+"""Tests for tracing with tail sampling."""
+
+import asyncio
+import time
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from httpx import AsyncClient, ASGITransport
+from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.trace import Status, StatusCode
+
+from app.core.tracing import TailSamplingProcessor
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def traced():
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider(shutdown_on_exit=False)
+    provider.add_span_processor(
+        TailSamplingProcessor(SimpleSpanProcessor(exporter), slow_threshold=0.05, keep_ratio=0.0)
+    )
+    return provider.get_tracer("test"), exporter
+
+
+def _names(exporter):
+    return sorted(span.name for span in exporter.get_finished_spans())
+
+
+def test_fast_successful_traces_are_dropped(traced):
+    tracer, exporter = traced
+    with tracer.start_as_current_span("request"):
+        with tracer.start_as_current_span("query"):
+            pass
+    assert _names(exporter) == []
+
+
+def test_slow_traces_are_kept_whole(traced):
+    tracer, exporter = traced
+    with tracer.start_as_current_span("request"):
+        with tracer.start_as_current_span("query"):
+            time.sleep(0.06)
+    assert _names(exporter) == ["query", "request"]
+
+
+def test_error_in_any_span_keeps_the_trace(traced):
+    tracer, exporter = traced
+    with tracer.start_as_current_span("request"):
+        with tracer.start_as_current_span("query") as span:
+            span.set_status(Status(StatusCode.ERROR))
+    assert _names(exporter) == ["query", "request"]
+
+
+def test_stragglers_follow_the_trace_decision(traced):
+    tracer, exporter = traced
+    with tracer.start_as_current_span("request"):
+        late = tracer.start_span("background")
+        time.sleep(0.06)
+    late.end()
+    assert _names(exporter) == ["background", "request"]
+
+
+def _app(provider):
+    app = FastAPI()
+
+    @app.get("/fast")
+    async def fast():
+        return {"ok": True}
+
+    @app.get("/slow")
+    async def slow():
+        await asyncio.sleep(0.06)
+        return {"ok": True}
+
+    @app.get("/boom")
+    async def boom():
+        raise HTTPException(status_code=503)
+
+    FastAPIInstrumentor.instrument_app(app, tracer_provider=provider)
+    return app
+
+
+@pytest.mark.anyio
+async def test_fastapi_requests_are_tail_sampled():
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider(shutdown_on_exit=False)
+    provider.add_span_processor(
+        TailSamplingProcessor(SimpleSpanProcessor(exporter), slow_threshold=0.05, keep_ratio=0.0)
+    )
+    transport = ASGITransport(app=_app(provider))
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        await ac.get("/fast")
+        await ac.get("/slow")
+        await ac.get("/boom")
+
+    names = _names(exporter)
+    assert "GET /slow" in names
+    assert "GET /boom" in names
+    assert "GET /fast" not in names
+    assert not any(name.endswith("http send") for name in names)